@@ -1,254 +1,210 @@
+import time
+RUN_START = time.perf_counter()
+
 import streamlit as st
-import tensorflow as tf
-from PIL import Image
 import numpy as np
+import io
+import logging
 import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import time
-import matplotlib.pyplot as plt
-import gdown
-import os
+from dataclasses import replace
+
+from smartwaste.heuristics import extract_features, detect_non_waste_image, looks_like_document
+from smartwaste.artifacts import ArtifactStore
+from smartwaste.backends import backend_model_path
+from smartwaste.cache import CacheEntry, PredictionCache, content_key
+from smartwaste.decode import decode_image
+from smartwaste.history import COLUMNS as HISTORY_COLUMNS, HistoryStore
+from smartwaste.pipeline import OrderedResults
+from smartwaste.previews import PreviewCache, asset_preview
+from smartwaste.similarity import SimilarityIndex, image_signature
+from smartwaste.metrics import MetricsRegistry, start_json_log, start_metrics_server
+from smartwaste.inference import CONFIDENCE_THRESHOLD, DEFAULT_MODEL_PATH, predict_batch
+from smartwaste.registry import ModelRegistry, ModelSpec, ShadowRunner
+from smartwaste.startup import BackgroundModelLoader
+from smartwaste.stream import (BUCKET_SECONDS, DEDUP_THRESHOLD, DEFAULT_SAMPLE_FPS, FrameGate, StreamClassifier,
+                               Timeline, iter_frames)
 
 # --- KONFIGURASI MODEL DAN LABEL ---
-MODEL_PATH = "model97.h5"
-class_names = ['Organik', 'Anorganik']
-
-# Download model jika belum ada
-if not os.path.exists(MODEL_PATH):
-    url = "https://drive.google.com/uc?1gT0XYZabCyzD4B_JgKfMb7P-vn"  # GANTI dengan ID file Drive asli kamu
-    gdown.download(url, MODEL_PATH, quiet=False)
+MODEL_PATH = DEFAULT_MODEL_PATH
+INFERENCE_BACKEND = os.environ.get("SMARTWASTE_BACKEND", "keras")  # keras | tflite | numpy
+BACKEND_MODEL_PATH = backend_model_path(INFERENCE_BACKEND, MODEL_PATH)  # .h5 / .tflite / .npz
+MODEL_VERSION = os.environ.get("SMARTWASTE_MODEL_VERSION", "model97")  # Versi di artifact store (models/manifest.json)
+MODEL_URL = "https://drive.google.com/uc?1gT0XYZabCyzD4B_JgKfMb7P-vn"  # GANTI dengan ID file Drive asli kamu
+MODEL_SHA256 = os.environ.get("SMARTWASTE_MODEL_SHA256")  # Hash sha256 file di MODEL_URL; diisi = unduhan wajib cocok
+MODEL_REGISTRY_PATH = os.environ.get("SMARTWASTE_MODEL_REGISTRY", "model_registry.json")  # Daftar model (JSON); tidak ada = hanya model di atas
+PRIMARY_MODEL = os.environ.get("SMARTWASTE_MODEL")  # Nama model utama di registry; kosong = entri pertama
+CANDIDATE_MODEL = os.environ.get("SMARTWASTE_CANDIDATE_MODEL")  # Model kandidat untuk shadow mode / canary
+SHADOW_ENABLED = os.environ.get("SMARTWASTE_SHADOW", "1") not in ("0", "false", "")  # Kandidat ikut memprediksi di belakang layar
+CANARY_FRACTION = float(os.environ.get("SMARTWASTE_CANARY_FRACTION", "0"))  # Porsi sesi baru yang dilayani kandidat (0-1)
+MODEL_MEMORY_MB = float(os.environ.get("SMARTWASTE_MODEL_MEMORY_MB", "1024"))  # Anggaran model yang tetap dimuat (LRU)
+INFERENCE_WORKERS = int(os.environ.get("SMARTWASTE_INFERENCE_WORKERS", "0"))  # Proses inferensi dengan bobot bersama; 0 = di proses Streamlit
+BATCH_SIZE = 64  # Jumlah gambar per panggilan model.predict
+CACHE_MAX_ENTRIES = 2048  # Jumlah hasil prediksi yang disimpan di cache
+CACHE_MAX_AGE = 6 * 3600  # Umur maksimum entri cache (detik)
+DECODE_WORKERS = min(8, os.cpu_count() or 1)  # Thread decode/validasi (dibagi semua sesi)
+DECODE_WINDOW = 4 * BATCH_SIZE  # Jumlah file yang boleh di-decode lebih dulu dari yang dirender
+GRID_COLUMNS = 4  # Jumlah kolom grid hasil klasifikasi
+PREVIEW_CACHE_BYTES = 64 << 20  # Total ukuran preview WebP/JPEG yang disimpan (dibagi semua sesi)
+HISTORY_PATH = os.environ.get("SMARTWASTE_HISTORY_DB", "history.db")  # Riwayat prediksi persisten (SQLite)
+HISTORY_PAGE_SIZE = 50  # Baris per halaman tabel riwayat
+SIMILARITY_MAX_DISTANCE = int(os.environ.get("SMARTWASTE_SIMILARITY_DISTANCE", "6"))  # Bit dHash; <0 = tanpa indeks foto serupa
+METRICS_ENABLED = os.environ.get("SMARTWASTE_METRICS", "0") not in ("0", "false", "")  # Histogram latensi per tahap
+METRICS_PORT = int(os.environ.get("SMARTWASTE_METRICS_PORT", "0"))  # >0: endpoint teks Prometheus di /metrics
+METRICS_LOG = os.environ.get("SMARTWASTE_METRICS_LOG")  # Path file: snapshot metrik sebagai baris JSON tiap menit
+VIDEO_TYPES = ["mp4", "avi", "mov", "mkv", "webm", "gif", "webp"]  # mp4/avi/mov/mkv/webm butuh opencv-python-headless
 
 st.set_page_config(page_title="SmartWaste", layout="wide")
+logger = logging.getLogger("smartwaste.app")
 
 @st.cache_resource
-def load_model():
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"Model tidak ditemukan: {MODEL_PATH}")
-    return tf.keras.models.load_model(MODEL_PATH)
+def get_model_registry():
+    # Model dimuat saat pertama dipakai dan dilepas (LRU) jika melebihi anggaran memori
+    if os.path.exists(MODEL_REGISTRY_PATH):
+        registry = ModelRegistry.from_file(MODEL_REGISTRY_PATH, memory_budget_mb=MODEL_MEMORY_MB)
+    else:
+        # Tanpa file registry: file model lokal (termasuk hasil ekspor python -m smartwaste.convert) dipakai langsung;
+        # jika tidak ada, versi model diambil dari artifact store: diunduh sekali, atomik dan terverifikasi hash
+        if not os.path.exists(BACKEND_MODEL_PATH):
+            # MODEL_URL milik versi yang dikonfigurasi; versi yang sudah terdaftar (CLI artifacts) tidak ditimpa
+            ArtifactStore().register(MODEL_VERSION, MODEL_URL, sha256=MODEL_SHA256, filename=MODEL_PATH)
+        spec = ModelSpec(name=MODEL_VERSION, path=BACKEND_MODEL_PATH, backend=INFERENCE_BACKEND, version=MODEL_VERSION,
+                         workers=INFERENCE_WORKERS)
+        registry = ModelRegistry([spec], memory_budget_mb=MODEL_MEMORY_MB)
+    if CANDIDATE_MODEL and CANDIDATE_MODEL not in registry.names():
+        # Salah ketik nama kandidat cukup diperingatkan sekali; shadow dan canary dimatikan
+        logger.warning("Model kandidat %s tidak terdaftar (tersedia: %s); shadow mode dan canary dimatikan",
+                       CANDIDATE_MODEL, ", ".join(registry.names()))
+    return registry
+
+def candidate_model_name():
+    # None jika tidak ada kandidat atau namanya tidak terdaftar di registry
+    return CANDIDATE_MODEL if CANDIDATE_MODEL in get_model_registry().names() else None
+
+def primary_model_name():
+    registry = get_model_registry()
+    return registry.spec(PRIMARY_MODEL).name if PRIMARY_MODEL else registry.names()[0]
 
-try:
-    model = load_model()
-except FileNotFoundError as e:
-    st.error(e)
-    st.stop()
+@st.cache_resource
+def get_model_loader():
+    # Dipanggil di run pertama: model utama dimuat dan di-warm-up di background,
+    # halaman yang tidak butuh model tidak perlu menunggu tensorflow.
+    # Loader tidak menyimpan model: setiap run mengambilnya dari registry agar LRU tetap berlaku
+    registry = get_model_registry()
+    name = primary_model_name()
+    return BackgroundModelLoader(lambda: registry.get(name), keep_model=False)
 
-# Fungsi untuk validasi gambar sampah
-def validate_waste_image(image, debug_mode=False):
-    # Bypass: always valid
-    return True, "Gambar valid"
+model_loader = get_model_loader()
 
-# Fungsi tambahan untuk deteksi gambar yang bukan sampah
-def is_likely_not_waste(image):
+@st.cache_resource
+def get_shadow_runner():
+    # Kandidat memprediksi batch yang sama di thread sendiri; hasil ke pengguna tidak menunggu
+    candidate = candidate_model_name()
+    if candidate is None or not SHADOW_ENABLED:
+        return None
+    return ShadowRunner(get_model_registry(), candidate, metrics=get_metrics())
+
+def load_model(name):
     """
-    Deteksi tambahan untuk gambar yang kemungkinan bukan sampah
+    Model siap pakai untuk halaman ini; None jika gagal dimuat (error sudah ditampilkan)
     """
-    img_array = np.array(image)
-    gray = np.mean(img_array, axis=2)
-    
-    # Deteksi area putih yang besar (kemungkinan dokumen)
-    white_areas = np.sum(gray > 200)
-    if white_areas > img_array.shape[0] * img_array.shape[1] * 0.7:
-        return True, "Gambar terlalu banyak area putih. Kemungkinan dokumen atau kertas."
-    
-    # Deteksi pola grid (kemungkinan tabel)
-    # Cek apakah ada pola garis yang teratur
-    h_edges = np.abs(np.diff(gray, axis=1))
-    v_edges = np.abs(np.diff(gray, axis=0))
-    
-    # Hitung garis horizontal dan vertikal yang kuat
-    strong_h_lines = np.sum(h_edges > 40)
-    strong_v_lines = np.sum(v_edges > 40)
-    
-    if strong_h_lines > img_array.shape[0] * 0.5 or strong_v_lines > img_array.shape[1] * 0.5:
-        return True, "Gambar terdeteksi memiliki pola grid/tabel. Hanya upload gambar sampah."
-    
-    return False, ""
+    loader = None
+    try:
+        with st.spinner('⏳ Memuat model...'):
+            if name == primary_model_name():
+                loader = get_model_loader()
+                loader.get()  # tunggu warm-up di background
+            return get_model_registry().get(name)
+    except Exception as e:
+        # Semua error muat (file hilang/rusak, unduhan, worker, error TensorFlow) ditampilkan, bukan traceback.
+        # Loader yang gagal tidak disimpan di cache: run berikutnya mencoba memuat (mengunduh) ulang
+        if loader is not None:
+            get_model_loader.clear()
+        logger.exception("Model %s gagal dimuat", name)
+        st.error(f"❌ Model gagal dimuat: {e}")
+        return None
+
+def get_session_model():
+    # Canary: sebagian sesi baru dilayani model kandidat; pilihan tetap selama sesi berjalan
+    if "model_route" not in st.session_state:
+        candidate = candidate_model_name()
+        canary = candidate is not None and random.random() < CANARY_FRACTION
+        st.session_state.model_route = candidate if canary else primary_model_name()
+    return st.session_state.model_route
 
-# Fungsi untuk deteksi wajah sederhana
-def detect_face_simple(image):
-    """
-    Deteksi wajah sederhana berdasarkan karakteristik wajah
-    """
-    img_array = np.array(image)
-    gray = np.mean(img_array, axis=2)
-    
-    # Deteksi area kulit (warna kulit manusia) - menggunakan RGB
-    # Warna kulit biasanya memiliki R > G > B
-    r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
-    
-    # Deteksi area dengan karakteristik warna kulit
-    skin_mask = (r > 95) & (g > 40) & (b > 20) & (r > g) & (r > b) & (abs(r - g) > 15)
-    skin_ratio = np.sum(skin_mask) / (img_array.shape[0] * img_array.shape[1])
-    
-    # Deteksi topeng atau benda putih yang menutupi wajah
-    # Topeng kartun biasanya berwarna putih dengan detail hitam
-    white_mask = (r > 200) & (g > 200) & (b > 200)  # Area putih
-    black_details = (r < 50) & (g < 50) & (b < 50)   # Detail hitam
-    
-    white_ratio = np.sum(white_mask) / (img_array.shape[0] * img_array.shape[1])
-    black_ratio = np.sum(black_details) / (img_array.shape[0] * img_array.shape[1])
-    
-    # Jika ada area putih yang besar dengan detail hitam, kemungkinan topeng
-    if white_ratio > 0.2 and black_ratio > 0.05:
-        return True, "Gambar terdeteksi mengandung topeng atau benda yang menutupi wajah. Hanya upload gambar sampah."
-    
-    # Jika terlalu banyak area kulit, kemungkinan wajah
-    if skin_ratio > 0.25:
-        return True, "Gambar terdeteksi mengandung wajah/orang. Hanya upload gambar sampah."
-    
-    # Deteksi area gelap yang bisa jadi rambut
-    dark_areas = np.sum(gray < 80)
-    dark_ratio = dark_areas / (img_array.shape[0] * img_array.shape[1])
-    
-    # Kombinasi area kulit dan area gelap yang tinggi
-    if skin_ratio > 0.1 and dark_ratio > 0.15:
-        return True, "Gambar terdeteksi mengandung wajah/orang. Hanya upload gambar sampah."
-    
-    # Deteksi pola simetris yang bisa jadi wajah
-    # Wajah biasanya memiliki pola simetris
-    height, width = gray.shape
-    mid_width = width // 2
-    
-    # Bandingkan sisi kiri dan kanan untuk simetri
-    if mid_width > 0:
-        left_side = gray[:, :mid_width]
-        right_side = gray[:, mid_width:2*mid_width]
-        
-        if right_side.shape[1] == left_side.shape[1] and left_side.shape[1] > 0:
-            symmetry_diff = np.mean(np.abs(left_side - np.fliplr(right_side)))
-            if symmetry_diff < 25 and skin_ratio > 0.05:
-                return True, "Gambar terdeteksi memiliki pola simetris seperti wajah. Hanya upload gambar sampah."
-    
-    # Deteksi area bulat/oval yang bisa jadi kepala atau topeng
-    # Hitung gradient untuk deteksi tepi
-    grad_x = np.abs(np.diff(gray, axis=1))
-    grad_y = np.abs(np.diff(gray, axis=0))
-    
-    # Deteksi area dengan gradient melingkar (kemungkinan kepala/topeng)
-    if grad_x.shape[1] > 0 and grad_y.shape[0] > 0:
-        # Pastikan dimensi kompatibel
-        min_height = min(grad_x.shape[0], grad_y.shape[0])
-        min_width = min(grad_x.shape[1], grad_y.shape[1])
-        
-        if min_height > 0 and min_width > 0:
-            # Ambil bagian yang kompatibel dari kedua gradient
-            grad_x_compat = grad_x[:min_height, :min_width]
-            grad_y_compat = grad_y[:min_height, :min_width]
-            
-            circular_gradient = np.sqrt(grad_x_compat**2 + grad_y_compat**2)
-            high_gradient_areas = np.sum(circular_gradient > 30)
-            
-            # Deteksi bentuk oval dengan kombinasi area putih dan gradient melingkar
-            if high_gradient_areas > (img_array.shape[0] * img_array.shape[1] * 0.08):
-                if skin_ratio > 0.05:
-                    return True, "Gambar terdeteksi mengandung bentuk kepala/wajah. Hanya upload gambar sampah."
-                elif white_ratio > 0.15:  # Jika ada area putih yang besar dengan bentuk oval
-                    return True, "Gambar terdeteksi mengandung topeng atau benda oval putih. Hanya upload gambar sampah."
-    
-    # Deteksi foto dengan efek blur atau gerakan (kemungkinan selfie)
-    # Foto blur biasanya memiliki variasi gradient yang rendah
-    if grad_x.shape[1] > 0 and grad_y.shape[0] > 0:
-        min_height = min(grad_x.shape[0], grad_y.shape[0])
-        min_width = min(grad_x.shape[1], grad_y.shape[1])
-        
-        if min_height > 0 and min_width > 0:
-            grad_x_compat = grad_x[:min_height, :min_width]
-            grad_y_compat = grad_y[:min_height, :min_width]
-            
-            # Hitung rata-rata gradient (indikator blur)
-            avg_gradient = np.mean(np.sqrt(grad_x_compat**2 + grad_y_compat**2))
-            
-            # Jika gradient terlalu rendah (terlalu blur) dan ada area putih, kemungkinan foto selfie
-            if avg_gradient < 20 and white_ratio > 0.1:
-                return True, "Gambar terdeteksi sebagai foto blur/selfie. Hanya upload gambar sampah."
-            
-            # Deteksi foto dengan gerakan (streaking effect)
-            # Foto dengan gerakan biasanya memiliki gradient yang tidak teratur
-            gradient_std = np.std(np.sqrt(grad_x_compat**2 + grad_y_compat**2))
-            if gradient_std > 25 and white_ratio > 0.1:
-                return True, "Gambar terdeteksi sebagai foto dengan gerakan/selfie. Hanya upload gambar sampah."
-    
-    return False, ""
+@st.cache_resource
+def get_prediction_cache():
+    # Dibagi ke semua sesi sehingga file yang sama tidak diprediksi ulang
+    return PredictionCache(max_entries=CACHE_MAX_ENTRIES, max_age=CACHE_MAX_AGE)
 
-# Fungsi untuk deteksi foto/gambar yang bukan sampah
-def detect_non_waste_image(image):
-    """
-    Deteksi komprehensif untuk gambar yang bukan sampah
-    """
-    img_array = np.array(image)
-    
-    # Deteksi wajah
-    is_face, face_message = detect_face_simple(image)
-    if is_face:
-        return True, face_message
-    
-    # Deteksi dokumen/tabel
-    is_not_waste, not_waste_message = is_likely_not_waste(image)
-    if is_not_waste:
-        return True, not_waste_message
-    
-    # Deteksi screenshot atau interface - LEBIH KETAT
-    gray = np.mean(img_array, axis=2)
-    
-    # Deteksi area dengan warna yang sangat terang (kemungkinan UI/screenshot)
-    bright_areas = np.sum(gray > 240)
-    if bright_areas > img_array.shape[0] * img_array.shape[1] * 0.3:  # Lebih ketat dari 0.5
-        return True, "Gambar terdeteksi sebagai screenshot atau interface. Hanya upload gambar sampah."
-    
-    # Deteksi area dengan warna yang sangat gelap (kemungkinan foto gelap)
-    dark_areas = np.sum(gray < 50)
-    if dark_areas > img_array.shape[0] * img_array.shape[1] * 0.4:  # Lebih ketat dari 0.6
-        return True, "Gambar terlalu gelap. Pastikan gambar sampah terlihat jelas."
-    
-    # Deteksi gambar dengan terlalu banyak warna (kemungkinan foto atau seni)
-    color_variance = np.std(img_array)
-    if color_variance > 70:  # Lebih ketat dari 80
-        # Cek apakah ini foto yang terlalu berwarna
-        bright_colors = np.sum(np.std(img_array, axis=2) > 35)  # Lebih ketat dari 40
-        if bright_colors > img_array.shape[0] * img_array.shape[1] * 0.25:  # Lebih ketat dari 0.3
-            return True, "Gambar terdeteksi sebagai foto berwarna. Hanya upload gambar sampah."
-    
-    # Deteksi khusus untuk screenshot terminal/console
-    # Terminal biasanya memiliki background gelap dengan teks terang
-    dark_background = np.sum(gray < 100)  # Area gelap (background terminal)
-    bright_text = np.sum(gray > 200)      # Area terang (teks terminal)
-    
-    # Jika ada banyak area gelap DAN area terang, kemungkinan screenshot terminal
-    if dark_background > img_array.shape[0] * img_array.shape[1] * 0.3 and bright_text > img_array.shape[0] * img_array.shape[1] * 0.05:
-        return True, "Gambar terdeteksi sebagai screenshot terminal/console. Hanya upload gambar sampah."
-    
-    # Deteksi pola teks (garis horizontal yang teratur)
-    # Screenshot terminal biasanya memiliki banyak garis horizontal
-    h_edges = np.abs(np.diff(gray, axis=1))
-    strong_h_lines = np.sum(h_edges > 25)  # Lebih sensitif
-    if strong_h_lines > img_array.shape[0] * img_array.shape[1] * 0.15:  # Lebih sensitif
-        return True, "Gambar terdeteksi memiliki pola teks seperti screenshot. Hanya upload gambar sampah."
-    
-    # Deteksi karakteristik khusus terminal (background gelap dengan teks berwarna)
-    # Terminal sering memiliki teks hijau, kuning, atau putih di background hitam
-    r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
-    
-    # Deteksi teks hijau (karakteristik terminal)
-    green_text = np.sum((g > 150) & (r < 100) & (b < 100))
-    if green_text > img_array.shape[0] * img_array.shape[1] * 0.05:
-        return True, "Gambar terdeteksi memiliki teks hijau seperti terminal. Hanya upload gambar sampah."
-    
-    # Deteksi teks kuning (karakteristik terminal)
-    yellow_text = np.sum((r > 200) & (g > 200) & (b < 100))
-    if yellow_text > img_array.shape[0] * img_array.shape[1] * 0.05:
-        return True, "Gambar terdeteksi memiliki teks kuning seperti terminal. Hanya upload gambar sampah."
-    
-    return False, ""
+@st.cache_resource
+def get_decode_executor():
+    # PIL dan NumPy melepas GIL saat decode/resize dan operasi array, jadi thread cukup
+    return ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
 
-if 'history' not in st.session_state:
-    st.session_state.history = pd.DataFrame(columns=["Time", "Prediction", "Confidence"])
+@st.cache_resource
+def get_preview_cache():
+    # Preview kecil dibuat sekali per isi file; rerun mengirim bytes yang sama, bukan PNG penuh hasil encode ulang
+    return PreviewCache(max_bytes=PREVIEW_CACHE_BYTES)
+
+@st.cache_resource
+def get_asset(path, width):
+    # Aset statis (PNG beberapa MB) diperkecil dan di-encode sekali per proses
+    return asset_preview(path, width)
+
+@st.cache_resource
+def get_similarity_index(model_id):
+    # Indeks dHash foto yang sudah diklasifikasikan, per model; disimpan di database riwayat
+    if SIMILARITY_MAX_DISTANCE < 0:
+        return None
+    return SimilarityIndex(HISTORY_PATH, model_id, max_distance=SIMILARITY_MAX_DISTANCE)
+
+@st.cache_resource
+def get_history_store():
+    # Satu koneksi SQLite (WAL) untuk semua sesi; riwayat bertahan walau sesi/proses berakhir
+    return HistoryStore(HISTORY_PATH)
+
+def spooled_export(export):
+    # Ekspor ditulis per chunk ke file sementara (di disk jika besar), bukan dibangun sebagai DataFrame
+    output = tempfile.SpooledTemporaryFile(max_size=8 << 20)
+    export(output)
+    output.seek(0)
+    return output
+
+@st.cache_resource
+def get_metrics():
+    # Satu registry per proses; eksporter dijalankan sekali
+    metrics = MetricsRegistry(enabled=METRICS_ENABLED or bool(METRICS_PORT or METRICS_LOG))
+    if METRICS_PORT:
+        start_metrics_server(metrics, METRICS_PORT)
+    if METRICS_LOG:
+        start_json_log(metrics, METRICS_LOG)
+    return metrics
+
+def format_timings(timings):
+    # Rincian waktu per gambar untuk debug mode, mis. "decode 3.1 ms, features 2.0 ms, total 5.1 ms"
+    if not timings:
+        return "-"
+    parts = [f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in timings.items()]
+    return ", ".join(parts + [f"total {sum(timings.values()) * 1000:.1f} ms"])
+
+# Fungsi untuk validasi gambar sampah
+def validate_waste_image(image, debug_mode=False):
+    # Bypass: always valid
+    return True, "Gambar valid"
+
+if 'recorded_keys' not in st.session_state:
+    st.session_state.recorded_keys = set()
 
 # --- HALAMAN BERANDA ---
 def page_home():
     st.title("🌿 Selamat Datang di SmartWaste")
     col1, col2, col3 = st.columns([1,2,1])
     with col2:
-        st.image("assets/1.png", caption="SmartWaste - Klasifikasi Sampah Organik & Anorganik", width=550)
+        st.image(get_asset("assets/1.png", 550), caption="SmartWaste - Klasifikasi Sampah Organik & Anorganik", width=550)
     # Tulisan di pojok kiri
     st.markdown(
         "<h4 style='text-align: center; margin-center: 5px;'>Mulai klasifikasikan sampahmu sekarang!</h4>",
@@ -257,6 +213,7 @@ def page_home():
     st.markdown("""
     ### Fitur Utama
     - 📷 **Klasifikasi Sampah Otomatis**: Upload foto sampah dan dapatkan hasil klasifikasi langsung (organik/anorganik) dengan tingkat kepercayaan.
+    - 🎥 **Klasifikasi Video/Kamera**: Arahkan kamera ke jalur pemilahan atau unggah video, lalu lihat jumlah per kelas dari waktu ke waktu.
     - 📊 **Riwayat Prediksi**: Lihat riwayat hasil klasifikasi yang telah Anda lakukan dan Anda bisa menyimpan hasilnya berbentuk file.csv.
     - 📚 **Artikel Edukatif**: Pelajari perbedaan dan pengelolaan sampah organik & anorganik.
     """)
@@ -288,6 +245,13 @@ def page_classification():
     with col2:
         bypass_validation = st.checkbox("🚀 Bypass Validasi (Untuk testing)")
     
+    registry = get_model_registry()
+    model_names = registry.names()
+    model_name = get_session_model()
+    if len(model_names) > 1:
+        # Revisi model bisa dibandingkan langsung; default mengikuti pembagian canary sesi ini
+        model_name = st.selectbox("🧠 Model", model_names, index=model_names.index(model_name))
+    
     if bypass_validation:
         st.warning("⚠️ **Mode Testing Aktif**: Validasi gambar dilewati. Hanya gunakan untuk testing dataset.")
     st.markdown("""
@@ -312,7 +276,12 @@ def page_classification():
     )
 
     if uploaded_files:
-        st.session_state.history = pd.DataFrame(columns=["Time", "Prediction", "Confidence"])
+        model = load_model(model_name)
+        if model is None:
+            return
+        model_id = model.identity
+        shadow = get_shadow_runner()
+        
         file_names = [f.name for f in uploaded_files]
         selected_files = st.multiselect(
             "Pilih file yang ingin diprediksi:",
@@ -320,89 +289,403 @@ def page_classification():
             default=file_names  # default: semua terpilih
         )
         
+        cache = get_prediction_cache()
+        previews = get_preview_cache()
+        similarity = get_similarity_index(model_id)
+        metrics = get_metrics()
+        timings = {}  # rincian waktu per gambar (hanya diisi di debug mode)
+        
+        def timed(stage, key):
+            return metrics.timer(stage, timings.setdefault(key, {}) if debug_mode else None)
+        
+        # Kunci cache dihitung di thread utama; decode dan validasi berjalan paralel di thread pool
+        jobs = []
         for uploaded_file in uploaded_files:
             if uploaded_file.name in selected_files:
-                image = Image.open(uploaded_file).convert("RGB")
-                
-                # Validasi gambar sampah (skip jika bypass mode aktif)
-                if not bypass_validation:
-                    is_valid, validation_message = validate_waste_image(image, debug_mode)
-                    
-                    if not is_valid:
-                        st.error(f"❌ **{uploaded_file.name}**: {validation_message}")
-                        if debug_mode:
-                            st.image(image, caption=f"Gambar ditolak: {uploaded_file.name}", width=300)
-                        continue
-                    
+                data = uploaded_file.getvalue()
+                key = content_key(data, model_id)
+                jobs.append((uploaded_file, data, key, cache.get(key)))
+        
+        def prepare(job):
+            # Berjalan di worker thread: tidak boleh memanggil st.*
+            uploaded_file, data, key, entry = job
+            if entry is not None and (bypass_validation or entry.verdict is not None):
+                # Hit lengkap (verdict, prediksi, fitur dokumen, preview sudah ada): tidak perlu decode sama sekali
+                shown = bypass_validation or not entry.verdict[0]
+                complete = not shown or (entry.prediction is not None
+                                         and (entry.features is not None or entry.document_like is not None))
+                preview = previews.peek(key) if shown or debug_mode else None
+                if complete and (preview is not None or not (shown or debug_mode)):
+                    return None, None, preview, None
+            with timed("decode", key):
+                image = decode_image(data)  # satu gambar kerja untuk heuristik, tensor 50x50 dan preview
+            validation = None
+            similar = None
+            verdict = entry.verdict if entry is not None else None
+            if entry is None and similarity is not None:
+                # Foto yang hampir sama (sudut/kompresi lain) memakai ulang verdict dan prediksi yang tersimpan
+                with timed("similarity", key):
+                    signature = image_signature(image)
+                    match = similarity.lookup(signature, require_prediction=bypass_validation)
+                if match is not None:
+                    verdict = (match.rejected, match.message)
+                similar = (signature, match)
+            if not bypass_validation and verdict is None:
+                start = time.perf_counter()
+                is_valid, validation_message = validate_waste_image(image, debug_mode)
+                with timed("features", key):
+                    features = (entry and entry.features) or extract_features(image)
+                if not is_valid:
+                    verdict = (True, validation_message)
+                else:
                     # Deteksi tambahan untuk gambar yang bukan sampah
-                    is_not_waste, not_waste_message = detect_non_waste_image(image)
-                    if is_not_waste:
-                        st.error(f"❌ **{uploaded_file.name}**: {not_waste_message}")
-                        if debug_mode:
-                            st.image(image, caption=f"Gambar ditolak: {uploaded_file.name}", width=300)
-                        continue
+                    with timed("rules", key):
+                        verdict = detect_non_waste_image(image, features)
+                validation = (features, verdict, time.perf_counter() - start)
+            # Gambar yang ditolak hanya ditampilkan di debug mode
+            preview = None
+            if bypass_validation or debug_mode or not verdict[0]:
+                with timed("preview", key):
+                    preview = previews.get(key, image)
+            return image, validation, preview, similar
+        
+        confidence_threshold = CONFIDENCE_THRESHOLD
+        new_entries = []
+        
+        def render(uploaded_file, key, cache_hit, image, preview, entry):
+            name = uploaded_file.name
+            if bypass_validation:
+                st.info(f"🚀 **{name}**: Validasi dilewati")
+            elif entry.verdict[0]:
+                st.error(f"❌ **{name}**: {entry.verdict[1]}")
+                if entry.similar_distance is not None:
+                    st.caption(f"♻️ Hasil dari foto serupa (jarak {entry.similar_distance})")
+                if debug_mode:
+                    with timed("render", key):
+                        st.image(preview, caption=f"Gambar ditolak: {name}", width="stretch")
+                    st.write(f"🔍 Debug: Waktu = {format_timings(timings.get(key))}")
+                return
+            prediction = entry.prediction
+            
+            with timed("render", key):
+                st.image(preview, caption=f"Gambar: {name}", width="stretch")
+            
+            predicted_label = model.class_names[np.argmax(prediction)]
+            confidence = np.max(prediction) * 100
+            
+            if debug_mode:
+                lookup = 'hit' if cache_hit else ('miss' if entry.similar_distance is None else f'foto serupa, jarak {entry.similar_distance}')
+                st.write(f"🔍 Debug: Cache = {lookup} (validasi {entry.validation_time * 1000:.1f} ms, prediksi {entry.predict_time * 1000:.1f} ms)")
+                st.write(f"🔍 Debug: Waktu = {format_timings(timings.get(key))}")
+                st.write(f"🔍 Debug: Raw prediction = {prediction}")
+                st.write(f"🔍 Debug: Predicted label = {predicted_label}")
+                st.write(f"🔍 Debug: Confidence = {confidence:.2f}%")
+            
+            if confidence < confidence_threshold:
+                st.warning(f"⚠️ **{name}**: Tingkat kepercayaan rendah ({confidence:.2f}%). Kemungkinan gambar bukan sampah yang sesuai. Silakan upload gambar sampah yang lebih jelas.")
+            else:
+                # Validasi tambahan berdasarkan hasil prediksi (lebih longgar)
+                if entry.features is None and entry.document_like is None:
+                    entry = cache.put(key, replace(entry, features=extract_features(image)))
+                document_like = entry.document_like if entry.features is None else looks_like_document(entry.features)
+                if document_like:
+                    st.error(f"❌ **{name}**: Gambar terdeteksi sebagai dokumen/kertas. Hanya upload gambar sampah.")
                 else:
-                    st.info(f"🚀 **{uploaded_file.name}**: Validasi dilewati")
-                
-                # Tampilkan gambar di tengah hanya saat proses
-                with st.spinner('🔄 Memproses gambar...'):
-                    col1, col2, col3 = st.columns([1,2,1])
-                    with col2:
-                        st.image(image, caption=f"Gambar: {uploaded_file.name}", width=400)
-                    
-                    img = image.resize((50, 50))
-                    img_array = np.array(img).astype(np.float32) / 255.0
-                    img_array = np.expand_dims(img_array, axis=0)
-                    
-                    if debug_mode:
-                        st.write(f"🔍 Debug: Input shape = {img_array.shape}")
-                        st.write(f"🔍 Debug: Input range = {np.min(img_array):.3f} - {np.max(img_array):.3f}")
-                    
-                    try:
-                        prediction = model.predict(img_array, verbose=0)  # Hilangkan output verbose
-                        predicted_label = class_names[np.argmax(prediction)]
-                        confidence = np.max(prediction) * 100
-                        confidence_threshold = 60  # Turunkan threshold confidence (%)
-                        
-                        if debug_mode:
-                            st.write(f"🔍 Debug: Raw prediction = {prediction}")
-                            st.write(f"🔍 Debug: Predicted label = {predicted_label}")
-                            st.write(f"🔍 Debug: Confidence = {confidence:.2f}%")
-                        
-                        if confidence < confidence_threshold:
-                            st.warning(f"⚠️ **{uploaded_file.name}**: Tingkat kepercayaan rendah ({confidence:.2f}%). Kemungkinan gambar bukan sampah yang sesuai. Silakan upload gambar sampah yang lebih jelas.")
-                        else:
-                            # Validasi tambahan berdasarkan hasil prediksi (lebih longgar)
-                            gray_img = np.mean(np.array(image), axis=2)
-                            white_ratio = np.sum(gray_img > 200) / (gray_img.shape[0] * gray_img.shape[1])
-                            
-                            if white_ratio > 0.8:  # Lebih longgar
-                                st.error(f"❌ **{uploaded_file.name}**: Gambar terdeteksi sebagai dokumen/kertas. Hanya upload gambar sampah.")
-                            else:
-                                st.success(f"✅ **{uploaded_file.name}**: **{predicted_label}** ({confidence:.2f}%)")
-                                current_time = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
-                                new_entry = pd.DataFrame([[current_time, predicted_label, confidence]], columns=["Time", "Prediction", "Confidence"])
-                                st.session_state.history = pd.concat([st.session_state.history, new_entry], ignore_index=True)
-                    except Exception as e:
+                    st.success(f"✅ **{name}**: **{predicted_label}** ({confidence:.2f}%)")
+                    if entry.similar_distance is not None:
+                        st.caption(f"♻️ Hasil dari foto serupa (jarak {entry.similar_distance})")
+                    # Rerun Streamlit tidak boleh menambah riwayat yang sama dua kali
+                    if key not in st.session_state.recorded_keys:
+                        st.session_state.recorded_keys.add(key)
+                        current_time = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+                        new_entries.append([current_time, predicted_label, confidence, entry.similar_distance])
+        
+        def predict(items):
+            # Satu tensor untuk semua gambar valid di antrean yang belum punya prediksi di cache
+            working_images = [image for _, _, _, image, _, _ in items]
+            with metrics.timer("preprocess"):
+                batch = model.preprocess(working_images)
+            
+            if debug_mode:
+                st.write(f"🔍 Debug: Input batch shape = {batch.shape} (batch size {BATCH_SIZE})")
+                st.write(f"🔍 Debug: Input range = {np.min(batch):.3f} - {np.max(batch):.3f}")
+            
+            start = time.perf_counter()
+            predictions = predict_batch(model, batch, batch_size=BATCH_SIZE)
+            elapsed = time.perf_counter() - start
+            metrics.observe("predict", elapsed)
+            if shadow is not None:
+                shadow.submit(model, working_images, batch, predictions)  # tidak menunggu; dilewati jika antrean penuh
+            predict_time = elapsed / len(items)
+            for (_, key, _, _, _, entry), prediction in zip(items, predictions):
+                if debug_mode:
+                    timings.setdefault(key, {})["predict"] = predict_time
+                predicted[key] = cache.put(key, replace(entry, prediction=prediction, predict_time=predict_time))
+                signature = signatures.pop(key, None)
+                if signature is not None:
+                    similarity.add(signature, False, "", looks_like_document(entry.features), prediction)
+        
+        # Hasil keluar sesuai urutan upload dan dirender bertahap. Selama worker sudah lebih dulu,
+        # gambar yang siap dikumpulkan menjadi satu batch prediksi; jika belum, yang ada langsung diproses
+        results = OrderedResults(get_decode_executor(), prepare, jobs, window=DECODE_WINDOW)
+        progress = st.progress(0.0, text=f"🔄 Memproses {len(jobs)} gambar...") if jobs else None
+        queue = []  # (file, kunci, hit?, gambar, preview, entri) menunggu prediksi/render, urut sesuai upload
+        predicted = {}  # entri dengan prediksi baru per kunci cache
+        signatures = {}  # dHash gambar tervalidasi tanpa foto serupa; masuk indeks setelah diprediksi
+        done = 0
+        started = time.perf_counter()
+        cells = []  # kolom grid yang belum terisi; baris baru dibuat saat habis
+        
+        def next_cell():
+            if not cells:
+                cells.extend(st.columns(GRID_COLUMNS))
+            return cells.pop(0)
+        
+        def flush():
+            nonlocal done
+            pending = [item for item in queue if item[5].prediction is None and (bypass_validation or not item[5].verdict[0])]
+            failed = set()
+            if pending:
+                try:
+                    predict(pending)
+                except Exception as e:
+                    failed = {id(item) for item in pending}
+                    for uploaded_file, *_ in pending:
                         st.error(f"❌ **{uploaded_file.name}**: Terjadi error saat prediksi: {e}")
-                        if debug_mode:
-                            st.write(f"🔍 Debug: Error details = {str(e)}")
+                    if debug_mode:
+                        st.write(f"🔍 Debug: Error details = {str(e)}")
+            for item in queue:
+                if id(item) not in failed:
+                    uploaded_file, key, cache_hit, image, preview, entry = item
+                    with next_cell():
+                        render(uploaded_file, key, cache_hit, image, preview, predicted.get(key, entry))
+            done += len(queue)
+            queue.clear()
+            if new_entries:
+                get_history_store().append(new_entries)  # per batch, agar tidak hilang jika rerun memotong proses
+                new_entries.clear()
+            if not done:
+                return
+            elapsed = time.perf_counter() - started
+            eta = elapsed / done * (len(jobs) - done)
+            progress.progress(done / len(jobs), text=f"🔄 {done}/{len(jobs)} gambar selesai · sisa ± {eta:.1f} detik")
+        
+        try:
+            for uploaded_file, data, key, entry in jobs:
+                try:
+                    image, validation, preview, similar = results.next()
+                except Exception as e:
+                    flush()  # hasil sebelumnya tetap dirender lebih dulu
+                    st.error(f"❌ **{uploaded_file.name}**: Gambar tidak dapat dibaca: {e}")
+                    done += 1
+                    continue
+                cache_hit = entry is not None
+                entry = entry or CacheEntry()
+                if validation is not None:
+                    features, verdict, validation_time = validation
+                    entry = cache.put(key, replace(entry, features=features, verdict=verdict, validation_time=validation_time))
+                if similar is not None:
+                    signature, match = similar
+                    if match is not None:
+                        entry = cache.put(key, replace(entry, verdict=(match.rejected, match.message), prediction=match.prediction,
+                                                       similar_distance=match.distance, document_like=match.document_like))
+                    elif validation is not None and entry.verdict[0]:
+                        similarity.add(signature, True, entry.verdict[1])
+                    elif validation is not None:
+                        signatures[key] = signature
+                queue.append((uploaded_file, key, cache_hit, image, preview, entry))
+                if not results.ready() or len(queue) >= BATCH_SIZE:
+                    flush()
+        finally:
+            results.cancel()  # rerun/stop di tengah jalan: jangan lanjutkan decode yang tidak dipakai
+        if progress is not None:
+            progress.empty()
+        
+        if debug_mode:
+            stats = cache.stats()
+            st.write(f"🔍 Debug: Prediction cache = {stats['entries']} entri, {stats['hits']} hit, {stats['misses']} miss ({stats['hit_rate']:.0%}), {stats['evictions']} evicted")
+            if similarity is not None:
+                st.write(f"🔍 Debug: Indeks foto serupa = {len(similarity)} entri (jarak maks {similarity.max_distance} bit)")
+            preview_stats = previews.stats()
+            st.write(f"🔍 Debug: Preview cache = {preview_stats['entries']} preview {previews.format} ({preview_stats['bytes'] / 1e6:.1f} MB), {preview_stats['hits']} hit, {preview_stats['misses']} miss")
+            startup = ", ".join(f"{k} = {v:.3f}" if isinstance(v, float) else f"{k} = {v}" for k, v in model_loader.metrics.items())
+            st.write(f"🔍 Debug: Startup = {startup}")
+            registry_stats = registry.stats()
+            resident = ", ".join(f"{name} ({mb:.1f} MB)" for name, mb in registry_stats["resident"].items())
+            st.write(f"🔍 Debug: Model = {model.spec.name} · dimuat: {resident} (anggaran {registry_stats['budget_mb']:.0f} MB), {registry_stats['loads']} load, {registry_stats['evictions']} evicted")
+            if shadow is not None:
+                shadow_stats = shadow.stats()
+                st.write(f"🔍 Debug: Shadow {shadow_stats['candidate']} = {shadow_stats['agreement']:.1%} setuju dari {shadow_stats['images']} gambar, selisih confidence rata-rata {shadow_stats['mean_confidence_diff']:.3f}, {shadow_stats['dropped']} batch dilewati, {shadow_stats['errors']} error")
+                if shadow_stats["confusion"]:
+                    st.write(shadow_stats["confusion"])
+            if metrics.enabled:
+                stages = pd.DataFrame.from_dict(metrics.snapshot(), orient="index")
+                st.write("🔍 Debug: Latensi per tahap (detik)")
+                st.dataframe(stages)
 
     st.subheader("🔍 Riwayat Prediksi")
-    if not st.session_state.history.empty:
-        st.dataframe(st.session_state.history)
+    history = get_history_store()
+    total = history.count()
+    if total:
+        totals = ", ".join(f"{label}: {count}" for label, count in history.label_totals().items())
+        st.caption(f"Total {total} prediksi ({totals})")
+        pages = (total - 1) // HISTORY_PAGE_SIZE + 1
+        # Paginasi keyset: session state menyimpan id awal setiap halaman yang sudah dibuka (None = terbaru),
+        # jadi halaman jauh tidak perlu OFFSET dan tidak bergeser saat prediksi baru masuk
+        cursors = st.session_state.setdefault("history_cursors", [None])
+        page_rows = history.page(cursors[-1], HISTORY_PAGE_SIZE)
         
-        # Tombol untuk download hasil
-        csv = st.session_state.history.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Hasil Prediksi (CSV)",
-            data=csv,
-            file_name=f"smartwaste_predictions_{time.strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        def newest():
+            del cursors[1:]
+        
+        if pages > 1:
+            col1, col2, col3, col4 = st.columns([1, 1, 1, 3])
+            with col1:
+                st.button("⏮ Terbaru", key="history_newest", disabled=len(cursors) == 1, on_click=newest)
+            with col2:
+                st.button("◀ Lebih baru", key="history_newer", disabled=len(cursors) == 1, on_click=cursors.pop)
+            with col3:
+                st.button("Lebih lama ▶", key="history_older", on_click=cursors.append,
+                          args=(page_rows[-1][0] if page_rows else None,),
+                          disabled=len(page_rows) < HISTORY_PAGE_SIZE or len(cursors) >= pages)
+            with col4:
+                st.caption(f"Halaman {len(cursors)} dari {pages}")
+        rows = pd.DataFrame([row[1:] for row in page_rows], columns=HISTORY_COLUMNS)
+        st.dataframe(rows.astype({"Similar Distance": "Int64"}))  # kosong = diprediksi penuh, angka = dari foto serupa
+        
+        with st.expander("📅 Ringkasan per hari"):
+            summary = pd.DataFrame(history.daily_summary(), columns=["Hari", "Prediksi", "Jumlah", "Rata-rata Confidence"])
+            st.dataframe(summary)
+        
+        # Tombol untuk download hasil: file baru dibuat saat tombol diklik
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Download Hasil Prediksi (CSV)",
+                data=lambda: spooled_export(history.export_csv),
+                file_name=f"smartwaste_predictions_{timestamp}.csv",
+                mime="text/csv"
+            )
+        with col2:
+            st.download_button(
+                label="📥 Download Hasil Prediksi (Parquet)",
+                data=lambda: spooled_export(history.export_parquet),
+                file_name=f"smartwaste_predictions_{timestamp}.parquet",
+                mime="application/octet-stream"
+            )
     else:
         st.info("Belum ada riwayat prediksi. Upload gambar sampah untuk melihat hasilnya di sini.")
 
+# --- HALAMAN VIDEO / KAMERA ---
+def show_timeline(timeline, chart):
+    rows = timeline.rows()
+    if rows:
+        chart.bar_chart(pd.DataFrame(rows).set_index("Detik"))
+
+def page_stream():
+    st.title("🎥 Klasifikasi Video / Kamera")
+    st.write("Frame diambil dengan laju tertentu, frame yang hampir sama dengan frame sebelumnya dilewati, lalu sisanya divalidasi dan diklasifikasikan per batch.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sample_fps = st.slider("Frame per detik", min_value=0.5, max_value=10.0, value=DEFAULT_SAMPLE_FPS, step=0.5)
+    with col2:
+        dedup_threshold = st.slider("Ambang duplikat", min_value=0.0, max_value=20.0, value=DEDUP_THRESHOLD, step=0.5,
+                                    help="Rata-rata selisih piksel (0-255) dengan frame terakhir; 0 = semua frame diproses")
+    with col3:
+        bucket_seconds = st.number_input("Bucket timeline (detik)", min_value=1.0, value=BUCKET_SECONDS, step=1.0)
+    source = st.radio("Sumber", ["📁 File video", "📷 Kamera"], horizontal=True)
+
+    if source == "📷 Kamera":
+        shot = st.camera_input("Ambil frame dari kamera")
+    else:
+        shot = st.file_uploader("Pilih file video...", type=VIDEO_TYPES)
+    if shot is None:
+        return
+    model = load_model(primary_model_name())
+    if model is None:
+        return
+    metrics = get_metrics()
+    data = shot.getvalue()
+
+    if source == "📷 Kamera":
+        # Setiap frame kamera diproses saat diambil; timeline dan gerbang duplikat disimpan per sesi
+        settings = (dedup_threshold, bucket_seconds)
+        restart = st.button("🔄 Mulai ulang timeline")
+        state = st.session_state.get("camera_stream")
+        if state is None or state["settings"] != settings or restart:
+            state = st.session_state.camera_stream = {
+                "settings": settings,
+                "classifier": StreamClassifier(model, batch_size=1, gate=FrameGate(dedup_threshold),
+                                               timeline=Timeline(bucket_seconds, labels=model.class_names), metrics=metrics),
+                "started": time.monotonic(),
+                "last_key": None,
+                "last_result": None,
+            }
+        key = content_key(data, "camera")
+        if key != state["last_key"]:
+            state["last_key"] = key
+            classifier = state["classifier"]
+            with metrics.timer("decode"):
+                image = decode_image(data)
+            results = classifier.feed(time.monotonic() - state["started"], image)
+            state["last_result"] = results[0] if results else None
+        result = state["last_result"]
+        if result is None:
+            st.info("⏭️ Frame hampir sama dengan frame sebelumnya, dilewati.")
+        elif result.status == "ok":
+            st.success(f"✅ **{result.label}** ({result.confidence:.2f}%)")
+        elif result.status == "low_confidence":
+            st.warning(f"⚠️ Tingkat kepercayaan rendah ({result.confidence:.2f}%).")
+        else:
+            st.error(f"❌ {result.message}")
+        timeline = state["classifier"].timeline
+        st.caption(f"Total per kelas: {dict(timeline.totals) or '-'} · {dict(state['classifier'].stats)}")
+        show_timeline(timeline, st.empty())
+        return
+
+    # Hasil video disimpan per sesi sehingga rerun (mis. mengubah widget lain) tidak memproses ulang
+    run_key = (content_key(data, model.identity), sample_fps, dedup_threshold, bucket_seconds)
+    done = st.session_state.get("video_stream")
+    if done is not None and done["key"] == run_key:
+        timeline, summary = done["timeline"], done["summary"]
+        st.caption(summary)
+        show_timeline(timeline, st.empty())
+        return
+
+    timeline = Timeline(bucket_seconds, labels=model.class_names)
+    classifier = StreamClassifier(model, gate=FrameGate(dedup_threshold), timeline=timeline, metrics=metrics)
+    status = st.empty()
+    chart = st.empty()
+    suffix = os.path.splitext(shot.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:  # OpenCV membaca dari path
+        f.write(data)
+    started = time.perf_counter()
+    video_time = 0.0
+    try:
+        frames = iter_frames(f.name, sample_fps)
+        for timestamp, image in frames:
+            video_time = timestamp
+            if classifier.feed(timestamp, image):
+                speed = video_time / (time.perf_counter() - started)
+                status.caption(f"🔄 {video_time:.1f} detik video diproses ({speed:.1f}x waktu nyata)")
+                show_timeline(timeline, chart)
+        classifier.flush()
+    except (ImportError, OSError, ValueError) as e:
+        st.error(f"❌ Video tidak dapat dibaca: {e}")
+        return
+    finally:
+        os.remove(f.name)
+    elapsed = time.perf_counter() - started
+    stats = classifier.stats
+    summary = (f"{video_time:.1f} detik video dalam {elapsed:.1f} detik · {stats['frames']} frame diambil, "
+               f"{stats['duplicates']} duplikat dilewati, {stats['ok']} diklasifikasikan, "
+               f"{stats['rejected'] + stats['low_confidence']} ditolak · total per kelas: {dict(timeline.totals) or '-'}")
+    status.caption(summary)
+    show_timeline(timeline, chart)
+    st.session_state.video_stream = {"key": run_key, "timeline": timeline, "summary": summary}
+
 # --- HALAMAN ARTIKEL (SESUAI KODE KAMU) ---
 def page_articles():
     st.title("📰 Edukasi Sampah")
@@ -410,7 +693,7 @@ def page_articles():
     col1, col2, col3 = st.columns([1,2,1])
     try:
         with col2:
-            st.image("assets/2.png", caption="Infografis Sampah Organik & Anorganik", width=500)
+            st.image(get_asset("assets/2.png", 500), caption="Infografis Sampah Organik & Anorganik", width=500)
     except Exception as e:
         with col2:
             st.error("Gambar edukasi tidak dapat ditampilkan. Pastikan file 'assets/2.png' ada dan tidak rusak.")
@@ -455,6 +738,7 @@ with col2:
 # Tambahkan logo di sidebar
 def create_logo():
     """Membuat logo sederhana untuk SmartWaste"""
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(3, 2))
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 6)
@@ -486,6 +770,16 @@ def create_logo():
     
     return fig
 
+@st.cache_resource
+def get_logo_image():
+    # Figure matplotlib dirender sekali per proses menjadi PNG, bukan di setiap rerun
+    import matplotlib.pyplot as plt
+    logo_fig = create_logo()
+    buffer = io.BytesIO()
+    logo_fig.savefig(buffer, format="png", transparent=True, bbox_inches="tight")
+    plt.close(logo_fig)  # Tutup figure untuk menghemat memori
+    return buffer.getvalue()
+
 # Tampilkan logo di sidebar
 try:
     # Coba gunakan file logo jika ada
@@ -493,14 +787,12 @@ try:
     if os.path.exists(logo_path):
         col1, col2, col3 = st.sidebar.columns([1, 2, 1])
         with col2:
-            st.image(logo_path, width=150, caption="SmartWaste")
+            st.image(get_asset(logo_path, 150), width=150, caption="SmartWaste")
     else:
         # Buat logo secara dinamis
         col1, col2, col3 = st.sidebar.columns([1, 2, 1])
         with col2:
-            logo_fig = create_logo()
-            st.pyplot(logo_fig)
-            plt.close(logo_fig)  # Tutup figure untuk menghemat memori
+            st.image(get_logo_image(), width="stretch")
 except Exception as e:
     # Jika gagal membuat logo, tampilkan emoji sebagai fallback
     col1, col2, col3 = st.sidebar.columns([1, 2, 1])
@@ -519,6 +811,7 @@ st.sidebar.markdown("**📋 Navigasi Aplikasi**")
 navigation_options = {
     "🏠 Beranda": "beranda",
     "🗑️ Klasifikasi Sampah": "klasifikasi", 
+    "🎥 Klasifikasi Video": "video",
     "📚 Edukasi Sampah": "edukasi"
 }
 
@@ -533,6 +826,7 @@ selected_page = st.sidebar.selectbox(
 page_mapping = {
     "🏠 Beranda": "🏠 Beranda",
     "🗑️ Klasifikasi Sampah": "🗑️ Klasifikasi Sampah",
+    "🎥 Klasifikasi Video": "🎥 Klasifikasi Video",
     "📚 Edukasi Sampah": "📚 Edukasi Sampah"
 }
 
@@ -553,5 +847,11 @@ if page == "🏠 Beranda":
     page_home()
 elif page == "🗑️ Klasifikasi Sampah":
     page_classification()
+elif page == "🎥 Klasifikasi Video":
+    page_stream()
 elif page == "📚 Edukasi Sampah":
     page_articles()
+
+# Metrik startup: waktu dari run pertama sampai halaman pertama selesai dirender
+model_loader.mark_first_paint()
+model_loader.metrics["last_render_s"] = time.perf_counter() - RUN_START
@@ -0,0 +1,3 @@
+"""
+Komponen inti SmartWaste yang dipakai bersama oleh aplikasi Streamlit dan tooling lain
+"""
@@ -0,0 +1,309 @@
+"""
+Penyimpanan artefak model lokal: file disimpan berdasarkan hash isi (sha256) dengan manifest versi.
+
+Download bersifat atomik (ditulis ke .part lalu di-rename), bisa dilanjutkan dengan HTTP Range,
+dan dikunci dengan file lock sehingga beberapa proses yang start bersamaan hanya mengunduh sekali.
+Isi unduhan dicek terhadap format file (HDF5/zip/TFLite); versi tanpa sha256 baru dicatat hash-nya
+setelah file terbukti bisa dimuat, sehingga halaman HTML atau file terpotong tidak pernah dianggap valid.
+
+Contoh:
+    python -m smartwaste.artifacts register model97 https://contoh.id/model97.h5 --sha256 <hash>
+    python -m smartwaste.artifacts fetch model97
+    python -m smartwaste.artifacts list
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from smartwaste.backends import BACKEND_EXTENSIONS, load_backend
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_STORE_DIR = os.environ.get("SMARTWASTE_MODEL_DIR", "models")
+# Tanda awal file per ekstensi: (offset, bytes)
+FILE_SIGNATURES = {
+    ".h5": (0, b"\x89HDF\r\n\x1a\n"),
+    ".keras": (0, b"PK\x03\x04"),
+    ".npz": (0, b"PK\x03\x04"),
+    ".tflite": (4, b"TFL3"),
+}
+CHUNK_SIZE = 1 << 20
+
+
+class ArtifactError(Exception):
+    """
+    Artefak tidak dikenal, gagal diunduh, atau hash tidak cocok
+    """
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Lock eksklusif antar proses (fcntl di Linux/macOS, msvcrt di Windows)
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_resumable(url, part_path, timeout=60):
+    """
+    Unduh url ke part_path; jika part_path sudah ada sebagian, lanjutkan dengan header Range
+    """
+    if "drive.google.com" in url:
+        # Google Drive butuh penanganan halaman konfirmasi; gdown juga mendukung resume
+        try:
+            import gdown
+            output = gdown.download(url, part_path, quiet=False, resume=True)
+        except Exception as e:  # gdown tidak punya kelas error yang stabil antar versi
+            raise ArtifactError(f"Download gagal: {url} ({e})") from e
+        if output is None:
+            raise ArtifactError(f"Download gagal: {url}")
+        return
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code != 416 or not offset:  # 416: bagian yang sudah ada ternyata sudah lengkap
+            raise
+        return
+    with response:
+        resumed = offset and response.status == 206  # 200: server tidak mendukung Range, mulai dari awal
+        length = response.headers.get("Content-Length")
+        with open(part_path, "ab" if resumed else "wb") as f:
+            shutil.copyfileobj(response, f, CHUNK_SIZE)
+            written = f.tell() - (offset if resumed else 0)
+    # Koneksi yang putus di tengah tidak selalu memunculkan error; .part disimpan untuk dilanjutkan
+    if length is not None and written < int(length):
+        raise ArtifactError(f"Download terputus ({written}/{length} byte): {url}")
+
+
+def check_model_file(path, filename):
+    """
+    Tolak unduhan yang bukan file model sesuai ekstensinya (mis. halaman HTML interstitial Google Drive)
+    """
+    signature = FILE_SIGNATURES.get(os.path.splitext(filename)[1].lower())
+    if signature is None:
+        return
+    offset, magic = signature
+    with open(path, "rb") as f:
+        f.seek(offset)
+        head = f.read(len(magic))
+    if head != magic:
+        raise ArtifactError(f"Unduhan {filename} bukan file model yang valid (tanda awal {head!r})")
+
+
+def _check_loadable(path, name):
+    # Versi tanpa sha256 dipercaya saat unduhan pertama: pastikan dulu file benar-benar bisa dimuat
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in BACKEND_EXTENSIONS.values():
+        return
+    try:
+        load_backend(backend_for_path(path), path)
+    except Exception as e:
+        raise ArtifactError(f"Artefak {name} tidak bisa dimuat: {e}") from e
+
+
+class ArtifactStore:
+    """
+    Cache lokal artefak model yang dialamatkan dengan hash isi, beserta manifest versi
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.blob_dir = os.path.join(root, "blobs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.lock_dir = os.path.join(root, "locks")
+
+    # --- manifest ---
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"versions": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    @contextmanager
+    def _manifest(self):
+        with file_lock(os.path.join(self.lock_dir, "manifest.lock")):
+            manifest = self._read_manifest()
+            yield manifest
+            self._write_manifest(manifest)
+
+    def versions(self):
+        return self._read_manifest()["versions"]
+
+    def register(self, name, url, sha256=None, filename=None, overwrite=False):
+        """
+        Daftarkan versi model; tanpa sha256 hash dicatat saat download pertama
+        """
+        filename = filename or os.path.basename(url.split("?")[0]) or f"{name}.h5"
+        with self._manifest() as manifest:
+            entry = manifest["versions"].get(name)
+            if entry is not None and not overwrite:
+                return entry
+            entry = {"url": url, "filename": filename, "sha256": sha256}
+            manifest["versions"][name] = entry
+        return entry
+
+    def digest(self, name):
+        entry = self.versions().get(name)
+        return entry and entry.get("sha256")
+
+    # --- blob ---
+
+    def blob_path(self, sha256, filename):
+        # Ekstensi asli dipertahankan karena loader (mis. Keras) membaca format dari ekstensi
+        return os.path.join(self.blob_dir, sha256 + os.path.splitext(filename)[1])
+
+    def resolve(self, name, verify=False):
+        """
+        Kembalikan path lokal untuk versi name, unduh dulu jika belum ada di cache
+        """
+        entry = self.versions().get(name)
+        if entry is None:
+            raise ArtifactError(f"Versi model tidak dikenal: {name}")
+        if entry.get("sha256"):
+            path = self.blob_path(entry["sha256"], entry["filename"])
+            if os.path.exists(path):
+                if not verify or sha256_file(path) == entry["sha256"]:
+                    return path
+                os.remove(path)  # blob rusak, unduh ulang
+        return self.fetch(name)
+
+    def fetch(self, name):
+        """
+        Unduh versi name secara atomik; proses lain yang memanggil bersamaan menunggu lock lalu memakai hasilnya
+        """
+        with file_lock(os.path.join(self.lock_dir, f"{name}.lock")):
+            entry = self.versions().get(name)
+            if entry is None:
+                raise ArtifactError(f"Versi model tidak dikenal: {name}")
+            expected = entry.get("sha256")
+            if expected:
+                path = self.blob_path(expected, entry["filename"])
+                if os.path.exists(path):
+                    return path  # sudah diunduh oleh proses lain selama menunggu lock
+
+            os.makedirs(self.tmp_dir, exist_ok=True)
+            part_path = os.path.join(self.tmp_dir, f"{name}{os.path.splitext(entry['filename'])[1]}.part")
+            download_resumable(entry["url"], part_path)
+
+            actual = sha256_file(part_path)
+            if expected and actual != expected:
+                os.remove(part_path)  # jangan lanjutkan dari file yang rusak
+                raise ArtifactError(f"Hash {name} tidak cocok: {actual} != {expected}")
+            try:
+                check_model_file(part_path, entry["filename"])
+            except ArtifactError:
+                os.remove(part_path)
+                raise
+
+            os.makedirs(self.blob_dir, exist_ok=True)
+            path = self.blob_path(actual, entry["filename"])
+            os.replace(part_path, path)
+            if not expected:
+                try:
+                    _check_loadable(path, name)
+                except ArtifactError:
+                    os.remove(path)
+                    raise
+                with self._manifest() as manifest:
+                    manifest["versions"][name]["sha256"] = actual
+            return path
+
+
+def backend_for_path(path):
+    extension = os.path.splitext(path)[1].lower()
+    for backend, backend_extension in BACKEND_EXTENSIONS.items():
+        if extension == backend_extension:
+            return backend
+    raise ArtifactError(f"Tidak ada backend untuk ekstensi {extension}")
+
+
+def load_model_version(name, store=None, backend=None):
+    """
+    Varian load_model: resolve nama versi lewat ArtifactStore lalu muat dengan backend yang sesuai
+    """
+    store = store or ArtifactStore()
+    path = store.resolve(name)
+    return load_backend(backend or backend_for_path(path), path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kelola artefak model SmartWaste")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="Folder cache artefak")
+    commands = parser.add_subparsers(dest="command", required=True)
+    register = commands.add_parser("register", help="Daftarkan versi model")
+    register.add_argument("name")
+    register.add_argument("url")
+    register.add_argument("--sha256")
+    register.add_argument("--filename")
+    register.add_argument("--overwrite", action="store_true")
+    fetch = commands.add_parser("fetch", help="Unduh versi model ke cache")
+    fetch.add_argument("name")
+    fetch.add_argument("--verify", action="store_true", help="Hitung ulang hash file yang sudah ada")
+    commands.add_parser("list", help="Tampilkan versi yang terdaftar")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(args.store)
+    try:
+        if args.command == "register":
+            print(json.dumps(store.register(args.name, args.url, args.sha256, args.filename, args.overwrite)))
+        elif args.command == "fetch":
+            print(store.resolve(args.name, verify=args.verify))
+        else:
+            for name, entry in sorted(store.versions().items()):
+                print(f"{name}\t{entry.get('sha256') or '-'}\t{entry['url']}")
+    except ArtifactError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
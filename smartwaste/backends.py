@@ -0,0 +1,307 @@
+"""
+Backend inferensi yang bisa dipilih saat startup: Keras (H5), TFLite, atau forward pass NumPy murni.
+
+Semua backend punya metode predict(batch, batch_size=None, verbose=0) seperti model Keras,
+sehingga predict_batch dan pemanggil lain tidak perlu tahu backend mana yang dipakai.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from smartwaste.inference import DEFAULT_MODEL_PATH, load_keras_model
+
+BACKENDS = ("keras", "tflite", "numpy")
+BACKEND_EXTENSIONS = {"keras": ".h5", "tflite": ".tflite", "numpy": ".npz"}
+
+
+def backend_model_path(backend, keras_path=DEFAULT_MODEL_PATH):
+    """
+    Path artefak default untuk backend: model97.h5 -> model97.tflite / model97.npz
+    """
+    if backend not in BACKEND_EXTENSIONS:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilih salah satu dari {', '.join(BACKENDS)})")
+    return os.path.splitext(keras_path)[0] + BACKEND_EXTENSIONS[backend]
+
+
+def load_backend(backend, path=None):
+    """
+    Muat model untuk backend yang dipilih; path default mengikuti backend_model_path
+    """
+    path = path or backend_model_path(backend)
+    if backend == "keras":
+        return CompiledKerasModel(load_keras_model(path))
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model tidak ditemukan: {path} (buat dengan python -m smartwaste.convert)")
+    if backend == "tflite":
+        return TFLiteModel(path)
+    if backend == "numpy":
+        return NumpyModel.load(path)
+    raise ValueError(f"Backend tidak dikenal: {backend} (pilih salah satu dari {', '.join(BACKENDS)})")
+
+
+# --- KERAS TERKOMPILASI ---
+
+BUCKET_SIZES = (1, 4, 16, 64)
+
+
+class CompiledKerasModel:
+    """
+    Jalur latensi rendah untuk model Keras: tf.function dengan shape tetap per bucket batch.
+    Input dipadding ke bucket terdekat sehingga tidak pernah retrace, dan tanpa overhead
+    data adapter/callback model.predict. Batch di atas bucket terbesar dipotong per bucket terbesar.
+    """
+
+    def __init__(self, model, buckets=BUCKET_SIZES):
+        import tensorflow as tf
+
+        self._tf = tf
+        self.model = model
+        self.buckets = tuple(sorted(buckets))
+        self.input_shape = tuple(model.input_shape[1:])
+        self._function = tf.function(lambda x: model(x, training=False))
+        self._concrete = {}
+        self._lock = threading.Lock()
+
+    def _concrete_function(self, size):
+        concrete = self._concrete.get(size)
+        if concrete is None:
+            with self._lock:
+                concrete = self._concrete.get(size)
+                if concrete is None:
+                    spec = self._tf.TensorSpec((size,) + self.input_shape, self._tf.float32)
+                    concrete = self._concrete[size] = self._function.get_concrete_function(spec)
+        return concrete
+
+    def warmup(self):
+        """
+        Trace dan jalankan semua bucket sekali agar permintaan pertama tidak membayar biaya tracing
+        """
+        for size in self.buckets:
+            self._concrete_function(size)(self._tf.zeros((size,) + self.input_shape))
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) == 0:
+            return np.empty((0,) + tuple(self.model.output_shape[1:]), dtype=np.float32)
+        largest = self.buckets[-1]
+        if len(batch) > largest:
+            return np.concatenate([self._run(batch[start:start + largest]) for start in range(0, len(batch), largest)])
+        return self._run(batch)
+
+    def _run(self, batch):
+        n = len(batch)
+        size = next(bucket for bucket in self.buckets if bucket >= n)
+        if size != n:
+            padded = np.zeros((size,) + batch.shape[1:], dtype=np.float32)
+            padded[:n] = batch
+            batch = padded
+        output = self._concrete_function(size)(self._tf.constant(batch))
+        return output.numpy()[:n]
+
+
+# --- TFLITE ---
+
+def _tflite_interpreter_class():
+    # Urutan: LiteRT, tflite-runtime (ringan), lalu tensorflow lengkap
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """
+    Model .tflite dengan antarmuka predict seperti Keras; mendukung input/output terkuantisasi
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self._interpreter = _tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        # Satu interpreter dipakai semua sesi/thread; resize -> set_tensor -> invoke -> get_tensor harus atomik
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        if batch_size != self._batch_size:
+            shape = list(self._input["shape"])
+            shape[0] = batch_size
+            self._interpreter.resize_tensor_input(self._input["index"], shape)
+            self._interpreter.allocate_tensors()
+            self._input = self._interpreter.get_input_details()[0]
+            self._output = self._interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if len(batch) == 0:
+                return np.empty((0, self._output["shape"][-1]), dtype=np.float32)
+            self._resize(len(batch))
+
+            scale, zero_point = self._input["quantization"]
+            if scale:
+                info = np.iinfo(self._input["dtype"])
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+            self._interpreter.set_tensor(self._input["index"], batch.astype(self._input["dtype"]))
+            self._interpreter.invoke()
+
+            output = self._interpreter.get_tensor(self._output["index"])
+            scale, zero_point = self._output["quantization"]
+        if scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output.astype(np.float32)
+
+
+# --- NUMPY MURNI ---
+
+def _activation(name, x):
+    if name in (None, "linear"):
+        return x
+    if name == "relu":
+        return np.maximum(x, 0)
+    if name == "sigmoid":
+        return 1.0 / (1.0 + np.exp(-x))
+    if name == "tanh":
+        return np.tanh(x)
+    if name == "softmax":
+        e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        return e / np.sum(e, axis=-1, keepdims=True)
+    raise ValueError(f"Aktivasi tidak didukung backend numpy: {name}")
+
+
+def _same_padding(size, window, stride):
+    # Sama dengan aturan padding "same" TensorFlow
+    out = -(-size // stride)
+    total = max((out - 1) * stride + window - size, 0)
+    return total // 2, total - total // 2
+
+
+def _pad(x, window, strides, padding, value=0.0):
+    if padding != "same":
+        return x
+    (top, bottom) = _same_padding(x.shape[1], window[0], strides[0])
+    (left, right) = _same_padding(x.shape[2], window[1], strides[1])
+    return np.pad(x, ((0, 0), (top, bottom), (left, right), (0, 0)), constant_values=value)
+
+
+def _conv2d(x, layer):
+    kernel = layer["weights"][0]
+    kh, kw = kernel.shape[:2]
+    dh, dw = layer["dilation_rate"]
+    sh, sw = layer["strides"]
+    window = ((kh - 1) * dh + 1, (kw - 1) * dw + 1)
+    x = _pad(x, window, (sh, sw), layer["padding"])
+    patches = sliding_window_view(x, window, axis=(1, 2))[:, ::sh, ::sw, :, ::dh, ::dw]
+    out = np.tensordot(patches, kernel, axes=([4, 5, 3], [0, 1, 2]))
+    if layer["use_bias"]:
+        out += layer["weights"][1]
+    return _activation(layer["activation"], out)
+
+
+def _pool2d(x, layer, reduce):
+    pool = tuple(layer["pool_size"])
+    strides = tuple(layer["strides"] or pool)
+    x = _pad(x, pool, strides, layer["padding"], value=-np.inf if reduce is np.max else 0.0)
+    windows = sliding_window_view(x, pool, axis=(1, 2))[:, ::strides[0], ::strides[1]]
+    return reduce(windows, axis=(-2, -1))
+
+
+def _dense(x, layer):
+    out = x @ layer["weights"][0]
+    if layer["use_bias"]:
+        out += layer["weights"][1]
+    return _activation(layer["activation"], out)
+
+
+def _batch_norm(x, layer):
+    weights = list(layer["weights"])
+    gamma = weights.pop(0) if layer["scale"] else 1.0
+    beta = weights.pop(0) if layer["center"] else 0.0
+    mean, var = weights
+    return (x - mean) / np.sqrt(var + layer["epsilon"]) * gamma + beta
+
+
+_LAYERS = {
+    "Conv2D": _conv2d,
+    "MaxPooling2D": lambda x, layer: _pool2d(x, layer, np.max),
+    "AveragePooling2D": lambda x, layer: _pool2d(x, layer, np.mean),
+    "GlobalAveragePooling2D": lambda x, layer: np.mean(x, axis=(1, 2)),
+    "GlobalMaxPooling2D": lambda x, layer: np.max(x, axis=(1, 2)),
+    "Flatten": lambda x, layer: x.reshape(len(x), -1),
+    "Dense": _dense,
+    "BatchNormalization": _batch_norm,
+    "Activation": lambda x, layer: _activation(layer["activation"], x),
+    "Rescaling": lambda x, layer: x * layer["scale"] + layer["offset"],
+    "Dropout": lambda x, layer: x,
+    "SpatialDropout2D": lambda x, layer: x,
+    "InputLayer": lambda x, layer: x,
+}
+_CONFIG_KEYS = ("activation", "padding", "strides", "dilation_rate", "use_bias", "pool_size",
+                "epsilon", "center", "scale", "offset")
+
+
+class NumpyModel:
+    """
+    Forward pass NumPy murni untuk model Sequential (Conv2D/Pooling/Dense/...) tanpa tensorflow
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def from_keras(cls, model):
+        layers = []
+        for keras_layer in model.layers:
+            kind = type(keras_layer).__name__
+            if kind not in _LAYERS:
+                raise ValueError(f"Layer tidak didukung backend numpy: {kind}")
+            config = keras_layer.get_config()
+            if config.get("data_format", "channels_last") != "channels_last":
+                raise ValueError(f"Backend numpy hanya mendukung channels_last ({keras_layer.name})")
+            layer = {"type": kind}
+            for key in _CONFIG_KEYS:
+                if key in config:
+                    layer[key] = config[key]
+            layer["weights"] = [np.asarray(w, dtype=np.float32) for w in keras_layer.get_weights()]
+            _activation(layer.get("activation"), np.zeros(1, dtype=np.float32))  # gagal di sini, bukan saat prediksi
+            layers.append(layer)
+        return cls(layers)
+
+    def save(self, path):
+        """
+        Simpan konfigurasi layer (JSON) dan bobot ke satu file .npz
+        """
+        config = [{k: v for k, v in layer.items() if k != "weights"} for layer in self.layers]
+        arrays = {f"layer{i}_{j}": w for i, layer in enumerate(self.layers) for j, w in enumerate(layer["weights"])}
+        np.savez(path, __config__=np.array(json.dumps(config)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["__config__"]))
+            layers = []
+            for i, layer in enumerate(config):
+                weights = []
+                while f"layer{i}_{len(weights)}" in data:
+                    weights.append(data[f"layer{i}_{len(weights)}"])
+                layers.append({**layer, "weights": weights})
+        return cls(layers)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        x = np.asarray(batch, dtype=np.float32)
+        for layer in self.layers:
+            x = _LAYERS[layer["type"]](x, layer)
+        return x.astype(np.float32)
@@ -0,0 +1,224 @@
+"""
+Klasifikasi batch tanpa UI untuk arsip foto sampah yang besar.
+
+Contoh:
+    python -m smartwaste.batch arsip/ --output hasil.csv --workers 8 --batch-size 128
+    python -m smartwaste.batch arsip/ --output hasil.jsonl --resume
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from smartwaste.backends import BACKENDS
+from smartwaste.decode import decode_image
+from smartwaste.heuristics import detect_non_waste_image, extract_features, looks_like_document
+from smartwaste.inference import (CLASS_NAMES, CONFIDENCE_THRESHOLD, DEFAULT_BATCH_SIZE, predict_batch,
+                                  preprocess_image)
+from smartwaste.workers import load_inference_model
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+FIELDNAMES = ["path", "status", "label", "confidence", "message"]
+
+
+def iter_image_paths(root):
+    """
+    Telusuri folder secara lazy (generator) dengan urutan yang stabil
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+def process_file(path, validate=True):
+    """
+    Decode dan validasi satu file di proses worker.
+    Mengembalikan (path, tensor 50x50 atau None, status, pesan, mirip dokumen?)
+    """
+    try:
+        image = decode_image(path)
+        features = extract_features(image)
+        if validate:
+            is_not_waste, message = detect_non_waste_image(image, features)
+            if is_not_waste:
+                return path, None, "rejected", message, False
+        return path, preprocess_image(image), "ok", "", looks_like_document(features)
+    except Exception as e:
+        return path, None, "error", str(e), False
+
+
+def iter_processed(paths, workers, validate=True, window=None):
+    """
+    Jalankan process_file di process pool dengan jumlah tugas yang dibatasi,
+    sehingga memori tetap datar berapa pun jumlah file; hasil keluar sesuai urutan input
+    """
+    if workers <= 1:
+        for path in paths:
+            yield process_file(path, validate)
+        return
+
+    window = window or workers * 16
+    context = multiprocessing.get_context("spawn")  # jangan fork proses yang sudah memuat tensorflow
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(process_file, path, validate))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class ResultWriter:
+    """
+    Tulis hasil ke CSV atau JSONL secara bertahap (format dari ekstensi file output)
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.jsonl = path.lower().endswith((".jsonl", ".json"))
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        if not self.jsonl:
+            self._csv = csv.DictWriter(self._file, fieldnames=FIELDNAMES)
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            self._csv.writerow(row)
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def load_checkpoint(path):
+    """
+    Baca file output yang sudah ada dan kembalikan path yang sudah selesai diproses.
+    Baris terakhir yang terpotong (misalnya karena crash) dibuang.
+    """
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    if complete < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(complete)
+        data = data[:complete]
+
+    lines = data.decode("utf-8").splitlines()
+    if path.lower().endswith((".jsonl", ".json")):
+        return {json.loads(line)["path"] for line in lines if line.strip()}
+    return {row["path"] for row in csv.DictReader(lines)}
+
+
+def classify_directory(root, output, model_path=None, backend="keras", workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                       resume=False, validate=True, inference_workers=0, log=sys.stderr):
+    """
+    Klasifikasikan semua gambar di bawah root dan tulis hasilnya ke output secara streaming
+    """
+    workers = workers or os.cpu_count() or 1
+    done = load_checkpoint(output) if resume else set()
+    if done:
+        print(f"Melanjutkan: {len(done)} file sudah diproses", file=log)
+
+    # Dengan pool proses, satu batch dibagi rata ke semua worker inferensi
+    model = load_inference_model(backend, model_path, inference_workers,
+                                 max_batch=-(-batch_size // max(inference_workers, 1)))
+    writer = ResultWriter(output, append=resume)
+    counts = {}
+    start = time.perf_counter()
+
+    def write(row):
+        writer.write(row)
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+
+    def flush_batch(batch):
+        if not batch:
+            return
+        tensors = np.stack([tensor for _, tensor, _ in batch])
+        try:
+            predictions = predict_batch(model, tensors, batch_size=batch_size)
+        except Exception as e:
+            for path, _, _ in batch:
+                write({"path": path, "status": "error", "label": "", "confidence": "", "message": str(e)})
+        else:
+            for (path, _, document_like), prediction in zip(batch, predictions):
+                label = CLASS_NAMES[int(np.argmax(prediction))]
+                confidence = round(float(np.max(prediction)) * 100, 2)
+                if confidence < CONFIDENCE_THRESHOLD:
+                    status, message = "low_confidence", "Tingkat kepercayaan rendah"
+                elif document_like:
+                    status, message = "rejected", "Gambar terdeteksi sebagai dokumen/kertas."
+                else:
+                    status, message = "ok", ""
+                write({"path": path, "status": status, "label": label, "confidence": confidence, "message": message})
+        writer.flush()
+        total = sum(counts.values())
+        rate = total / (time.perf_counter() - start)
+        print(f"{total} file diproses ({rate:.1f} gambar/detik) {counts}", file=log)
+
+    paths = (path for path in iter_image_paths(root) if path not in done)
+    batch = []
+    try:
+        for path, tensor, status, message, document_like in iter_processed(paths, workers, validate):
+            if tensor is None:
+                write({"path": path, "status": status, "label": "", "confidence": "", "message": message})
+                continue
+            batch.append((path, tensor, document_like))
+            if len(batch) >= batch_size:
+                flush_batch(batch)
+                batch = []
+        flush_batch(batch)
+    finally:
+        writer.close()
+        if hasattr(model, "close"):
+            model.close()  # hentikan proses worker inferensi
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klasifikasi batch gambar sampah SmartWaste tanpa UI")
+    parser.add_argument("root", help="Folder berisi gambar (ditelusuri rekursif)")
+    parser.add_argument("-o", "--output", required=True, help="File hasil .csv atau .jsonl")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras", help="Backend inferensi")
+    parser.add_argument("--model", default=None, help="Path model (default: model97.h5/.tflite/.npz sesuai backend)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses decode/validasi (default: jumlah CPU)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Jumlah gambar per panggilan predict")
+    parser.add_argument("--resume", action="store_true", help="Lewati file yang sudah ada di output dan tambahkan hasil baru")
+    parser.add_argument("--no-validation", action="store_true", help="Lewati detect_non_waste_image")
+    parser.add_argument("--inference-workers", type=int, default=0,
+                        help="Jumlah proses inferensi dengan bobot bersama (0 = predict di proses ini)")
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1:
+        parser.error("--batch-size harus >= 1")
+    if not os.path.isdir(args.root):
+        parser.error(f"Folder tidak ditemukan: {args.root}")
+
+    counts = classify_directory(args.root, args.output, model_path=args.model, backend=args.backend, workers=args.workers,
+                                batch_size=args.batch_size, resume=args.resume, validate=not args.no_validation,
+                                inference_workers=args.inference_workers)
+    print(f"Selesai: {counts}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Benchmark pipeline klasifikasi dengan gambar sintetis (tanpa jaringan maupun dataset).
+
+Setiap tahap diukur terpisah: decode, detect_face_simple, is_likely_not_waste, detect_non_waste_image,
+resize/normalisasi, dan model.predict untuk beberapa ukuran batch. Jika model97.h5 tidak ada,
+dipakai model CNN kecil pengganti sehingga angka predict tetap bisa dibandingkan antar commit.
+
+Contoh:
+    python -m smartwaste.bench --save-baseline bench_baseline.json
+    python -m smartwaste.bench --baseline bench_baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from smartwaste.backends import BACKENDS, CompiledKerasModel, NumpyModel, TFLiteModel, backend_model_path, load_backend
+from smartwaste.decode import decode_image
+from smartwaste.heuristics import (detect_face_simple, detect_non_waste_batch, detect_non_waste_image, extract_features,
+                                   is_likely_not_waste)
+from smartwaste.inference import IMG_SIZE, predict_batch, preprocess_image
+from smartwaste.loadgen import synthetic_images
+
+DEFAULT_RESOLUTIONS = ("640x480", "1920x1080", "4000x3000")
+DEFAULT_BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None  # bukan Linux
+
+
+class PeakMemory:
+    """
+    Ukur puncak memori selama blok with: alokasi Python/NumPy lewat tracemalloc, ditambah kenaikan RSS
+    (sampling di thread terpisah) karena buffer PIL tidak terlihat oleh tracemalloc. RSS hanya di Linux.
+    """
+
+    def __init__(self, interval=0.0005):
+        self.interval = interval
+        self.peak = 0
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes() - self._start)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._start = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = None
+        if self._start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, _rss_bytes() - self._start)
+        self.peak = max(self.peak, traced)
+
+
+def measure(fn, inputs, repeat, items_per_call=1, warmup=1):
+    """
+    Jalankan fn(x) untuk x bergiliran dari inputs sebanyak repeat kali.
+    Mengembalikan latensi p50/p99 per panggilan (ms), throughput (item/detik) dan puncak memori (MB).
+    """
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    times = []
+    for i in range(repeat):
+        x = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(x)
+        times.append(time.perf_counter() - start)
+    # Memori diukur di putaran terpisah agar thread sampling tidak mengganggu timing
+    with PeakMemory() as memory:
+        for x in inputs[:max(1, min(len(inputs), 3))]:
+            fn(x)
+    times = np.array(times)
+    return {
+        "p50_ms": round(float(np.percentile(times, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(times, 99)) * 1000, 3),
+        "throughput": round(items_per_call * len(times) / float(times.sum()), 2),
+        "peak_mb": round(memory.peak / 1e6, 2),
+    }
+
+
+def stand_in_model(backend="keras", seed=0):
+    """
+    CNN kecil dengan input/output yang sama seperti model97 (50x50x3 -> 2 kelas)
+    """
+    import keras
+
+    keras.utils.set_random_seed(seed)
+    model = keras.Sequential([
+        keras.Input((IMG_SIZE[1], IMG_SIZE[0], 3)),
+        keras.layers.Conv2D(16, 3, activation="relu"),
+        keras.layers.MaxPooling2D(),
+        keras.layers.Conv2D(32, 3, activation="relu"),
+        keras.layers.MaxPooling2D(),
+        keras.layers.Flatten(),
+        keras.layers.Dense(32, activation="relu"),
+        keras.layers.Dense(2, activation="softmax"),
+    ])
+    if backend == "numpy":
+        return NumpyModel.from_keras(model)
+    if backend == "tflite":
+        from smartwaste.convert import convert_tflite
+        path = os.path.join(tempfile.mkdtemp(prefix="smartwaste-bench-"), "stand_in.tflite")
+        convert_tflite(model, path)
+        return TFLiteModel(path)
+    return CompiledKerasModel(model)
+
+
+def parse_resolution(text):
+    width, height = (int(v) for v in text.lower().split("x"))
+    return width, height
+
+
+def run_benchmarks(resolutions=DEFAULT_RESOLUTIONS, batch_sizes=DEFAULT_BATCH_SIZES, backend="keras",
+                   model_path=None, repeat=20, images_per_resolution=4, log=sys.stderr):
+    """
+    Jalankan semua tahap dan kembalikan dict {nama tahap: hasil measure}
+    """
+    results = {}
+
+    def record(name, result):
+        results[name] = result
+        print(f"  {name:<40} p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  "
+              f"{result['throughput']:>10.1f} /s  {result['peak_mb']:>7.1f} MB", file=log)
+
+    for text in resolutions:
+        size = parse_resolution(text)
+        data = synthetic_images(images_per_resolution, size=size, seed=sum(size))
+        images = [decode_image(d) for d in data]
+        features = [extract_features(image) for image in images]
+        pairs = list(zip(images, features))
+
+        record(f"decode@{text}", measure(decode_image, data, repeat))
+        record(f"extract_features@{text}", measure(extract_features, images, repeat))
+        record(f"detect_face_simple@{text}", measure(lambda p: detect_face_simple(*p), pairs, repeat))
+        record(f"is_likely_not_waste@{text}", measure(lambda p: is_likely_not_waste(*p), pairs, repeat))
+        # Tanpa fitur siap pakai: biaya lengkap validasi satu gambar seperti di aplikasi
+        record(f"detect_non_waste_image@{text}", measure(detect_non_waste_image, images, repeat))
+        # Versi batch atas tumpukan gambar kerja (semua gambar sintetis satu resolusi berukuran sama)
+        stack = np.stack([np.asarray(image) for image in images])
+        record(f"detect_non_waste_batch@{text}", measure(detect_non_waste_batch, [stack], repeat,
+                                                         items_per_call=len(stack)))
+        record(f"preprocess@{text}", measure(preprocess_image, images, repeat))
+
+    path = model_path or backend_model_path(backend)
+    if os.path.exists(path):
+        model, model_name = load_backend(backend, path), path
+    else:
+        model, model_name = stand_in_model(backend), "stand-in"
+    print(f"  model: {model_name} ({backend})", file=log)
+    if hasattr(model, "warmup"):
+        model.warmup()
+
+    tensor = preprocess_image(decode_image(synthetic_images(1)[0]))
+    for batch_size in batch_sizes:
+        batch = np.repeat(tensor[None], batch_size, axis=0)
+        record(f"predict@bs{batch_size}", measure(lambda b: predict_batch(model, b, batch_size=batch_size), [batch],
+                                                  max(3, repeat // 2), items_per_call=batch_size, warmup=2))
+        if isinstance(model, CompiledKerasModel):
+            # Pembanding: model.predict Keras biasa tanpa jalur terkompilasi
+            record(f"keras_predict@bs{batch_size}",
+                   measure(lambda b: model.model.predict(b, batch_size=batch_size, verbose=0), [batch],
+                           max(3, repeat // 2), items_per_call=batch_size, warmup=2))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "backend": backend,
+            "model": model_name,
+            "repeat": repeat,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.25, min_delta_ms=0.05, log=sys.stderr):
+    """
+    Bandingkan p50 dengan baseline; kembalikan daftar tahap yang lebih lambat dari (1 + tolerance) x baseline.
+    Selisih di bawah min_delta_ms diabaikan agar tahap sub-mikrodetik tidak dianggap regresi karena noise.
+    """
+    regressions = []
+    print(f"\nPerbandingan dengan baseline ({baseline['meta'].get('created', '?')}, toleransi {tolerance:.0%}):", file=log)
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"  {name:<40} (baru)", file=log)
+            continue
+        ratio = result["p50_ms"] / reference["p50_ms"] if reference["p50_ms"] else 1.0
+        regressed = ratio > 1 + tolerance and result["p50_ms"] - reference["p50_ms"] > min_delta_ms
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<40} {reference['p50_ms']:>9.3f} -> {result['p50_ms']:>9.3f} ms  ({ratio - 1:+.0%})"
+              f"{'  REGRESI' if regressed else ''}", file=log)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline klasifikasi SmartWaste")
+    parser.add_argument("--resolutions", nargs="+", default=list(DEFAULT_RESOLUTIONS), help="Resolusi gambar sintetis, mis. 1920x1080")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=list(DEFAULT_BATCH_SIZES), help="Ukuran batch untuk predict")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras", help="Backend inferensi")
+    parser.add_argument("--model", default=None, help="Path model (default: model97.h5/.tflite/.npz; pengganti kecil jika tidak ada)")
+    parser.add_argument("--repeat", type=int, default=20, help="Jumlah pengukuran per tahap")
+    parser.add_argument("--output", help="Simpan hasil ke file JSON")
+    parser.add_argument("--baseline", help="File JSON baseline untuk dibandingkan")
+    parser.add_argument("--save-baseline", help="Simpan hasil sebagai baseline baru")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Kenaikan p50 yang masih diterima (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Selisih p50 minimum yang dihitung sebagai regresi")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 1:
+        parser.error("--repeat harus >= 1")
+
+    current = run_benchmarks(args.resolutions, args.batch_sizes, backend=args.backend, model_path=args.model,
+                             repeat=args.repeat)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} tahap lebih lambat dari baseline: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
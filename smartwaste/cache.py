@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+import numpy as np
+
+from smartwaste.heuristics import ImageFeatures
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """
+    Hasil yang disimpan untuk satu isi file: fitur, verdict validasi, prediksi mentah dan waktu proses
+    """
+    features: Optional[ImageFeatures] = None
+    verdict: Optional[Tuple[bool, str]] = None  # (bukan sampah?, pesan) dari detect_non_waste_image
+    prediction: Optional[np.ndarray] = None
+    validation_time: float = 0.0  # detik
+    predict_time: float = 0.0  # detik (bagian gambar ini dari satu batch)
+    similar_distance: Optional[int] = None  # jarak dHash jika hasil dipakai ulang dari foto serupa
+    document_like: Optional[bool] = None  # looks_like_document dari foto serupa (fitur tidak dihitung)
+    created_at: float = 0.0
+
+
+def content_key(data, model_id):
+    """
+    Kunci cache dari isi file (bukan nama file) dan identitas model
+    """
+    digest = hashlib.sha256(data)
+    digest.update(b"\0")
+    digest.update(model_id.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Cache LRU thread-safe untuk hasil validasi dan prediksi, dibatasi jumlah entri dan umur entri
+    """
+
+    def __init__(self, max_entries=2048, max_age=3600.0):
+        if max_entries < 1:
+            raise ValueError(f"max_entries harus >= 1, bukan {max_entries}")
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _expired(self, entry, now):
+        return self.max_age is not None and now - entry.created_at > self.max_age
+
+    def get(self, key):
+        """
+        Ambil entri (dan tandai sebagai baru dipakai); None jika tidak ada atau sudah kedaluwarsa
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """
+        Simpan entri lalu buang entri kedaluwarsa dan entri paling lama tidak dipakai
+        """
+        now = time.monotonic()
+        if not entry.created_at:
+            entry = replace(entry, created_at=now)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while self._entries:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                if len(self._entries) <= self.max_entries and not self._expired(oldest, now):
+                    break
+                del self._entries[oldest_key]
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Statistik cache untuk ditampilkan di debug mode
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
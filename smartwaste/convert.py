@@ -0,0 +1,123 @@
+"""
+Ekspor model Keras ke TFLite (opsional terkuantisasi) dan/atau NumPy, lalu cek kesesuaian hasilnya.
+
+Contoh:
+    python -m smartwaste.convert --tflite model97.tflite --quantize int8 --samples arsip/
+    python -m smartwaste.convert --numpy model97.npz --check
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from smartwaste.backends import NumpyModel, TFLiteModel
+from smartwaste.decode import decode_image
+from smartwaste.inference import DEFAULT_MODEL_PATH, load_keras_model, predict_batch, preprocess_image
+
+QUANTIZATION = ("none", "dynamic", "int8")
+
+
+def load_samples(samples_dir=None, limit=200):
+    """
+    Tensor 50x50 untuk kalibrasi/cek kesesuaian: dari folder gambar, atau sintetis jika tidak ada
+    """
+    from smartwaste.batch import iter_image_paths
+    from smartwaste.loadgen import synthetic_images
+
+    if samples_dir:
+        tensors = []
+        for path in iter_image_paths(samples_dir):
+            try:
+                tensors.append(preprocess_image(decode_image(path)))
+            except OSError:
+                continue  # file rusak dilewati
+            if len(tensors) >= limit:
+                break
+        if tensors:
+            return np.stack(tensors)
+    return np.stack([preprocess_image(decode_image(data))
+                     for data in synthetic_images(limit)])
+
+
+def convert_tflite(model, output, quantize="none", samples=None):
+    """
+    Konversi model Keras ke .tflite; int8 dikalibrasi dengan sampel (input/output tetap float32)
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "int8":
+        if samples is None or len(samples) == 0:
+            raise ValueError("Kuantisasi int8 membutuhkan sampel kalibrasi")
+
+        def representative_dataset():
+            for tensor in samples:
+                yield [tensor[np.newaxis].astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output, "wb") as f:
+        f.write(converter.convert())
+    return output
+
+
+def check_parity(reference, candidate, samples, batch_size=64):
+    """
+    Bandingkan prediksi dua model pada sampel yang sama
+    """
+    expected = predict_batch(reference, samples, batch_size=batch_size)
+    start = time.perf_counter()
+    actual = predict_batch(candidate, samples, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    diff = np.abs(expected - actual)
+    return {
+        "samples": len(samples),
+        "label_agreement": float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1))),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "images_per_sec": round(len(samples) / elapsed, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor model SmartWaste ke TFLite/NumPy dan cek kesesuaian")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Model Keras sumber (.h5)")
+    parser.add_argument("--tflite", help="Path output .tflite")
+    parser.add_argument("--quantize", choices=QUANTIZATION, default="none", help="Kuantisasi untuk TFLite")
+    parser.add_argument("--numpy", help="Path output .npz untuk backend numpy")
+    parser.add_argument("--samples", help="Folder gambar untuk kalibrasi int8 dan cek kesesuaian (default: sintetis)")
+    parser.add_argument("--num-samples", type=int, default=200)
+    parser.add_argument("--check", action="store_true", help="Bandingkan hasil ekspor dengan model Keras")
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Gagal (exit 1) jika kesesuaian label di bawah nilai ini")
+    args = parser.parse_args(argv)
+
+    if not args.tflite and not args.numpy:
+        parser.error("Pilih minimal satu output: --tflite dan/atau --numpy")
+
+    model = load_keras_model(args.model)
+    samples = load_samples(args.samples, args.num_samples)
+    exported = []
+
+    if args.tflite:
+        convert_tflite(model, args.tflite, args.quantize, samples)
+        exported.append((args.tflite, lambda: TFLiteModel(args.tflite)))
+    if args.numpy:
+        NumpyModel.from_keras(model).save(args.numpy)
+        exported.append((args.numpy, lambda: NumpyModel.load(args.numpy)))
+
+    ok = True
+    for path, load in exported:
+        print(f"{path}: {os.path.getsize(path) / 1024:.1f} KB")
+        if args.check:
+            report = check_parity(model, load(), samples)
+            print(f"  cek kesesuaian: {report}")
+            ok = ok and report["label_agreement"] >= args.min_agreement
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
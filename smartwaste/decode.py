@@ -0,0 +1,38 @@
+import io
+
+from PIL import Image, ImageOps
+
+# Sisi terpanjang gambar kerja: dipakai heuristik, input model (50x50) dan preview
+WORKING_SIZE = 512
+
+
+def fit_working_size(image, max_size=WORKING_SIZE):
+    """
+    Perkecil gambar PIL sampai sisi terpanjang <= max_size; dipakai untuk foto unggahan dan frame video
+    """
+    if max(image.size) > max_size:
+        factor = max(image.size) // max_size
+        if factor >= 2:
+            image = image.reduce(factor)  # box filter per blok, jauh lebih murah dari resize penuh
+        if max(image.size) > max_size:
+            image.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+    return image
+
+
+def decode_image(source, max_size=WORKING_SIZE):
+    """
+    Decode file/bytes gambar langsung ke ukuran kerja (sisi terpanjang <= max_size) dalam RGB,
+    dengan orientasi EXIF sudah diterapkan. max_size=None berarti resolusi penuh.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    with Image.open(source) as img:
+        if max_size:
+            # JPEG: decoder langsung menghasilkan skala 1/2, 1/4 atau 1/8 yang masih >= max_size
+            img.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(img)
+
+    if max_size:
+        image = fit_working_size(image, max_size)
+    return image.convert("RGB")
@@ -0,0 +1,345 @@
+"""
+Evaluasi offline model + filter detect_non_waste_image pada folder berlabel (gaya TrashNet).
+
+Setiap subfolder adalah satu label: nama kelas model (organik/anorganik), kelas TrashNet
+(cardboard, glass, metal, paper, plastic, trash -> Anorganik), atau folder bukan sampah
+(bukan_sampah, non_waste -> harus ditolak). Pemetaan lain bisa diberikan dengan --label-map.
+
+Run pertama men-decode semua gambar secara paralel dan menyimpan tensor 50x50 serta fitur heuristik
+ke file .npy (memory-mapped) dengan kunci sidik jari dataset; run berikutnya tidak men-decode sama sekali.
+Prediksi dibaca per batch dari memmap dengan prefetch (tf.data jika tensorflow sudah dimuat oleh backend keras).
+
+Contoh:
+    python -m smartwaste.evaluate dataset/trashnet --batch-size 128
+    python -m smartwaste.evaluate dataset/ --label-map kompos=Organik --json laporan.json
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from smartwaste.backends import BACKENDS, load_backend
+from smartwaste.batch import iter_image_paths
+from smartwaste.decode import WORKING_SIZE, decode_image
+from smartwaste.heuristics import BatchFeatures, ImageFeatures, extract_features, looks_like_document, non_waste_rule_hits
+from smartwaste.inference import CLASS_NAMES, CONFIDENCE_THRESHOLD, DEFAULT_BATCH_SIZE, IMG_SIZE, predict_batch
+
+DEFAULT_CACHE_DIR = os.environ.get("SMARTWASTE_EVAL_CACHE", ".eval_cache")
+CACHE_VERSION = 1  # Naikkan jika isi tensor/fitur yang disimpan berubah
+PREFETCH_BATCHES = 2  # Batch yang disiapkan lebih dulu jika tensorflow tidak tersedia
+REJECTED = "rejected"
+LOW_CONFIDENCE = "low_confidence"
+LABEL_ALIASES = {
+    "organik": "Organik", "organic": "Organik", "biological": "Organik", "food": "Organik",
+    "anorganik": "Anorganik", "inorganic": "Anorganik",
+    "cardboard": "Anorganik", "glass": "Anorganik", "metal": "Anorganik", "paper": "Anorganik",
+    "plastic": "Anorganik", "trash": "Anorganik",
+    "bukan_sampah": REJECTED, "non_waste": REJECTED, "not_waste": REJECTED, "rejected": REJECTED,
+}
+# Semua fitur disimpan sebagai float64 (hitungan piksel tetap eksak); None disimpan sebagai NaN
+FEATURE_DTYPE = np.dtype([(name, np.float64) for name in ImageFeatures.__dataclass_fields__])
+
+
+def scan_dataset(root, label_map=None):
+    """
+    Daftar (path, label) dari subfolder root; subfolder tanpa label dikembalikan terpisah
+    """
+    labels = {**LABEL_ALIASES, **{k.lower(): v for k, v in (label_map or {}).items()}}
+    items, unknown = [], []
+    for folder in sorted(os.listdir(root)):
+        directory = os.path.join(root, folder)
+        if not os.path.isdir(directory):
+            continue
+        label = labels.get(folder.lower())
+        if label is None:
+            unknown.append(folder)
+            continue
+        items.extend((path, label) for path in iter_image_paths(directory))
+    return items, unknown
+
+
+def dataset_fingerprint(root, paths):
+    """
+    Sidik jari dari path relatif, ukuran dan mtime tiap file serta ukuran preprocessing (tanpa membaca isi file)
+    """
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{IMG_SIZE}:{WORKING_SIZE}".encode())
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, root)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:20]
+
+
+def _decode_item(path):
+    # Berjalan di proses worker: tensor uint8 50x50 (identik dengan preprocess_image sebelum dibagi 255) dan fitur
+    try:
+        image = decode_image(path)
+        features = extract_features(image)
+        values = tuple(np.nan if value is None else float(value)
+                       for value in (getattr(features, name) for name in FEATURE_DTYPE.names))
+        return np.asarray(image.resize(IMG_SIZE), dtype=np.uint8), values, ""
+    except Exception as e:
+        return None, None, str(e)
+
+
+class TensorStore:
+    """
+    Tensor 50x50 uint8 dan fitur heuristik satu dataset, dibaca sebagai memmap dari folder cache
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tensors = np.load(os.path.join(directory, "tensors.npy"), mmap_mode="r")
+        self.features = np.load(os.path.join(directory, "features.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        self.paths = index["paths"]
+        self.errors = {int(i): message for i, message in index["errors"].items()}
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def build(cls, directory, paths, workers=None, log=sys.stderr):
+        """
+        Decode semua gambar di process pool dan tulis langsung ke memmap; folder baru terlihat setelah lengkap
+        """
+        workers = workers or os.cpu_count() or 1
+        tmp = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        shape = (len(paths), IMG_SIZE[1], IMG_SIZE[0], 3)
+        tensors = np.lib.format.open_memmap(os.path.join(tmp, "tensors.npy"), mode="w+", dtype=np.uint8, shape=shape)
+        features = np.lib.format.open_memmap(os.path.join(tmp, "features.npy"), mode="w+", dtype=FEATURE_DTYPE,
+                                             shape=(len(paths),))
+        errors = {}
+        start = time.perf_counter()
+        if workers <= 1:
+            results = map(_decode_item, paths)
+            pool = None
+        else:
+            pool = multiprocessing.get_context("spawn").Pool(workers)  # jangan fork proses yang sudah memuat tensorflow
+            results = pool.imap(_decode_item, paths, chunksize=16)
+        try:
+            for i, (tensor, values, error) in enumerate(results):
+                if error:
+                    errors[i] = error
+                    features[i] = (np.nan,) * len(FEATURE_DTYPE)
+                else:
+                    tensors[i] = tensor
+                    features[i] = values
+                if (i + 1) % 1000 == 0:
+                    print(f"{i + 1}/{len(paths)} gambar di-decode ({(i + 1) / (time.perf_counter() - start):.1f} gambar/detik)",
+                          file=log)
+        finally:
+            if pool is not None:
+                pool.terminate()
+        tensors.flush()
+        features.flush()
+        del tensors, features
+        with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"paths": paths, "errors": errors}, f)
+        try:
+            os.replace(tmp, directory)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # proses lain sudah membuat cache yang sama
+        return cls(directory)
+
+    @classmethod
+    def open_or_build(cls, cache_dir, root, paths, workers=None, log=sys.stderr):
+        """
+        (store, True jika dari cache) untuk dataset ini
+        """
+        directory = os.path.join(cache_dir, dataset_fingerprint(root, paths))
+        if os.path.exists(os.path.join(directory, "index.json")):
+            return cls(directory), True
+        os.makedirs(cache_dir, exist_ok=True)
+        return cls.build(directory, paths, workers, log), False
+
+    def batch_features(self):
+        """
+        Fitur semua gambar sebagai BatchFeatures; height/width juga array karena ukuran gambar boleh berbeda
+        """
+        return BatchFeatures(**{name: np.asarray(self.features[name]) for name in FEATURE_DTYPE.names})
+
+
+def _prefetch_batches(load, starts):
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch") as executor:
+        pending = deque()
+        for start in starts:
+            pending.append(executor.submit(load, start))
+            if len(pending) > PREFETCH_BATCHES:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_batches(tensors, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Iterator batch float32 0-1 dari memmap uint8. Jika tensorflow sudah dimuat (backend keras): tf.data dengan
+    map paralel dan prefetch; selain itu thread prefetch, sehingga backend tflite/numpy tidak mengimpor tensorflow.
+    Pipeline dibangun saat fungsi ini dipanggil, jadi bisa disiapkan sebelum pengukuran waktu.
+    """
+    def load(start):
+        start = int(start)
+        return np.asarray(tensors[start:start + batch_size], dtype=np.float32) / 255.0
+
+    tf = sys.modules.get("tensorflow")
+    if tf is None:
+        return _prefetch_batches(load, range(0, len(tensors), batch_size))
+    dataset = tf.data.Dataset.range(0, len(tensors), batch_size).map(
+        lambda start: tf.numpy_function(load, [start], tf.float32),
+        num_parallel_calls=tf.data.AUTOTUNE, deterministic=True).prefetch(tf.data.AUTOTUNE)
+    return dataset.as_numpy_iterator()
+
+
+def evaluate(store, labels, model, batch_size=DEFAULT_BATCH_SIZE, class_names=CLASS_NAMES):
+    """
+    Jalankan aturan heuristik dan model pada isi store lalu hitung akurasi, confusion matrix dan frekuensi aturan
+    """
+    class_names = list(class_names)
+    n = len(store)
+    labels = np.asarray(labels, dtype=object)
+    valid = np.ones(n, dtype=bool)
+    valid[list(store.errors)] = False
+
+    start = time.perf_counter()
+    features = store.batch_features()
+    messages, hits = non_waste_rule_hits(features)
+    hits &= valid
+    rejected = hits.any(axis=0)
+    decisive = np.where(rejected, np.argmax(hits, axis=0), -1)  # aturan pertama yang cocok = pesan ke pengguna
+    document_like = looks_like_document(features) & valid
+    rules_time = time.perf_counter() - start
+
+    batches = iter_batches(store.tensors, batch_size)  # setup pipeline tidak ikut dihitung sebagai waktu prediksi
+    start = time.perf_counter()
+    parts = [predict_batch(model, batch, batch_size=len(batch)) for batch in batches]
+    predictions = np.concatenate(parts) if parts else np.empty((0, len(class_names)), dtype=np.float32)
+    predict_time = time.perf_counter() - start
+    predicted = np.asarray(class_names, dtype=object)[np.argmax(predictions, axis=1)]
+    confidence = np.max(predictions, axis=1) * 100
+
+    # Hasil akhir sama seperti aplikasi/batch: ditolak aturan, kepercayaan rendah, dokumen, atau label model
+    outcome = predicted.copy()
+    outcome[confidence < CONFIDENCE_THRESHOLD] = LOW_CONFIDENCE
+    outcome[document_like & (confidence >= CONFIDENCE_THRESHOLD)] = REJECTED
+    outcome[rejected] = REJECTED
+
+    waste = valid & (labels != REJECTED)
+    non_waste = valid & (labels == REJECTED)
+    rows = [name for name in class_names + [REJECTED] if np.any(valid & (labels == name))]
+    columns = class_names + [LOW_CONFIDENCE, REJECTED]
+    matrix = [[int(np.count_nonzero(valid & (labels == row) & (outcome == column))) for column in columns] for row in rows]
+
+    def ratio(mask, of):
+        return float(np.count_nonzero(mask & of) / np.count_nonzero(of)) if np.any(of) else None
+
+    return {
+        "images": n,
+        "errors": len(store.errors),
+        "model_accuracy": ratio(predicted == labels, waste),  # argmax saja, tanpa filter
+        "pipeline_accuracy": ratio(outcome == labels, valid),  # termasuk filter dan ambang kepercayaan
+        "false_reject_rate": ratio(outcome == REJECTED, waste),
+        "true_reject_rate": ratio(outcome == REJECTED, non_waste),
+        "confusion": {"rows": rows, "columns": columns, "matrix": matrix},
+        "rules": [
+            {
+                "rule": i,
+                "message": message,
+                "fires": int(np.count_nonzero(hits[i])),
+                "decisive": int(np.count_nonzero(decisive == i)),
+                "fires_on_waste": int(np.count_nonzero(hits[i] & waste)),
+            }
+            for i, message in enumerate(messages)
+        ],
+        "timing": {
+            "rules_s": rules_time,
+            "predict_s": predict_time,
+            "predict_images_per_s": n / predict_time if predict_time else 0.0,
+        },
+    }
+
+
+def format_report(report):
+    def percent(value):
+        return "-" if value is None else f"{value:.2%}"
+
+    lines = [
+        f"Gambar: {report['images']} ({report['errors']} gagal dibaca)",
+        f"Akurasi model (tanpa filter): {percent(report['model_accuracy'])}",
+        f"Akurasi pipeline (filter + ambang): {percent(report['pipeline_accuracy'])}",
+        f"Sampah yang ditolak: {percent(report['false_reject_rate'])} · bukan sampah yang ditolak: {percent(report['true_reject_rate'])}",
+        "",
+        "Confusion matrix (baris = label, kolom = hasil):",
+    ]
+    confusion = report["confusion"]
+    width = max([len(name) for name in confusion["rows"] + confusion["columns"]] + [6]) + 2
+    lines.append("".ljust(width) + "".join(name.rjust(width) for name in confusion["columns"]))
+    for row, counts in zip(confusion["rows"], confusion["matrix"]):
+        lines.append(row.ljust(width) + "".join(str(count).rjust(width) for count in counts))
+    lines += ["", "Aturan heuristik (aktif / menentukan / aktif pada sampah):"]
+    valid = max(report["images"] - report["errors"], 1)
+    for rule in report["rules"]:
+        lines.append(f"  [{rule['rule']:2d}] {rule['fires'] / valid:7.2%} {rule['decisive']:6d} {rule['fires_on_waste']:6d}  {rule['message']}")
+    timing = report["timing"]
+    lines += ["", ", ".join(f"{key} = {value:.3f}" if isinstance(value, float) else f"{key} = {value}" for key, value in timing.items())]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluasi offline model dan filter SmartWaste pada folder berlabel")
+    parser.add_argument("root", help="Folder dataset: satu subfolder per label")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras", help="Backend inferensi")
+    parser.add_argument("--model", default=None, help="Path model (default: model97.h5/.tflite/.npz sesuai backend)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Jumlah gambar per panggilan predict")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses decode saat cache dibuat (default: jumlah CPU)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Folder cache tensor .npy")
+    parser.add_argument("--label-map", nargs="*", default=[], metavar="FOLDER=LABEL",
+                        help=f"Label untuk subfolder lain: nama kelas model atau {REJECTED}")
+    parser.add_argument("--json", default=None, help="Simpan laporan lengkap sebagai JSON")
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1:
+        parser.error("--batch-size harus >= 1")
+    if not os.path.isdir(args.root):
+        parser.error(f"Folder tidak ditemukan: {args.root}")
+    label_map = {}
+    for entry in args.label_map:
+        folder, _, label = entry.partition("=")
+        if not label or label not in CLASS_NAMES + [REJECTED]:
+            parser.error(f"--label-map {entry}: label harus salah satu dari {', '.join(CLASS_NAMES + [REJECTED])}")
+        label_map[folder] = label
+
+    items, unknown = scan_dataset(args.root, label_map)
+    if unknown:
+        print(f"Subfolder tanpa label dilewati: {', '.join(unknown)} (tambahkan dengan --label-map)", file=sys.stderr)
+    if not items:
+        parser.error(f"Tidak ada gambar berlabel di {args.root}")
+    paths = [path for path, _ in items]
+
+    start = time.perf_counter()
+    store, cached = TensorStore.open_or_build(args.cache_dir, args.root, paths, args.workers)
+    load_time = time.perf_counter() - start
+    print(f"Tensor {'dari cache' if cached else 'dibuat'}: {store.directory} ({load_time:.2f} s)", file=sys.stderr)
+
+    model = load_backend(args.backend, args.model)
+    report = evaluate(store, [label for _, label in items], model, args.batch_size)
+    total = load_time + report["timing"]["rules_s"] + report["timing"]["predict_s"]
+    report["timing"] = {"cache": "hit" if cached else "built", "load_s": load_time, **report["timing"],
+                        "total_s": total, "images_per_s": len(store) / total if total else 0.0}
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
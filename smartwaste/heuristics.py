@@ -0,0 +1,595 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+# --- EKSTRAKSI FITUR ---
+# Semua aturan di bawah membaca dari satu ImageFeatures yang dihitung sekali per gambar.
+# Grayscale disimpan sebagai jumlah kanal R+G+B (int16, 0-765) sehingga
+# "gray > 200" setara dengan "jumlah > 600" tanpa perlu array float64.
+
+@dataclass(frozen=True)
+class ImageFeatures:
+    """
+    Ringkasan statistik gambar yang dibutuhkan aturan deteksi non-sampah
+    """
+    height: int
+    width: int
+    n_pixels: int
+    # Jumlah piksel per masker warna RGB
+    skin_pixels: int
+    white_pixels: int
+    black_pixels: int
+    green_pixels: int
+    yellow_pixels: int
+    # Jumlah piksel per ambang grayscale
+    gray_above_200: int
+    gray_above_240: int
+    gray_below_50: int
+    gray_below_80: int
+    gray_below_100: int
+    # Jumlah tepi (selisih grayscale antar piksel bertetangga)
+    h_edges_above_25: int
+    h_edges_above_40: int
+    v_edges_above_40: int
+    # Magnitudo gradient pada area yang kompatibel; None jika gambar terlalu kecil
+    gradient_above_30: int
+    gradient_mean: Optional[float]
+    gradient_std: Optional[float]
+    # Rata-rata selisih sisi kiri dan kanan (dicerminkan); None jika lebar < 2
+    symmetry_diff: Optional[float]
+    # Standar deviasi seluruh nilai piksel dan jumlah piksel dengan std antar kanal > 35
+    color_std: float
+    colorful_pixels: int
+
+
+def _count_edges_above(high, low, threshold):
+    """
+    Hitung |high/3 - low/3| > threshold dari jumlah kanal, persis seperti versi float64.
+    Hanya piksel yang tepat di ambang yang dihitung ulang dengan float.
+    """
+    diff = np.abs(high - low)
+    count = int(np.count_nonzero(diff > 3 * threshold))
+    tie = diff == 3 * threshold
+    if tie.any():
+        count += int(np.count_nonzero(np.abs(high[tie] / 3.0 - low[tie] / 3.0) > threshold))
+    return count
+
+
+def extract_features(image):
+    """
+    Hitung semua statistik untuk aturan deteksi dalam satu kali jalan dengan dtype integer
+    """
+    img_array = np.asarray(image)
+    height, width = img_array.shape[:2]
+    n_pixels = height * width
+
+    # Salin ke tiga bidang kanal yang kontigu: operasi masker pada view ber-stride jauh lebih lambat
+    r, g, b = np.moveaxis(img_array, 2, 0).copy()
+
+    # Masker warna langsung dihitung jumlahnya agar tidak menumpuk array boolean
+    skin_pixels = int(np.count_nonzero((r > 95) & (g > 40) & (b > 20) & (r > g) & (r > b) & ((r - g) > 15)))
+    white_pixels = int(np.count_nonzero((r > 200) & (g > 200) & (b > 200)))
+    black_pixels = int(np.count_nonzero((r < 50) & (g < 50) & (b < 50)))
+    green_pixels = int(np.count_nonzero((g > 150) & (r < 100) & (b < 100)))
+    yellow_pixels = int(np.count_nonzero((r > 200) & (g > 200) & (b < 100)))
+
+    # Grayscale sebagai jumlah kanal (gray = gray3 / 3)
+    gray3 = r.astype(np.int16) + g + b
+
+    # Tepi horizontal dan vertikal
+    h_high, h_low = gray3[:, 1:], gray3[:, :-1]
+    v_high, v_low = gray3[1:, :], gray3[:-1, :]
+    h_edges_above_25 = _count_edges_above(h_high, h_low, 25)
+    h_edges_above_40 = _count_edges_above(h_high, h_low, 40)
+    v_edges_above_40 = _count_edges_above(v_high, v_low, 40)
+
+    # Magnitudo gradient pada area [:H-1, :W-1], dalam satuan (3 * gray)^2.
+    # float32 cukup: kuadrat maksimum 2 * 765^2 masih bilangan bulat yang eksak.
+    gradient_above_30 = 0
+    gradient_mean = gradient_std = None
+    if height > 1 and width > 1:
+        gx_high, gx_low = gray3[:-1, 1:], gray3[:-1, :-1]
+        gy_high, gy_low = gray3[1:, :-1], gray3[:-1, :-1]
+        magnitude = np.subtract(gx_high, gx_low, dtype=np.float32)
+        magnitude *= magnitude
+        gy3 = np.subtract(gy_high, gy_low, dtype=np.float32)
+        gy3 *= gy3
+        magnitude += gy3
+        del gy3
+
+        gradient_above_30 = int(np.count_nonzero(magnitude > 8100))
+        tie = magnitude == 8100
+        if tie.any():
+            gx = np.abs(gx_high[tie] / 3.0 - gx_low[tie] / 3.0)
+            gy = np.abs(gy_high[tie] / 3.0 - gy_low[tie] / 3.0)
+            gradient_above_30 += int(np.count_nonzero(np.sqrt(gx**2 + gy**2) > 30))
+
+        count = magnitude.size
+        mean_sq = float(magnitude.sum(dtype=np.float64)) / (9 * count)
+        np.sqrt(magnitude, out=magnitude)
+        gradient_mean = float(magnitude.sum(dtype=np.float64)) / (3 * count)
+        gradient_std = float(np.sqrt(max(mean_sq - gradient_mean**2, 0.0)))
+        del magnitude
+
+    # Simetri kiri-kanan
+    symmetry_diff = None
+    mid_width = width // 2
+    if mid_width > 0:
+        left_side = gray3[:, :mid_width]
+        right_side = gray3[:, mid_width:2 * mid_width]
+        total = np.abs(left_side - right_side[:, ::-1]).sum(dtype=np.int64)
+        symmetry_diff = float(total) / (3 * left_side.size)
+
+    # Variasi warna: global dan per piksel (std antar kanal > 35 <=> 3*sum(x^2) - sum(x)^2 > 9*35^2)
+    square_sum = np.square(r, dtype=np.int32)
+    square_sum += np.square(g, dtype=np.int32)
+    square_sum += np.square(b, dtype=np.int32)
+    n_values = 3 * n_pixels
+    total = int(gray3.sum(dtype=np.int64))
+    total_sq = int(square_sum.sum(dtype=np.int64))
+    color_std = float(np.sqrt(max(total_sq / n_values - (total / n_values) ** 2, 0.0)))
+
+    channel_var9 = square_sum
+    channel_var9 *= 3
+    channel_var9 -= np.square(gray3, dtype=np.int32)
+    colorful_pixels = int(np.count_nonzero(channel_var9 > 11025))
+    tie = channel_var9 == 11025
+    if tie.any():
+        colorful_pixels += int(np.count_nonzero(np.std(img_array[tie], axis=1) > 35))
+
+    return ImageFeatures(
+        height=height,
+        width=width,
+        n_pixels=n_pixels,
+        skin_pixels=skin_pixels,
+        white_pixels=white_pixels,
+        black_pixels=black_pixels,
+        green_pixels=green_pixels,
+        yellow_pixels=yellow_pixels,
+        gray_above_200=int(np.count_nonzero(gray3 > 600)),
+        gray_above_240=int(np.count_nonzero(gray3 > 720)),
+        gray_below_50=int(np.count_nonzero(gray3 < 150)),
+        gray_below_80=int(np.count_nonzero(gray3 < 240)),
+        gray_below_100=int(np.count_nonzero(gray3 < 300)),
+        h_edges_above_25=h_edges_above_25,
+        h_edges_above_40=h_edges_above_40,
+        v_edges_above_40=v_edges_above_40,
+        gradient_above_30=gradient_above_30,
+        gradient_mean=gradient_mean,
+        gradient_std=gradient_std,
+        symmetry_diff=symmetry_diff,
+        color_std=color_std,
+        colorful_pixels=colorful_pixels,
+    )
+
+
+@dataclass(frozen=True)
+class BatchFeatures:
+    """
+    ImageFeatures untuk N gambar berukuran sama: field hitungan dan statistik berupa array (N,)
+    """
+    height: int
+    width: int
+    n_pixels: int
+    skin_pixels: np.ndarray
+    white_pixels: np.ndarray
+    black_pixels: np.ndarray
+    green_pixels: np.ndarray
+    yellow_pixels: np.ndarray
+    gray_above_200: np.ndarray
+    gray_above_240: np.ndarray
+    gray_below_50: np.ndarray
+    gray_below_80: np.ndarray
+    gray_below_100: np.ndarray
+    h_edges_above_25: np.ndarray
+    h_edges_above_40: np.ndarray
+    v_edges_above_40: np.ndarray
+    gradient_above_30: np.ndarray
+    gradient_mean: Optional[np.ndarray]
+    gradient_std: Optional[np.ndarray]
+    symmetry_diff: Optional[np.ndarray]
+    color_std: np.ndarray
+    colorful_pixels: np.ndarray
+
+    def __len__(self):
+        return len(self.skin_pixels)
+
+    @classmethod
+    def stack(cls, features):
+        """
+        Gabungkan daftar ImageFeatures (ukuran gambar sama) menjadi BatchFeatures
+        """
+        first = features[0]
+        values = {}
+        for name in cls.__dataclass_fields__:
+            value = getattr(first, name)
+            if name not in ("height", "width", "n_pixels") and value is not None:
+                value = np.array([getattr(f, name) for f in features])
+            values[name] = value
+        return cls(**values)
+
+    @classmethod
+    def concat(cls, parts):
+        values = {}
+        for name in cls.__dataclass_fields__:
+            value = getattr(parts[0], name)
+            if isinstance(value, np.ndarray):
+                value = np.concatenate([getattr(part, name) for part in parts])
+            values[name] = value
+        return cls(**values)
+
+    def at(self, i):
+        """
+        ImageFeatures untuk gambar ke-i (sama persis dengan extract_features pada gambar itu)
+        """
+        values = {}
+        for name in ImageFeatures.__dataclass_fields__:
+            value = getattr(self, name)
+            if isinstance(value, np.ndarray):
+                value = value[i].item()
+            values[name] = value
+        return ImageFeatures(**values)
+
+
+def _count_per_image(mask):
+    # count_nonzero dengan axis menjumlahkan lewat cast ke integer; per gambar jauh lebih cepat
+    return np.array([np.count_nonzero(m) for m in mask], dtype=np.int64)
+
+
+def _count_edges_above_batch(high, low, threshold):
+    """
+    Versi batch dari _count_edges_above: hitungan per gambar, piksel di ambang dihitung ulang dengan float
+    """
+    diff = np.abs(high - low)
+    count = _count_per_image(diff > 3 * threshold)
+    tie = diff == 3 * threshold
+    for i in range(len(diff)):
+        if tie[i].any():
+            count[i] += np.count_nonzero(np.abs(high[i][tie[i]] / 3.0 - low[i][tie[i]] / 3.0) > threshold)
+    return count
+
+
+# Vektorisasi lintas batch hanya menguntungkan untuk gambar kecil: untuk gambar besar operasi sudah
+# dibatasi bandwidth memori dan tumpukan yang melebihi cache justru lebih lambat daripada per gambar.
+BATCH_CHUNK_PIXELS = 1 << 16
+
+
+def extract_features_batch(images, chunk_pixels=BATCH_CHUNK_PIXELS):
+    """
+    extract_features untuk tumpukan (N, H, W, 3) uint8, diproses per potongan sekitar chunk_pixels piksel
+    """
+    stack = np.asarray(images)
+    if stack.ndim != 4 or stack.shape[-1] != 3:
+        raise ValueError(f"Butuh array (N, H, W, 3), bukan {stack.shape}")
+    per_chunk = max(1, chunk_pixels // max(1, stack.shape[1] * stack.shape[2]))
+    if per_chunk == 1:
+        parts = [BatchFeatures.stack([extract_features(image) for image in stack])]
+    else:
+        parts = [_extract_chunk(stack[i:i + per_chunk]) for i in range(0, len(stack), per_chunk)]
+    return parts[0] if len(parts) == 1 else BatchFeatures.concat(parts)
+
+
+def _extract_chunk(stack):
+    n, height, width = stack.shape[:3]
+    n_pixels = height * width
+
+    r, g, b = np.moveaxis(stack, 3, 0).copy()
+
+    skin_pixels = _count_per_image((r > 95) & (g > 40) & (b > 20) & (r > g) & (r > b) & ((r - g) > 15))
+    white_pixels = _count_per_image((r > 200) & (g > 200) & (b > 200))
+    black_pixels = _count_per_image((r < 50) & (g < 50) & (b < 50))
+    green_pixels = _count_per_image((g > 150) & (r < 100) & (b < 100))
+    yellow_pixels = _count_per_image((r > 200) & (g > 200) & (b < 100))
+
+    gray3 = r.astype(np.int16) + g + b
+
+    h_high, h_low = gray3[:, :, 1:], gray3[:, :, :-1]
+    v_high, v_low = gray3[:, 1:, :], gray3[:, :-1, :]
+    h_edges_above_25 = _count_edges_above_batch(h_high, h_low, 25)
+    h_edges_above_40 = _count_edges_above_batch(h_high, h_low, 40)
+    v_edges_above_40 = _count_edges_above_batch(v_high, v_low, 40)
+
+    gradient_above_30 = np.zeros(n, dtype=np.int64)
+    gradient_mean = gradient_std = None
+    if height > 1 and width > 1:
+        gx_high, gx_low = gray3[:, :-1, 1:], gray3[:, :-1, :-1]
+        gy_high, gy_low = gray3[:, 1:, :-1], gray3[:, :-1, :-1]
+        magnitude = np.subtract(gx_high, gx_low, dtype=np.float32)
+        magnitude *= magnitude
+        gy3 = np.subtract(gy_high, gy_low, dtype=np.float32)
+        gy3 *= gy3
+        magnitude += gy3
+        del gy3
+
+        gradient_above_30 = _count_per_image(magnitude > 8100)
+        tie = magnitude == 8100
+        for i in range(n):
+            if tie[i].any():
+                gx = np.abs(gx_high[i][tie[i]] / 3.0 - gx_low[i][tie[i]] / 3.0)
+                gy = np.abs(gy_high[i][tie[i]] / 3.0 - gy_low[i][tie[i]] / 3.0)
+                gradient_above_30[i] += np.count_nonzero(np.sqrt(gx**2 + gy**2) > 30)
+
+        # Jumlah per gambar dihitung per baris kontigu agar urutan penjumlahan float sama dengan versi satu gambar
+        magnitude = magnitude.reshape(n, -1)
+        count = magnitude.shape[1]
+        mean_sq = magnitude.sum(axis=1, dtype=np.float64) / (9 * count)
+        np.sqrt(magnitude, out=magnitude)
+        gradient_mean = magnitude.sum(axis=1, dtype=np.float64) / (3 * count)
+        # Skalar per gambar: x**2 pada float Python memakai pow(), bisa beda 1 ulp dari x*x milik NumPy
+        gradient_std = np.array([float(np.sqrt(max(sq - mean**2, 0.0)))
+                                 for sq, mean in zip(mean_sq.tolist(), gradient_mean.tolist())])
+        del magnitude
+
+    symmetry_diff = None
+    mid_width = width // 2
+    if mid_width > 0:
+        left_side = gray3[:, :, :mid_width]
+        right_side = gray3[:, :, mid_width:2 * mid_width]
+        total = np.abs(left_side - right_side[:, :, ::-1]).reshape(n, -1).sum(axis=1, dtype=np.int64)
+        symmetry_diff = total / (3 * height * mid_width)
+
+    square_sum = np.square(r, dtype=np.int32)
+    square_sum += np.square(g, dtype=np.int32)
+    square_sum += np.square(b, dtype=np.int32)
+    n_values = 3 * n_pixels
+    total = gray3.reshape(n, -1).sum(axis=1, dtype=np.int64)
+    total_sq = square_sum.reshape(n, -1).sum(axis=1, dtype=np.int64)
+    color_std = np.array([float(np.sqrt(max(sq / n_values - (t / n_values) ** 2, 0.0)))
+                          for t, sq in zip(total.tolist(), total_sq.tolist())])
+
+    channel_var9 = square_sum
+    channel_var9 *= 3
+    channel_var9 -= np.square(gray3, dtype=np.int32)
+    colorful_pixels = _count_per_image(channel_var9 > 11025)
+    tie = channel_var9 == 11025
+    for i in range(n):
+        if tie[i].any():
+            colorful_pixels[i] += np.count_nonzero(np.std(stack[i][tie[i]], axis=1) > 35)
+
+    return BatchFeatures(
+        height=height,
+        width=width,
+        n_pixels=n_pixels,
+        skin_pixels=skin_pixels,
+        white_pixels=white_pixels,
+        black_pixels=black_pixels,
+        green_pixels=green_pixels,
+        yellow_pixels=yellow_pixels,
+        gray_above_200=_count_per_image(gray3 > 600),
+        gray_above_240=_count_per_image(gray3 > 720),
+        gray_below_50=_count_per_image(gray3 < 150),
+        gray_below_80=_count_per_image(gray3 < 240),
+        gray_below_100=_count_per_image(gray3 < 300),
+        h_edges_above_25=h_edges_above_25,
+        h_edges_above_40=h_edges_above_40,
+        v_edges_above_40=v_edges_above_40,
+        gradient_above_30=gradient_above_30,
+        gradient_mean=gradient_mean,
+        gradient_std=gradient_std,
+        symmetry_diff=symmetry_diff,
+        color_std=color_std,
+        colorful_pixels=colorful_pixels,
+    )
+
+
+# --- ATURAN DETEKSI ---
+
+# Fungsi tambahan untuk deteksi gambar yang bukan sampah
+def is_likely_not_waste(image, features=None):
+    """
+    Deteksi tambahan untuk gambar yang kemungkinan bukan sampah
+    """
+    f = features if features is not None else extract_features(image)
+
+    # Deteksi area putih yang besar (kemungkinan dokumen)
+    if f.gray_above_200 > f.height * f.width * 0.7:
+        return True, "Gambar terlalu banyak area putih. Kemungkinan dokumen atau kertas."
+
+    # Deteksi pola grid (kemungkinan tabel)
+    # Hitung garis horizontal dan vertikal yang kuat
+    if f.h_edges_above_40 > f.height * 0.5 or f.v_edges_above_40 > f.width * 0.5:
+        return True, "Gambar terdeteksi memiliki pola grid/tabel. Hanya upload gambar sampah."
+
+    return False, ""
+
+
+# Fungsi untuk deteksi wajah sederhana
+def detect_face_simple(image, features=None):
+    """
+    Deteksi wajah sederhana berdasarkan karakteristik wajah
+    """
+    f = features if features is not None else extract_features(image)
+
+    # Deteksi area kulit (warna kulit manusia): R > G > B
+    skin_ratio = f.skin_pixels / f.n_pixels
+
+    # Deteksi topeng atau benda putih yang menutupi wajah
+    # Topeng kartun biasanya berwarna putih dengan detail hitam
+    white_ratio = f.white_pixels / f.n_pixels
+    black_ratio = f.black_pixels / f.n_pixels
+
+    # Jika ada area putih yang besar dengan detail hitam, kemungkinan topeng
+    if white_ratio > 0.2 and black_ratio > 0.05:
+        return True, "Gambar terdeteksi mengandung topeng atau benda yang menutupi wajah. Hanya upload gambar sampah."
+
+    # Jika terlalu banyak area kulit, kemungkinan wajah
+    if skin_ratio > 0.25:
+        return True, "Gambar terdeteksi mengandung wajah/orang. Hanya upload gambar sampah."
+
+    # Kombinasi area kulit dan area gelap (rambut) yang tinggi
+    dark_ratio = f.gray_below_80 / f.n_pixels
+    if skin_ratio > 0.1 and dark_ratio > 0.15:
+        return True, "Gambar terdeteksi mengandung wajah/orang. Hanya upload gambar sampah."
+
+    # Deteksi pola simetris yang bisa jadi wajah
+    if f.symmetry_diff is not None and f.symmetry_diff < 25 and skin_ratio > 0.05:
+        return True, "Gambar terdeteksi memiliki pola simetris seperti wajah. Hanya upload gambar sampah."
+
+    if f.gradient_mean is not None:
+        # Deteksi bentuk oval dengan kombinasi area putih dan gradient melingkar
+        if f.gradient_above_30 > (f.height * f.width * 0.08):
+            if skin_ratio > 0.05:
+                return True, "Gambar terdeteksi mengandung bentuk kepala/wajah. Hanya upload gambar sampah."
+            elif white_ratio > 0.15:  # Jika ada area putih yang besar dengan bentuk oval
+                return True, "Gambar terdeteksi mengandung topeng atau benda oval putih. Hanya upload gambar sampah."
+
+        # Jika gradient terlalu rendah (terlalu blur) dan ada area putih, kemungkinan foto selfie
+        if f.gradient_mean < 20 and white_ratio > 0.1:
+            return True, "Gambar terdeteksi sebagai foto blur/selfie. Hanya upload gambar sampah."
+
+        # Foto dengan gerakan biasanya memiliki gradient yang tidak teratur
+        if f.gradient_std > 25 and white_ratio > 0.1:
+            return True, "Gambar terdeteksi sebagai foto dengan gerakan/selfie. Hanya upload gambar sampah."
+
+    return False, ""
+
+
+# Fungsi untuk deteksi foto/gambar yang bukan sampah
+def detect_non_waste_image(image, features=None):
+    """
+    Deteksi komprehensif untuk gambar yang bukan sampah
+    """
+    f = features if features is not None else extract_features(image)
+    n_pixels = f.height * f.width
+
+    # Deteksi wajah
+    is_face, face_message = detect_face_simple(image, f)
+    if is_face:
+        return True, face_message
+
+    # Deteksi dokumen/tabel
+    is_not_waste, not_waste_message = is_likely_not_waste(image, f)
+    if is_not_waste:
+        return True, not_waste_message
+
+    # Deteksi area dengan warna yang sangat terang (kemungkinan UI/screenshot)
+    if f.gray_above_240 > n_pixels * 0.3:
+        return True, "Gambar terdeteksi sebagai screenshot atau interface. Hanya upload gambar sampah."
+
+    # Deteksi area dengan warna yang sangat gelap (kemungkinan foto gelap)
+    if f.gray_below_50 > n_pixels * 0.4:
+        return True, "Gambar terlalu gelap. Pastikan gambar sampah terlihat jelas."
+
+    # Deteksi gambar dengan terlalu banyak warna (kemungkinan foto atau seni)
+    if f.color_std > 70:
+        if f.colorful_pixels > n_pixels * 0.25:
+            return True, "Gambar terdeteksi sebagai foto berwarna. Hanya upload gambar sampah."
+
+    # Terminal biasanya memiliki background gelap dengan teks terang
+    if f.gray_below_100 > n_pixels * 0.3 and f.gray_above_200 > n_pixels * 0.05:
+        return True, "Gambar terdeteksi sebagai screenshot terminal/console. Hanya upload gambar sampah."
+
+    # Screenshot terminal biasanya memiliki banyak garis horizontal
+    if f.h_edges_above_25 > n_pixels * 0.15:
+        return True, "Gambar terdeteksi memiliki pola teks seperti screenshot. Hanya upload gambar sampah."
+
+    # Terminal sering memiliki teks hijau atau kuning di background hitam
+    if f.green_pixels > n_pixels * 0.05:
+        return True, "Gambar terdeteksi memiliki teks hijau seperti terminal. Hanya upload gambar sampah."
+
+    if f.yellow_pixels > n_pixels * 0.05:
+        return True, "Gambar terdeteksi memiliki teks kuning seperti terminal. Hanya upload gambar sampah."
+
+    return False, ""
+
+
+# Validasi tambahan setelah prediksi (lebih longgar dari is_likely_not_waste)
+def looks_like_document(features):
+    """
+    Gambar dengan lebih dari 80% area putih dianggap dokumen/kertas
+    """
+    return features.gray_above_200 / features.n_pixels > 0.8
+
+
+# --- ATURAN DETEKSI (BATCH) ---
+# Aturan yang sama dengan fungsi di atas, dalam urutan yang sama, sebagai daftar (kondisi array, pesan).
+# np.select memilih kondisi pertama yang benar per gambar, setara dengan early return.
+
+def _face_rules(f):
+    skin_ratio = f.skin_pixels / f.n_pixels
+    white_ratio = f.white_pixels / f.n_pixels
+    black_ratio = f.black_pixels / f.n_pixels
+    dark_ratio = f.gray_below_80 / f.n_pixels
+    rules = [
+        ((white_ratio > 0.2) & (black_ratio > 0.05),
+         "Gambar terdeteksi mengandung topeng atau benda yang menutupi wajah. Hanya upload gambar sampah."),
+        (skin_ratio > 0.25, "Gambar terdeteksi mengandung wajah/orang. Hanya upload gambar sampah."),
+        ((skin_ratio > 0.1) & (dark_ratio > 0.15), "Gambar terdeteksi mengandung wajah/orang. Hanya upload gambar sampah."),
+    ]
+    if f.symmetry_diff is not None:
+        rules.append(((f.symmetry_diff < 25) & (skin_ratio > 0.05),
+                      "Gambar terdeteksi memiliki pola simetris seperti wajah. Hanya upload gambar sampah."))
+    if f.gradient_mean is not None:
+        oval = f.gradient_above_30 > (f.height * f.width * 0.08)
+        rules += [
+            (oval & (skin_ratio > 0.05), "Gambar terdeteksi mengandung bentuk kepala/wajah. Hanya upload gambar sampah."),
+            (oval & (white_ratio > 0.15),
+             "Gambar terdeteksi mengandung topeng atau benda oval putih. Hanya upload gambar sampah."),
+            ((f.gradient_mean < 20) & (white_ratio > 0.1),
+             "Gambar terdeteksi sebagai foto blur/selfie. Hanya upload gambar sampah."),
+            ((f.gradient_std > 25) & (white_ratio > 0.1),
+             "Gambar terdeteksi sebagai foto dengan gerakan/selfie. Hanya upload gambar sampah."),
+        ]
+    return rules
+
+
+def _not_waste_rules(f):
+    return [
+        (f.gray_above_200 > f.height * f.width * 0.7,
+         "Gambar terlalu banyak area putih. Kemungkinan dokumen atau kertas."),
+        ((f.h_edges_above_40 > f.height * 0.5) | (f.v_edges_above_40 > f.width * 0.5),
+         "Gambar terdeteksi memiliki pola grid/tabel. Hanya upload gambar sampah."),
+    ]
+
+
+def _non_waste_rules(f):
+    n_pixels = f.height * f.width
+    return _face_rules(f) + _not_waste_rules(f) + [
+        (f.gray_above_240 > n_pixels * 0.3,
+         "Gambar terdeteksi sebagai screenshot atau interface. Hanya upload gambar sampah."),
+        (f.gray_below_50 > n_pixels * 0.4, "Gambar terlalu gelap. Pastikan gambar sampah terlihat jelas."),
+        ((f.color_std > 70) & (f.colorful_pixels > n_pixels * 0.25),
+         "Gambar terdeteksi sebagai foto berwarna. Hanya upload gambar sampah."),
+        ((f.gray_below_100 > n_pixels * 0.3) & (f.gray_above_200 > n_pixels * 0.05),
+         "Gambar terdeteksi sebagai screenshot terminal/console. Hanya upload gambar sampah."),
+        (f.h_edges_above_25 > n_pixels * 0.15,
+         "Gambar terdeteksi memiliki pola teks seperti screenshot. Hanya upload gambar sampah."),
+        (f.green_pixels > n_pixels * 0.05,
+         "Gambar terdeteksi memiliki teks hijau seperti terminal. Hanya upload gambar sampah."),
+        (f.yellow_pixels > n_pixels * 0.05,
+         "Gambar terdeteksi memiliki teks kuning seperti terminal. Hanya upload gambar sampah."),
+    ]
+
+
+def _apply_rules(rules, n):
+    conditions = [np.broadcast_to(condition, (n,)) for condition, _ in rules]
+    messages = np.select(conditions, [message for _, message in rules], default="").astype(object)
+    return np.any(conditions, axis=0) if conditions else np.zeros(n, dtype=bool), messages
+
+
+def detect_face_batch(images, features=None):
+    """
+    detect_face_simple untuk tumpukan (N, H, W, 3): mengembalikan (verdict bool (N,), pesan (N,))
+    """
+    f = features if features is not None else extract_features_batch(images)
+    return _apply_rules(_face_rules(f), len(f))
+
+
+def detect_non_waste_batch(images, features=None):
+    """
+    detect_non_waste_image untuk tumpukan (N, H, W, 3): mengembalikan (verdict bool (N,), pesan (N,))
+    """
+    f = features if features is not None else extract_features_batch(images)
+    return _apply_rules(_non_waste_rules(f), len(f))
+
+
+def non_waste_rule_hits(features):
+    """
+    Semua aturan detect_non_waste_batch dan hasilnya per gambar: (daftar pesan (R,), kondisi bool (R, N)).
+    Berbeda dengan detect_non_waste_batch, aturan setelah aturan pertama yang cocok tetap dievaluasi
+    """
+    rules = _non_waste_rules(features)
+    n = len(features)
+    return [message for _, message in rules], np.array([np.broadcast_to(condition, (n,)) for condition, _ in rules])
@@ -0,0 +1,228 @@
+"""
+Riwayat prediksi persisten di SQLite (mode WAL), append-only.
+
+Baris baru ditampung lalu ditulis per batch dalam satu transaksi, bersama agregat per hari/label
+yang diperbarui secara inkremental, sehingga total dan ringkasan tidak perlu memindai seluruh tabel.
+Ekspor CSV/Parquet dibaca per chunk dari snapshot koneksi terpisah.
+
+Contoh:
+    python -m smartwaste.history export riwayat.csv
+    python -m smartwaste.history summary
+"""
+import argparse
+import atexit
+import csv
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_HISTORY_PATH = os.environ.get("SMARTWASTE_HISTORY_DB", "history.db")
+COLUMNS = ["Time", "Prediction", "Confidence", "Similar Distance"]
+EXPORT_CHUNK_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    label TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    similar_distance INTEGER
+);
+CREATE TABLE IF NOT EXISTS daily_counts (
+    day TEXT NOT NULL,
+    label TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (day, label)
+);
+"""
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # aman di WAL; commit tidak menunggu fsync per transaksi
+    return connection
+
+
+def _normalize_row(row):
+    t, label, confidence = row[:3]
+    similar = row[3] if len(row) > 3 else None
+    return str(t), str(label), float(confidence), None if similar is None else int(similar)
+
+
+class HistoryStore:
+    """
+    Penyimpanan riwayat yang dibagi semua sesi; aman dipakai dari banyak thread
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, flush_rows=256, flush_interval=1.0):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_since = 0.0
+        self._lock = threading.Lock()
+        self._connection = _connect(path)
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(predictions)")}
+            if "similar_distance" not in columns:  # database dari versi sebelumnya
+                self._connection.execute("ALTER TABLE predictions ADD COLUMN similar_distance INTEGER")
+        atexit.register(self.flush)
+
+    def append(self, rows):
+        """
+        Tambahkan baris (time "YYYY-mm-dd HH:MM:SS", label, confidence[, jarak foto serupa]); ditulis per batch.
+        Jarak diisi jika hasil dipakai ulang dari foto yang hampir sama (smartwaste.similarity), selain itu None.
+        """
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.extend(_normalize_row(row) for row in rows)
+            due = (len(self._pending) >= self.flush_rows
+                   or time.monotonic() - self._pending_since >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Tulis semua baris tertunda beserta agregatnya dalam satu transaksi
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            aggregates = {}
+            for t, label, confidence, _ in rows:
+                count, total = aggregates.get((t[:10], label), (0, 0.0))
+                aggregates[(t[:10], label)] = (count + 1, total + confidence)
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO predictions (time, label, confidence, similar_distance) VALUES (?, ?, ?, ?)", rows)
+                self._connection.executemany(
+                    "INSERT INTO daily_counts (day, label, count, confidence_sum) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (day, label) DO UPDATE SET count = count + excluded.count, "
+                    "confidence_sum = confidence_sum + excluded.confidence_sum",
+                    [(day, label, count, total) for (day, label), (count, total) in aggregates.items()])
+
+    def _query(self, sql, params=()):
+        self.flush()
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def count(self):
+        # Dari agregat: O(jumlah hari x label), bukan O(jumlah baris)
+        return self._query("SELECT COALESCE(SUM(count), 0) FROM daily_counts")[0][0]
+
+    def page(self, before_id=None, page_size=50):
+        """
+        Satu halaman (id, time, label, confidence, similar_distance), terbaru lebih dulu, dimulai dari baris
+        sebelum before_id (None = paling baru). Keyset lewat primary key: halaman jauh sama murahnya dengan
+        halaman pertama, tidak O(offset); id baris terakhir menjadi before_id halaman berikutnya.
+        """
+        if before_id is None:
+            return self._query("SELECT id, time, label, confidence, similar_distance FROM predictions "
+                               "ORDER BY id DESC LIMIT ?", (page_size,))
+        return self._query("SELECT id, time, label, confidence, similar_distance FROM predictions "
+                           "WHERE id < ? ORDER BY id DESC LIMIT ?", (before_id, page_size))
+
+    def daily_summary(self, days=30):
+        """
+        (hari, label, jumlah, rata-rata confidence) untuk hari-hari terakhir
+        """
+        return self._query(
+            "SELECT day, label, count, confidence_sum / count FROM daily_counts "
+            "WHERE day IN (SELECT DISTINCT day FROM daily_counts ORDER BY day DESC LIMIT ?) "
+            "ORDER BY day DESC, label",
+            (days,))
+
+    def label_totals(self):
+        return dict(self._query("SELECT label, SUM(count) FROM daily_counts GROUP BY label ORDER BY label"))
+
+    def iter_rows(self, chunk_size=EXPORT_CHUNK_ROWS):
+        """
+        Semua baris (terlama lebih dulu) per chunk dari koneksi baca sendiri,
+        sehingga ekspor panjang tidak menahan penulisan dari sesi lain
+        """
+        self.flush()
+        connection = _connect(self.path)
+        try:
+            cursor = connection.execute("SELECT time, label, confidence, similar_distance FROM predictions ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            connection.close()
+
+    def iter_csv(self, chunk_size=EXPORT_CHUNK_ROWS):
+        """
+        CSV sebagai potongan bytes UTF-8 (header di potongan pertama)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        for rows in self.iter_rows(chunk_size):
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def export_csv(self, fileobj, chunk_size=EXPORT_CHUNK_ROWS):
+        for chunk in self.iter_csv(chunk_size):
+            fileobj.write(chunk)
+
+    def export_parquet(self, where, chunk_size=EXPORT_CHUNK_ROWS):
+        """
+        Tulis Parquet ke path/file, satu row group per chunk (butuh pyarrow)
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([("Time", pa.string()), ("Prediction", pa.string()), ("Confidence", pa.float64()),
+                            ("Similar Distance", pa.int64())])
+        with pq.ParquetWriter(where, schema) as writer:
+            for rows in self.iter_rows(chunk_size):
+                writer.write_table(pa.table([list(column) for column in zip(*rows)], schema=schema))
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self._connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Riwayat prediksi SmartWaste")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH, help="File database riwayat")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Ekspor riwayat ke .csv atau .parquet")
+    export.add_argument("output")
+    commands.add_parser("summary", help="Ringkasan per hari dan label")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.db)
+    try:
+        if args.command == "export":
+            if args.output.lower().endswith(".parquet"):
+                store.export_parquet(args.output)
+            else:
+                with open(args.output, "wb") as f:
+                    store.export_csv(f)
+            print(f"{store.count()} baris diekspor ke {args.output}", file=sys.stderr)
+        else:
+            for day, label, count, confidence in store.daily_summary(days=3650):
+                print(f"{day}\t{label}\t{count}\t{confidence:.2f}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("smartwaste.inference")
+
+# --- KONFIGURASI MODEL DAN INPUT ---
+DEFAULT_MODEL_PATH = "model97.h5"
+CLASS_NAMES = ['Organik', 'Anorganik']
+IMG_SIZE = (50, 50)
+DEFAULT_BATCH_SIZE = 64
+CONFIDENCE_THRESHOLD = 60  # Di bawah ini (%) hasil dianggap tidak meyakinkan
+# Jumlah thread TensorFlow; 0 = biarkan TensorFlow memilih (semua core)
+TF_INTRA_OP_THREADS = int(os.environ.get("SMARTWASTE_TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.environ.get("SMARTWASTE_TF_INTER_OP_THREADS", "0"))
+
+
+def configure_tf_threads(intra_op=TF_INTRA_OP_THREADS, inter_op=TF_INTER_OP_THREADS):
+    """
+    Atur thread pool TensorFlow; hanya berlaku sebelum runtime TensorFlow pertama kali dipakai
+    """
+    import tensorflow as tf
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        logger.warning("Pengaturan thread TensorFlow diabaikan: %s", e)
+
+
+def load_keras_model(path=DEFAULT_MODEL_PATH):
+    """
+    Muat model Keras dari file H5; tensorflow baru diimpor di sini
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model tidak ditemukan: {path}")
+    import tensorflow as tf
+    configure_tf_threads()
+    return tf.keras.models.load_model(path)
+
+
+def preprocess_image(image, size=IMG_SIZE):
+    """
+    Ubah gambar PIL (RGB) menjadi tensor input model berukuran size (default 50x50) dengan nilai 0-1
+    """
+    img = image.resize(size)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def stack_images(images, size=IMG_SIZE):
+    """
+    Preprocess banyak gambar sekaligus menjadi satu tensor (N, 50, 50, 3)
+    """
+    if not images:
+        return np.empty((0, size[1], size[0], 3), dtype=np.float32)
+    return np.stack([preprocess_image(image, size) for image in images])
+
+
+def predict_batch(model, batch, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Jalankan prediksi pada tensor (N, 50, 50, 3) per potongan berukuran batch_size,
+    sehingga overhead model.predict hanya dibayar sekali per potongan, bukan per gambar
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size harus >= 1, bukan {batch_size}")
+    if len(batch) == 0:
+        return np.empty((0, 0), dtype=np.float32)
+
+    outputs = []
+    for start in range(0, len(batch), batch_size):
+        chunk = batch[start:start + batch_size]
+        outputs.append(np.asarray(model.predict(chunk, batch_size=len(chunk), verbose=0)))
+    return np.concatenate(outputs, axis=0)
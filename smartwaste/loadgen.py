@@ -0,0 +1,93 @@
+"""
+Generator beban sintetis untuk smartwaste.server.
+
+Contoh:
+    python -m smartwaste.loadgen --url http://127.0.0.1:8000 --requests 2000 --concurrency 64
+"""
+import argparse
+import io
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_images(count, size=(160, 120), seed=0):
+    """
+    Buat gambar JPEG acak bertekstur (warna kusam mirip sampah) tanpa dataset atau jaringan
+    """
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        base = np.array([90, 110, 60]) + rng.integers(-10, 10, 3)
+        noise = rng.integers(0, 40, (size[1], size[0], 3))
+        array = np.clip(base + noise, 0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(array).save(buffer, "JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def send(url, data, timeout=30.0):
+    """
+    Kirim satu gambar; kembalikan (kode status HTTP, latensi detik)
+    """
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/octet-stream"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0  # koneksi gagal / timeout
+    return status, time.perf_counter() - start
+
+
+def run_load(url, total, concurrency, images):
+    """
+    Jalankan total permintaan dengan concurrency thread dan ringkas hasilnya
+    """
+    predict_url = url.rstrip("/") + "/predict"
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda i: send(predict_url, images[i % len(images)]), range(total)))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    latencies = np.array([latency for status, latency in results if status == 200]) * 1000
+    summary = {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(statuses.get(200, 0) / elapsed, 1),
+        "statuses": dict(statuses),
+    }
+    if latencies.size:
+        summary.update({
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator beban sintetis untuk layanan HTTP SmartWaste")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--images", type=int, default=32, help="Jumlah gambar sintetis berbeda yang dipakai bergantian")
+    args = parser.parse_args(argv)
+
+    images = synthetic_images(args.images)
+    for key, value in run_load(args.url, args.requests, args.concurrency, images).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Uji beban aplikasi Streamlit: banyak sesi simulasi menjalankan alur klasifikasi secara bersamaan.
+
+Setiap sesi adalah satu AppTest di proses yang sama dengan st.cache_resource bersama (model, cache,
+thread pool), persis seperti sesi browser di satu server Streamlit. Sesi membuka halaman klasifikasi lalu
+mengunggah campuran gambar; waktu end-to-end tiap unggahan dicatat bersama RSS proses selama uji berjalan.
+
+Jenis gambar untuk --mix: waste (sampah sintetis), document (kertas bergaris, ditolak), noise (acak),
+large (foto 4000x3000) dan duplicate (gambar yang sama untuk semua sesi, mengenai cache prediksi).
+
+Contoh:
+    python -m smartwaste.loadtest --sessions 20 --concurrency 20 --images 8
+    python -m smartwaste.loadtest --sessions 40 --concurrency 10 --mix waste=6,document=2,duplicate=2 --output beban.json
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from smartwaste.bench import _rss_bytes
+from smartwaste.loadgen import synthetic_images
+
+DEFAULT_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+CLASSIFICATION_PAGE = "🗑️ Klasifikasi Sampah"
+IMAGE_KINDS = ("waste", "document", "noise", "large", "duplicate")
+DEFAULT_MIX = "waste=6,document=2,noise=1,duplicate=1"
+
+
+def parse_mix(text):
+    """
+    "waste=6,document=2" -> {"waste": 0.75, "document": 0.25}
+    """
+    weights = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in IMAGE_KINDS:
+            raise ValueError(f"Jenis gambar tidak dikenal: {kind} (pilih dari {', '.join(IMAGE_KINDS)})")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Bobot --mix harus > 0")
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+def _encode(array, format="PNG"):
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format, **({"quality": 90} if format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def make_image(kind, rng):
+    """
+    (nama file, bytes, mime) untuk satu gambar jenis kind; isi unik per rng kecuali duplicate
+    """
+    if kind == "waste":
+        data = synthetic_images(1, size=(640, 480), seed=int(rng.integers(1 << 31)))[0]
+        return "waste.jpg", data, "image/jpeg"
+    if kind == "document":
+        array = np.full((600, 800, 3), 245, np.uint8)
+        array[int(rng.integers(10)):: 24] = 40  # garis teks/tabel
+        return "document.png", _encode(array), "image/png"
+    if kind == "noise":
+        return "noise.png", _encode(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)), "image/png"
+    if kind == "large":
+        data = synthetic_images(1, size=(4000, 3000), seed=int(rng.integers(1 << 31)))[0]
+        return "large.jpg", data, "image/jpeg"
+    if kind == "duplicate":
+        return "duplicate.jpg", synthetic_images(1, size=(640, 480), seed=0)[0], "image/jpeg"
+    raise ValueError(f"Jenis gambar tidak dikenal: {kind}")
+
+
+def make_upload(mix, count, rng, prefix):
+    kinds = rng.choice(list(mix), size=count, p=list(mix.values()))
+    files = []
+    for i, kind in enumerate(kinds):
+        name, data, mime = make_image(kind, rng)
+        files.append((f"{prefix}_{i}_{name}", data, mime))
+    return files
+
+
+def _share_script_cache(log=sys.stderr):
+    """
+    Optimasi best-effort: semua sesi memakai satu ScriptCache seperti server Streamlit sungguhan.
+    AppTest membuat ScriptCache baru di setiap run, sehingga script di-compile ulang (ast.parse) secara paralel.
+    Atribut ini privat; jika tidak ada lagi (versi Streamlit lain), AppTest dibiarkan apa adanya.
+    """
+    try:
+        from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+        from streamlit.testing.v1 import local_script_runner
+    except ImportError:
+        ScriptCache = local_script_runner = None
+    if local_script_runner is None or not hasattr(local_script_runner, "ScriptCache"):
+        print("ScriptCache AppTest tidak bisa dibagi pada versi Streamlit ini; script di-compile per run", file=log)
+        return False
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+    return True
+
+
+class RssSampler:
+    """
+    Catat (detik sejak mulai, RSS MB) secara berkala di thread latar belakang
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            rss = _rss_bytes()
+            if rss is not None:
+                self.samples.append((round(time.perf_counter() - self._start, 3), rss / 1e6))
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+def run_session(index, app, mix, images, uploads, seed, bypass=False, timeout=300.0):
+    """
+    Satu sesi: buka halaman klasifikasi lalu unggah `uploads` kali; kembalikan catatan per unggahan
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng([seed, index])
+    records = []
+    start = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=timeout).run()
+    at.sidebar.selectbox[0].set_value(CLASSIFICATION_PAGE).run()
+    page_time = time.perf_counter() - start
+    if bypass:
+        next(box for box in at.checkbox if "Bypass" in box.label).check().run()
+    for upload in range(uploads):
+        files = make_upload(mix, images, rng, f"s{index}u{upload}")
+        started = time.perf_counter()
+        try:
+            at.file_uploader[0].set_value(files).run()
+            error = "; ".join(str(e.value) for e in at.exception) or None
+        except Exception as e:
+            error = str(e)
+        finished = time.perf_counter()
+        records.append({
+            "session": index,
+            "upload": upload,
+            "images": len(files),
+            "started": started,
+            "latency_s": finished - started,
+            "page_s": page_time,
+            "accepted": len(at.success),
+            "rejected": len(at.error),
+            "error": error,
+        })
+    return records
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def run_load(app=DEFAULT_APP, sessions=20, concurrency=20, images=8, uploads=1, mix=None, seed=0, bypass=False,
+             ramp=0.0, sample_interval=0.5, timeout=300.0, log=sys.stderr):
+    """
+    Jalankan semua sesi dengan paling banyak `concurrency` sesi aktif bersamaan dan ringkas hasilnya
+    """
+    mix = mix or parse_mix(DEFAULT_MIX)
+    _share_script_cache(log)
+    sampler = RssSampler(sample_interval)
+    start = time.perf_counter()
+
+    def session(index):
+        if ramp:
+            time.sleep(ramp * index / max(sessions, 1))  # mulai sesi tersebar selama ramp detik
+        records = run_session(index, app, mix, images, uploads, seed, bypass, timeout)
+        for record in records:
+            print(f"sesi {index} unggahan {record['upload']}: {record['latency_s']:.2f} s "
+                  f"({record['images']} gambar{', error: ' + record['error'] if record['error'] else ''})", file=log)
+        return records
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as executor:
+        records = [record for records in executor.map(session, range(sessions)) for record in records]
+    elapsed = time.perf_counter() - start
+    rss = sampler.stop()
+
+    latencies = [record["latency_s"] for record in records if not record["error"]]
+    page_times = sorted({(record["session"], record["page_s"]) for record in records})
+    total_images = sum(record["images"] for record in records if not record["error"])
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "images_per_upload": images,
+        "uploads_per_session": uploads,
+        "mix": mix,
+        "elapsed_s": elapsed,
+        "uploads": len(records),
+        "errors": sum(1 for record in records if record["error"]),
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0),
+        },
+        "page_load_p50_s": percentile([page for _, page in page_times], 50),
+        "throughput_images_per_s": total_images / elapsed if elapsed else 0.0,
+        "throughput_uploads_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "rss_mb": {
+            "start": rss[0][1] if rss else None,
+            "peak": max((mb for _, mb in rss), default=None),
+            "end": rss[-1][1] if rss else None,
+            "samples": rss,
+        },
+        "records": [{**record, "started": record["started"] - start} for record in records],
+    }
+
+
+def format_report(report):
+    latency = report["latency_s"]
+    rss = report["rss_mb"]
+    lines = [
+        f"{report['sessions']} sesi ({report['concurrency']} bersamaan) · {report['uploads']} unggahan x "
+        f"{report['images_per_upload']} gambar · {report['errors']} error · {report['elapsed_s']:.1f} s",
+        f"Latensi unggahan: p50 {latency['p50']:.2f} s, p90 {latency['p90']:.2f} s, p99 {latency['p99']:.2f} s, "
+        f"maks {latency['max']:.2f} s (buka halaman p50 {report['page_load_p50_s']:.2f} s)",
+        f"Throughput: {report['throughput_images_per_s']:.1f} gambar/detik, {report['throughput_uploads_per_s']:.2f} unggahan/detik",
+    ]
+    if rss["samples"]:
+        lines.append(f"RSS: awal {rss['start']:.0f} MB, puncak {rss['peak']:.0f} MB, akhir {rss['end']:.0f} MB")
+        # Ringkasan RSS dari waktu ke waktu: paling banyak 10 titik
+        step = max(1, len(rss["samples"]) // 10)
+        lines.append("RSS per waktu: " + ", ".join(f"{t:.0f}s {mb:.0f}MB" for t, mb in rss["samples"][::step]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban sesi bersamaan aplikasi Streamlit SmartWaste")
+    parser.add_argument("--app", default=DEFAULT_APP, help="Path script Streamlit")
+    parser.add_argument("--sessions", type=int, default=20, help="Jumlah sesi simulasi")
+    parser.add_argument("--concurrency", type=int, default=20, help="Jumlah sesi yang aktif bersamaan")
+    parser.add_argument("--images", type=int, default=8, help="Jumlah gambar per unggahan")
+    parser.add_argument("--uploads", type=int, default=1, help="Jumlah unggahan per sesi")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Bobot jenis gambar, jenis: {', '.join(IMAGE_KINDS)}")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Sebar mulai sesi selama sekian detik")
+    parser.add_argument("--bypass", action="store_true", help="Centang Bypass Validasi di setiap sesi")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Interval pencatatan RSS (detik)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Batas waktu satu run script (detik)")
+    parser.add_argument("--history-db", default=None,
+                        help="Database riwayat untuk uji (default: file sementara, riwayat asli tidak tersentuh)")
+    parser.add_argument("--output", default=None, help="Simpan laporan lengkap (termasuk per unggahan dan RSS) sebagai JSON")
+    args = parser.parse_args(argv)
+
+    if min(args.sessions, args.concurrency, args.images, args.uploads) < 1:
+        parser.error("--sessions, --concurrency, --images dan --uploads harus >= 1")
+    if not os.path.exists(args.app):
+        parser.error(f"Script tidak ditemukan: {args.app}")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SMARTWASTE_HISTORY_DB"] = args.history_db or os.path.join(tmp, "history.db")
+        # AppTest.from_file mengartikan path relatif dari modul pemanggil, bukan dari direktori kerja
+        report = run_load(os.path.abspath(args.app), args.sessions, args.concurrency, args.images, args.uploads, mix,
+                          args.seed, args.bypass, args.ramp, args.sample_interval, args.timeout)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Metrik latensi per tahap (decode, fitur, aturan, predict, render) yang disimpan di dalam proses.
+
+Setiap tahap punya histogram: count dan sum sejak start, plus p50/p95/p99 dari jendela sampel terakhir.
+Metrik bisa diekspor sebagai teks Prometheus (start_metrics_server) atau baris JSON (start_json_log).
+Jika registry dinonaktifkan, timer() mengembalikan context kosong sehingga overhead hampir nol.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("smartwaste.metrics")
+
+QUANTILES = (0.5, 0.95, 0.99)
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """
+    Ringkasan latensi satu tahap: count/sum kumulatif dan kuantil dari window sampel terakhir
+    """
+
+    def __init__(self, window=2048):
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            self._samples.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self.count, self.sum
+        result = {"count": count, "sum": total}
+        for q in QUANTILES:
+            result[f"p{round(q * 100)}"] = samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+        return result
+
+
+class _Timer:
+    __slots__ = ("_registry", "_stage", "_record", "_start")
+
+    def __init__(self, registry, stage, record):
+        self._registry = registry
+        self._stage = stage
+        self._record = record
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        if self._registry.enabled:
+            self._registry.observe(self._stage, elapsed)
+        if self._record is not None:
+            self._record[self._stage] = self._record.get(self._stage, 0.0) + elapsed
+
+
+class MetricsRegistry:
+    """
+    Kumpulan histogram per tahap; aman dipakai dari banyak thread/sesi
+    """
+
+    def __init__(self, enabled=True, window=2048, prefix="smartwaste"):
+        self.enabled = enabled
+        self.window = window
+        self.prefix = prefix
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.window))
+        return histogram
+
+    def observe(self, stage, seconds):
+        if self.enabled:
+            self.histogram(stage).observe(seconds)
+
+    def timer(self, stage, record=None):
+        """
+        Context manager pengukur waktu tahap; record (dict) opsional menampung rincian per gambar
+        """
+        if not self.enabled and record is None:
+            return _DISABLED
+        return _Timer(self, stage, record)
+
+    def snapshot(self):
+        with self._lock:
+            stages = sorted(self._histograms.items())
+        return {stage: histogram.snapshot() for stage, histogram in stages}
+
+    def render_prometheus(self):
+        """
+        Format teks eksposisi Prometheus (tipe summary, satuan detik)
+        """
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Latensi per tahap pipeline klasifikasi", f"# TYPE {name} summary"]
+        for stage, values in self.snapshot().items():
+            for q in QUANTILES:
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {values[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {values["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {values["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(registry, port, host="127.0.0.1"):
+    """
+    Layani /metrics (teks Prometheus) dan /metrics.json di thread latar belakang
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.render_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(registry.snapshot()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # jangan penuhi log aplikasi dengan setiap scrape
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrik tersedia di http://%s:%d/metrics", host, server.server_port)
+    return server
+
+
+def start_json_log(registry, path, interval=60.0):
+    """
+    Tambahkan snapshot metrik sebagai satu baris JSON ke path setiap interval detik
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            line = json.dumps({"time": time.time(), "stages": registry.snapshot()})
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    threading.Thread(target=run, name="metrics-json", daemon=True).start()
+    return stop
@@ -0,0 +1,44 @@
+from collections import deque
+
+
+class OrderedResults:
+    """
+    Jalankan fn(item) di executor dengan jumlah tugas terbatas; hasil diambil sesuai urutan input.
+    ready() memberi tahu apakah hasil berikutnya sudah selesai tanpa menunggu,
+    sehingga pemanggil bisa memutuskan kapan mengumpulkan batch dan kapan merender.
+    """
+
+    def __init__(self, executor, fn, items, window=32):
+        self._executor = executor
+        self._fn = fn
+        self._items = iter(items)
+        self._window = window
+        self._pending = deque()
+        self._fill()
+
+    def _fill(self):
+        while len(self._pending) < self._window:
+            try:
+                item = next(self._items)
+            except StopIteration:
+                return
+            self._pending.append(self._executor.submit(self._fn, item))
+
+    def __bool__(self):
+        return bool(self._pending)
+
+    def ready(self):
+        return bool(self._pending) and self._pending[0].done()
+
+    def next(self):
+        """
+        Hasil berikutnya (menunggu jika belum selesai); error dari fn dilempar ulang di sini
+        """
+        future = self._pending.popleft()
+        self._fill()
+        return future.result()
+
+    def cancel(self):
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
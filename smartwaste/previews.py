@@ -0,0 +1,98 @@
+"""
+Preview terkompresi (WebP, atau JPEG jika Pillow tanpa WebP) untuk ditampilkan di browser.
+
+Gambar hasil klasifikasi dan aset statis dikirim sebagai bytes kecil yang dibuat sekali per isi file,
+bukan gambar PIL penuh yang di-encode ulang ke PNG oleh st.image di setiap rerun.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, features
+
+PREVIEW_SIZE = 320  # Sisi terpanjang preview di grid hasil (piksel)
+PREVIEW_QUALITY = 70
+PREVIEW_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+PREVIEW_MIME = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+def encode_preview(image, size=PREVIEW_SIZE, quality=PREVIEW_QUALITY, format=PREVIEW_FORMAT):
+    """
+    Perkecil gambar PIL (sisi terpanjang <= size) dan encode sebagai WebP/JPEG; gambar asli tidak diubah
+    """
+    preview = image.copy() if max(image.size) > size else image
+    preview.thumbnail((size, size), Image.Resampling.BILINEAR)
+    if preview.mode not in ("RGB", "RGBA"):
+        alpha = "A" in preview.mode or "transparency" in preview.info
+        preview = preview.convert("RGBA" if alpha and format != "JPEG" else "RGB")
+    elif format == "JPEG" and preview.mode == "RGBA":
+        preview = preview.convert("RGB")  # JPEG tanpa kanal alpha
+    buffer = io.BytesIO()
+    if format == "WEBP":
+        preview.save(buffer, format, quality=quality, method=2)  # method 2: ~2x lebih cepat dari default, ukuran hampir sama
+    else:
+        preview.save(buffer, format, quality=quality)
+    return buffer.getvalue()
+
+
+def asset_preview(path, width, quality=80, format=PREVIEW_FORMAT):
+    """
+    Aset statis (logo, infografis) diperkecil ke 2x lebar tampilan agar tetap tajam di layar rapat piksel
+    """
+    with Image.open(path) as img:
+        img.load()
+        return encode_preview(img, size=2 * width, quality=quality, format=format)
+
+
+class PreviewCache:
+    """
+    Cache LRU thread-safe berisi bytes preview per kunci isi file, dibatasi total ukuran byte
+    """
+
+    def __init__(self, max_bytes=64 << 20, size=PREVIEW_SIZE, quality=PREVIEW_QUALITY, format=PREVIEW_FORMAT):
+        self.max_bytes = max_bytes
+        self.size = size
+        self.quality = quality
+        self.format = format
+        self.mime = PREVIEW_MIME[format]
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, key):
+        """
+        Preview yang sudah ada untuk kunci ini, atau None (tanpa encode)
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def get(self, key, image):
+        """
+        Preview untuk kunci ini; dibuat dari image jika belum ada (encode di luar lock)
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = encode_preview(image, self.size, self.quality, self.format)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._bytes += len(data)
+                while self._bytes > self.max_bytes and len(self._entries) > 1:
+                    _, oldest = self._entries.popitem(last=False)
+                    self._bytes -= len(oldest)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,320 @@
+"""
+Registry model: beberapa revisi model, masing-masing dengan path, nama kelas, ukuran input dan preprocessing.
+
+Model baru dimuat saat pertama dipakai lalu tetap di memori selama total perkiraan ukurannya masih di bawah
+anggaran; jika terlampaui, model yang paling lama tidak dipakai dilepas (LRU). ShadowRunner menjalankan model
+kandidat pada batch yang sama di thread terpisah dan mencatat tingkat kesepakatan dengan model utama.
+
+Contoh registry (JSON, dibaca oleh ModelRegistry.from_file):
+    {"models": [
+        {"name": "model97", "path": "model97.h5"},
+        {"name": "model98", "path": "models/model98.tflite", "class_names": ["Organik", "Anorganik"],
+         "input_size": [64, 64], "preprocessing": "centered"}
+    ]}
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, fields
+from typing import Optional, Tuple
+
+import numpy as np
+
+from smartwaste.artifacts import ArtifactStore, backend_for_path
+from smartwaste.inference import CLASS_NAMES, IMG_SIZE, predict_batch, stack_images
+from smartwaste.workers import load_inference_model
+
+logger = logging.getLogger("smartwaste.registry")
+
+DEFAULT_MEMORY_BUDGET_MB = 1024  # Total perkiraan ukuran model yang boleh tetap dimuat
+SHADOW_QUEUE_SIZE = 4  # Batch shadow yang boleh menunggu; selebihnya dilewati agar pengguna tidak ikut menunggu
+
+# Skala input setelah stack_images (nilai 0-1)
+PREPROCESSING = {
+    "rescale": lambda batch: batch,  # 0-1 (model97)
+    "centered": lambda batch: batch * 2.0 - 1.0,  # -1..1 (mis. MobileNet)
+    "raw": lambda batch: batch * 255.0,  # 0-255, normalisasi di dalam model
+}
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+    Satu entri registry; version dipakai jika path tidak ada (diunduh lewat ArtifactStore)
+    """
+    name: str
+    path: str
+    backend: Optional[str] = None  # None = dari ekstensi file
+    class_names: Tuple[str, ...] = tuple(CLASS_NAMES)
+    input_size: Tuple[int, int] = IMG_SIZE  # (lebar, tinggi)
+    preprocessing: str = "rescale"
+    version: Optional[str] = None
+    memory_mb: Optional[float] = None  # None = perkiraan dari jumlah parameter / ukuran file
+    workers: int = 0  # Proses inferensi dengan bobot bersama (smartwaste.workers); 0 = predict di proses ini
+
+    def __post_init__(self):
+        if self.preprocessing not in PREPROCESSING:
+            raise ValueError(f"Preprocessing tidak dikenal: {self.preprocessing} (pilih salah satu dari {', '.join(PREPROCESSING)})")
+        object.__setattr__(self, "class_names", tuple(self.class_names))
+        object.__setattr__(self, "input_size", tuple(self.input_size))
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {field.name for field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Kolom registry tidak dikenal untuk {data.get('name')}: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+
+class LoadedModel:
+    """
+    Model yang sudah dimuat beserta spesifikasinya; predict() sama seperti backend sehingga bisa dipakai predict_batch
+    """
+
+    def __init__(self, spec, model, path):
+        self.spec = spec
+        self.model = model
+        self.path = path
+        model_stat = os.stat(path)
+        # Identitas untuk kunci cache: hasil lama tidak terpakai jika file model diganti
+        self.identity = f"{os.path.abspath(path)}:{model_stat.st_size}:{model_stat.st_mtime_ns}"
+        self.nbytes = int(spec.memory_mb * 2**20) if spec.memory_mb else _estimate_bytes(model, path)
+
+    @property
+    def class_names(self):
+        return self.spec.class_names
+
+    def preprocess(self, images):
+        """
+        Gambar PIL -> tensor input sesuai ukuran dan skala model ini
+        """
+        return PREPROCESSING[self.spec.preprocessing](stack_images(images, self.spec.input_size))
+
+    def same_input(self, other):
+        """
+        True jika batch hasil preprocess model lain bisa langsung dipakai model ini
+        """
+        return (self.spec.input_size, self.spec.preprocessing) == (other.input_size, other.preprocessing)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return self.model.predict(batch, batch_size=batch_size, verbose=verbose)
+
+    def warmup(self):
+        # Trace semua bucket jalur terkompilasi (jika ada) dan prediksi dummy seukuran input model ini
+        if hasattr(self.model, "warmup"):
+            self.model.warmup()
+        width, height = self.spec.input_size
+        predict_batch(self.model, np.zeros((1, height, width, 3), dtype=np.float32), batch_size=1)
+
+
+def _estimate_bytes(model, path):
+    # Bobot float32 dari jumlah parameter (Keras); backend lain memetakan file model apa adanya
+    inner = getattr(model, "model", model)
+    size = os.path.getsize(path)
+    if hasattr(inner, "count_params"):
+        return max(size, inner.count_params() * 4)
+    return size
+
+
+class ModelRegistry:
+    """
+    Daftar model yang dimuat saat pertama dipakai dan dilepas secara LRU jika melebihi anggaran memori
+    """
+
+    def __init__(self, specs=(), memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, store=None):
+        self.memory_budget = int(memory_budget_mb * 2**20)
+        self.store = store
+        self.loads = 0
+        self.evictions = 0
+        self._specs = OrderedDict()
+        self._resident = OrderedDict()  # nama -> LoadedModel, urut dari yang paling lama tidak dipakai
+        self._loading = {}  # nama -> lock, agar satu model tidak dimuat dua kali bersamaan
+        self._lock = threading.Lock()
+        for spec in specs:
+            self.register(spec)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([ModelSpec.from_dict(entry) for entry in data["models"]], **kwargs)
+
+    def register(self, spec):
+        with self._lock:
+            if spec.name in self._specs:
+                raise ValueError(f"Model sudah terdaftar: {spec.name}")
+            self._specs[spec.name] = spec
+
+    def names(self):
+        return list(self._specs)
+
+    def spec(self, name):
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise KeyError(f"Model tidak terdaftar: {name} (tersedia: {', '.join(self._specs)})") from None
+
+    def resolve_path(self, spec):
+        """
+        Path lokal model; jika tidak ada, versi di artifact store diunduh (sekali, atomik)
+        """
+        if os.path.exists(spec.path) or not spec.version:
+            if not os.path.exists(spec.path):
+                raise FileNotFoundError(f"Model tidak ditemukan: {spec.path}")
+            return spec.path
+        return (self.store or ArtifactStore()).resolve(spec.version)
+
+    def get(self, name):
+        """
+        Model siap pakai; dimuat dan di-warm-up saat pertama diminta (di luar lock registry)
+        """
+        spec = self.spec(name)
+        with self._lock:
+            loaded = self._resident.get(name)
+            if loaded is not None:
+                self._resident.move_to_end(name)
+                return loaded
+            loading = self._loading.setdefault(name, threading.Lock())
+        with loading:
+            with self._lock:
+                loaded = self._resident.get(name)
+                if loaded is not None:
+                    self._resident.move_to_end(name)
+                    return loaded
+            start = time.perf_counter()
+            path = self.resolve_path(spec)
+            backend = spec.backend if path == spec.path and spec.backend else backend_for_path(path)
+            model = load_inference_model(backend, path, spec.workers, input_size=spec.input_size)
+            loaded = LoadedModel(spec, model, path)
+            loaded.warmup()
+            logger.info("Model %s dimuat dalam %.2f s (± %.1f MB)", name, time.perf_counter() - start, loaded.nbytes / 2**20)
+            with self._lock:
+                self._resident[name] = loaded
+                self.loads += 1
+                self._evict(keep=name)
+            return loaded
+
+    def _evict(self, keep):
+        # Pemanggil yang masih memegang model yang dilepas tetap bisa memakainya sampai selesai
+        while self._resident_bytes() > self.memory_budget and len(self._resident) > 1:
+            name = next(iter(self._resident))
+            if name == keep:
+                self._resident.move_to_end(name)
+                continue
+            del self._resident[name]
+            self.evictions += 1
+            logger.info("Model %s dilepas dari memori (anggaran %.0f MB)", name, self.memory_budget / 2**20)
+
+    def _resident_bytes(self):
+        return sum(loaded.nbytes for loaded in self._resident.values())
+
+    def stats(self):
+        """
+        Statistik registry untuk ditampilkan di debug mode
+        """
+        with self._lock:
+            return {
+                "resident": {name: loaded.nbytes / 2**20 for name, loaded in self._resident.items()},
+                "resident_mb": self._resident_bytes() / 2**20,
+                "budget_mb": self.memory_budget / 2**20,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+# --- SHADOW MODE ---
+
+class ShadowRunner:
+    """
+    Jalankan model kandidat pada batch yang sudah dipreprocess untuk model utama, di thread latar belakang.
+    submit() tidak pernah menunggu: jika antrean penuh batch dilewati dan dihitung sebagai dropped.
+    """
+
+    def __init__(self, registry, candidate, max_pending=SHADOW_QUEUE_SIZE, metrics=None):
+        self.registry = registry
+        self.candidate = candidate
+        self.candidate_spec = registry.spec(candidate)
+        self.metrics = metrics
+        self.batches = 0
+        self.total = 0
+        self.agree = 0
+        self.dropped = 0
+        self.errors = 0
+        self.confidence_diff = 0.0  # jumlah |confidence utama - kandidat| (0-1)
+        self.confusion = Counter()  # (label utama, label kandidat) -> jumlah
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="shadow-model", daemon=True)
+        self._thread.start()
+
+    def submit(self, primary, images, batch, predictions):
+        """
+        Antrekan satu batch; gambar hanya disimpan jika kandidat butuh ukuran/skala input lain
+        """
+        if primary.spec.name == self.candidate:
+            return False
+        reuse = primary.same_input(self.candidate_spec)
+        item = (primary.class_names, None if reuse else list(images), batch if reuse else None, np.asarray(predictions))
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            primary_names, images, batch, primary_predictions = self._queue.get()
+            try:
+                candidate = self.registry.get(self.candidate)
+                if batch is None:
+                    batch = candidate.preprocess(images)
+                start = time.perf_counter()
+                predictions = predict_batch(candidate, batch, batch_size=max(1, len(batch)))
+                if self.metrics is not None:
+                    self.metrics.observe("shadow_predict", time.perf_counter() - start)
+                self._record(primary_names, primary_predictions, candidate.class_names, predictions)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning("Shadow model %s gagal: %s", self.candidate, e)
+            finally:
+                self._queue.task_done()
+
+    def _record(self, primary_names, primary_predictions, candidate_names, predictions):
+        # Dibandingkan per nama kelas, karena urutan kelas kedua model bisa berbeda
+        primary_labels = [primary_names[i] for i in np.argmax(primary_predictions, axis=1)]
+        candidate_labels = [candidate_names[i] for i in np.argmax(predictions, axis=1)]
+        diff = np.abs(np.max(primary_predictions, axis=1) - np.max(predictions, axis=1))
+        with self._lock:
+            self.batches += 1
+            self.total += len(primary_labels)
+            self.confidence_diff += float(np.sum(diff))
+            for primary_label, candidate_label in zip(primary_labels, candidate_labels):
+                self.agree += primary_label == candidate_label
+                self.confusion[(primary_label, candidate_label)] += 1
+
+    def join(self):
+        """
+        Tunggu sampai semua batch di antrean selesai (untuk CLI/pengujian)
+        """
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "candidate": self.candidate,
+                "batches": self.batches,
+                "images": self.total,
+                "agreement": self.agree / self.total if self.total else 0.0,
+                "mean_confidence_diff": self.confidence_diff / self.total if self.total else 0.0,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "confusion": {f"{a} -> {b}": count for (a, b), count in sorted(self.confusion.items())},
+            }
@@ -0,0 +1,251 @@
+"""
+Layanan HTTP untuk klasifikasi sampah dengan micro-batching dinamis.
+
+Permintaan yang datang bersamaan dikumpulkan dalam antrean asyncio lalu diprediksi
+dalam satu panggilan model per batch (dipicu oleh max-batch-size atau max-wait-ms).
+
+Contoh:
+    python -m smartwaste.server --port 8000 --max-batch-size 64 --max-wait-ms 5
+    curl --data-binary @sampah.jpg http://localhost:8000/predict
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from smartwaste.backends import BACKENDS
+from smartwaste.decode import decode_image
+from smartwaste.heuristics import detect_non_waste_image, extract_features, looks_like_document
+from smartwaste.inference import CLASS_NAMES, CONFIDENCE_THRESHOLD, predict_batch, preprocess_image
+from smartwaste.metrics import MetricsRegistry
+from smartwaste.workers import load_inference_model
+
+
+class QueueFullError(Exception):
+    """
+    Antrean prediksi penuh; klien sebaiknya mencoba lagi nanti (HTTP 429)
+    """
+
+
+class MicroBatcher:
+    """
+    Kumpulkan tensor dari banyak permintaan dan jalankan satu predict per batch
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait_ms=5.0, max_queue=1024, concurrency=1):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._inflight = set()
+        # Thread khusus sehingga event loop tidak terblokir; satu thread = model tidak dipanggil bersamaan.
+        # Lebih dari satu hanya untuk model yang aman dipanggil paralel (InferencePool)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="predict")
+
+    @property
+    def queue_size(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def predict(self, tensor):
+        """
+        Masukkan satu tensor (50, 50, 3) ke antrean dan tunggu vektor prediksinya
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((tensor, future))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Antrean prediksi penuh ({self.max_queue})")
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Batch berikutnya baru dikumpulkan jika ada slot predict kosong, sehingga batch terus terisi selama menunggu
+            await self._slots.acquire()
+            batch = await self._collect()
+            batch = [(tensor, future) for tensor, future in batch if not future.cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = loop.create_task(self._predict(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _predict(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            tensors = np.stack([tensor for tensor, _ in batch])
+            predictions = await loop.run_in_executor(
+                self._executor, predict_batch, self.model, tensors, self.max_batch_size)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+
+def decode_and_validate(data, validate=True):
+    """
+    Decode bytes gambar, jalankan aturan non-sampah, dan siapkan tensor input model
+    """
+    image = decode_image(data)
+    features = extract_features(image)
+    if validate:
+        is_not_waste, message = detect_non_waste_image(image, features)
+        if is_not_waste:
+            return None, message, False
+    return preprocess_image(image), "", looks_like_document(features)
+
+
+def create_app(model, max_batch_size=64, max_wait_ms=5.0, max_queue=1024, metrics=None, concurrency=1):
+    """
+    Buat aplikasi Starlette dengan endpoint /predict, /health dan /metrics
+    """
+    batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, max_queue=max_queue,
+                           concurrency=concurrency)
+    metrics = metrics or MetricsRegistry()
+    started_at = time.time()
+
+    async def predict(request):
+        data = await request.body()
+        if not data:
+            return JSONResponse({"error": "Body kosong: kirim bytes gambar (jpg/png)"}, status_code=400)
+        validate = request.query_params.get("validate", "1") not in ("0", "false")
+
+        loop = asyncio.get_running_loop()
+        try:
+            with metrics.timer("decode_validate"):
+                tensor, message, document_like = await loop.run_in_executor(None, decode_and_validate, data, validate)
+        except Exception as e:
+            return JSONResponse({"error": f"Gambar tidak dapat dibaca: {e}"}, status_code=400)
+        if tensor is None:
+            return JSONResponse({"status": "rejected", "message": message})
+
+        try:
+            with metrics.timer("predict"):  # termasuk waktu tunggu di antrean batch
+                prediction = await batcher.predict(tensor)
+        except QueueFullError as e:
+            return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "1"})
+
+        label = CLASS_NAMES[int(np.argmax(prediction))]
+        confidence = float(np.max(prediction)) * 100
+        if confidence < CONFIDENCE_THRESHOLD:
+            status, message = "low_confidence", "Tingkat kepercayaan rendah"
+        elif document_like:
+            status, message = "rejected", "Gambar terdeteksi sebagai dokumen/kertas."
+        else:
+            status, message = "ok", ""
+        return JSONResponse({
+            "status": status,
+            "label": label,
+            "confidence": round(confidence, 2),
+            "probabilities": {name: float(p) for name, p in zip(CLASS_NAMES, prediction)},
+            "message": message,
+        })
+
+    async def health(request):
+        return JSONResponse({
+            "status": "ok",
+            "uptime": round(time.time() - started_at, 1),
+            "queue": batcher.queue_size,
+            "max_queue": batcher.max_queue,
+            "batches": batcher.batches,
+            "predictions": batcher.items,
+            "avg_batch_size": round(batcher.items / batcher.batches, 2) if batcher.batches else 0.0,
+        })
+
+    async def metrics_text(request):
+        return PlainTextResponse(metrics.render_prometheus())
+
+    @asynccontextmanager
+    async def lifespan(app):
+        batcher.start()
+        yield
+        await batcher.stop()
+
+    app = Starlette(routes=[
+        Route("/predict", predict, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics_text, methods=["GET"]),
+    ], lifespan=lifespan)
+    app.state.batcher = batcher
+    app.state.metrics = metrics
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan HTTP klasifikasi sampah SmartWaste")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--backend", choices=BACKENDS, default="keras", help="Backend inferensi")
+    parser.add_argument("--model", default=None, help="Path model (default: model97.h5/.tflite/.npz sesuai backend)")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Ukuran batch maksimum per predict")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Waktu tunggu maksimum untuk mengisi batch")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Panjang antrean sebelum membalas 429")
+    parser.add_argument("--inference-workers", type=int, default=0,
+                        help="Jumlah proses inferensi dengan bobot bersama (0 = predict di proses ini)")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    # Dengan pool proses, beberapa batch diprediksi bersamaan (satu per worker)
+    model = load_inference_model(args.backend, args.model, args.inference_workers, args.max_batch_size)
+    app = create_app(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, max_queue=args.max_queue,
+                     concurrency=max(1, args.inference_workers))
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Indeks kemiripan gambar (dHash 64-bit + warna rata-rata) untuk memakai ulang hasil foto yang hampir sama.
+
+Foto yang sama dari sudut sedikit berbeda atau hasil kompresi ulang punya isi byte berbeda sehingga lolos
+dari cache berbasis hash isi, tetapi dHash-nya hanya berbeda beberapa bit. Pencarian memakai multi-index
+hashing: hash dipecah menjadi 4 potongan 16-bit, dan menurut prinsip pigeonhole setiap hash dalam jarak
+Hamming r punya setidaknya satu potongan yang berjarak <= r // 4. Tiap potongan disimpan sebagai array
+terurut sehingga kandidat dicari dengan searchsorted, lalu diverifikasi dengan jarak penuh dan warna.
+
+Entri disimpan di SQLite (tabel image_hashes, per identitas model) dan dimuat kembali saat start.
+"""
+import atexit
+import sqlite3
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+DEFAULT_MAX_DISTANCE = 6  # Bit dHash yang boleh berbeda
+DEFAULT_MAX_COLOR_DIFF = 12  # Selisih maksimum warna rata-rata per kanal (0-255); dHash hanya melihat grayscale
+MERGE_ROWS = 4096  # Entri baru diverifikasi linear sampai sebanyak ini, lalu disisipkan ke array terurut
+LOAD_CHUNK_ROWS = 50000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_hashes (
+    id INTEGER PRIMARY KEY,
+    model TEXT NOT NULL,
+    hash INTEGER NOT NULL,
+    color INTEGER NOT NULL,
+    rejected INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    document_like INTEGER NOT NULL,
+    prediction BLOB
+);
+CREATE INDEX IF NOT EXISTS image_hashes_model ON image_hashes (model, id);
+"""
+
+
+class Signature(NamedTuple):
+    hash: int  # dHash 64-bit tak bertanda
+    color: tuple  # (r, g, b) rata-rata
+
+
+class SimilarMatch(NamedTuple):
+    distance: int
+    rejected: bool
+    message: str
+    document_like: bool
+    prediction: Optional[np.ndarray]  # None jika gambar ditolak validasi
+
+
+def image_signature(image):
+    """
+    dHash 64-bit (gradien horizontal thumbnail grayscale 9x8) dan warna rata-rata gambar PIL RGB
+    """
+    small = image.resize((9, 8), Image.Resampling.BOX)
+    color = tuple(int(v) for v in np.asarray(small, dtype=np.float32).reshape(-1, 3).mean(axis=0).round())
+    gray = np.asarray(small.convert("L"), dtype=np.int16)
+    bits = np.packbits(gray[:, 1:] > gray[:, :-1])
+    return Signature(int.from_bytes(bits.tobytes(), "big"), color)
+
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(values):
+        return np.bitwise_count(values)
+else:  # NumPy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _BYTE_COUNTS[values.view(np.uint8).reshape(len(values), -1)].sum(axis=1)
+
+
+@lru_cache(maxsize=None)
+def _chunk_masks(radius):
+    """
+    Semua mask 16-bit dengan jumlah bit <= radius (0 = hanya mask kosong)
+    """
+    masks = np.arange(1 << CHUNK_BITS, dtype=np.uint32)
+    return masks[_popcount(masks) <= radius].astype(np.uint16)
+
+
+def _chunks(hashes):
+    # Potongan ke-j dari setiap hash: (CHUNKS, N) uint16
+    return np.stack([((hashes >> np.uint64(CHUNK_BITS * j)) & np.uint64(0xFFFF)).astype(np.uint16)
+                     for j in range(CHUNKS)])
+
+
+def _decode_predictions(blobs):
+    """
+    BLOB float32 dari SQLite menjadi satu array (k, jumlah kelas); NULL menjadi baris NaN
+    """
+    width = next((len(blob) for blob in blobs if blob is not None), None)
+    if width is None:
+        return None
+    missing = np.full(width // 4, np.nan, dtype=np.float32).tobytes()
+    data = b"".join(missing if blob is None else blob for blob in blobs)
+    return np.frombuffer(data, dtype=np.float32).reshape(len(blobs), -1)
+
+
+def _to_signed(value):
+    # SQLite INTEGER bertanda 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class SimilarityIndex:
+    """
+    Indeks dHash persisten untuk satu model; lookup dan add aman dipanggil dari banyak thread
+    """
+
+    def __init__(self, path, model_id, max_distance=DEFAULT_MAX_DISTANCE, max_color_diff=DEFAULT_MAX_COLOR_DIFF,
+                 flush_rows=256, flush_interval=1.0):
+        self.path = path
+        self.model_id = model_id
+        self.max_distance = max_distance
+        self.max_color_diff = max_color_diff
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending_rows = []  # belum ditulis ke SQLite
+        self._pending_since = 0.0
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+        self._load()
+        atexit.register(self.flush)
+
+    # --- MEMORI ---
+    # Semua entri ada di array yang tumbuh (kapasitas digandakan). Entri [0, _n_sorted) sudah masuk
+    # array potongan terurut; sisanya (paling banyak MERGE_ROWS) dicari secara linear lalu digabung.
+
+    def _load(self):
+        self._n = 0
+        self._n_sorted = 0
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._colors = np.empty((0, 3), dtype=np.int16)
+        self._rejected = np.empty(0, dtype=bool)
+        self._document_like = np.empty(0, dtype=bool)
+        self._messages = []
+        self._predictions = None  # (kapasitas, jumlah kelas) float32, baris NaN = tanpa prediksi
+        self._sorted = [np.empty(0, dtype=np.uint16) for _ in range(CHUNKS)]
+        self._order = [np.empty(0, dtype=np.int64) for _ in range(CHUNKS)]
+        cursor = self._connection.execute(
+            "SELECT hash, color, rejected, message, document_like, prediction FROM image_hashes "
+            "WHERE model = ? ORDER BY id", (self.model_id,))
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_ROWS)
+            if not rows:
+                break
+            hashes, colors, rejected, messages, document_like, blobs = zip(*rows)
+            colors = np.array(colors, dtype=np.int64)
+            self._append(np.array(hashes, dtype=np.int64).view(np.uint64),
+                         np.stack([colors >> 16 & 255, colors >> 8 & 255, colors & 255], axis=1),
+                         rejected, messages, document_like, _decode_predictions(blobs))
+        self._merge()
+
+    def _append(self, hashes, colors, rejected, messages, document_like, predictions):
+        """
+        predictions: array (k, jumlah kelas) dengan baris NaN untuk entri tanpa prediksi, atau None jika tidak ada
+        """
+        n = self._n + len(hashes)
+        if self._predictions is None and predictions is not None:
+            self._predictions = np.full((len(self._hashes), predictions.shape[1]), np.nan, dtype=np.float32)
+        if n > len(self._hashes):
+            capacity = max(n, 2 * len(self._hashes), 1024)
+            for name in ("_hashes", "_colors", "_rejected", "_document_like", "_predictions"):
+                old = getattr(self, name)
+                if old is None:
+                    continue
+                grown = np.full((capacity,) + old.shape[1:], np.nan, dtype=old.dtype) if name == "_predictions" \
+                    else np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                grown[:self._n] = old[:self._n]
+                setattr(self, name, grown)
+        self._hashes[self._n:n] = hashes
+        self._colors[self._n:n] = colors
+        self._rejected[self._n:n] = rejected
+        self._document_like[self._n:n] = document_like
+        if self._predictions is not None:
+            self._predictions[self._n:n] = np.nan if predictions is None else predictions
+        self._messages.extend(sys.intern(message) for message in messages)  # pesan penolakan hanya beberapa jenis
+        self._n = n
+
+    def _merge(self):
+        """
+        Sisipkan entri baru ke array potongan terurut (O(N) salin, tanpa mengurutkan ulang semuanya)
+        """
+        if self._n_sorted == self._n:
+            return
+        new_index = np.arange(self._n_sorted, self._n)
+        new_chunks = _chunks(self._hashes[self._n_sorted:self._n])
+        for j in range(CHUNKS):
+            order = np.argsort(new_chunks[j], kind="stable")
+            values = new_chunks[j][order]
+            positions = np.searchsorted(self._sorted[j], values, "right")
+            self._sorted[j] = np.insert(self._sorted[j], positions, values)
+            self._order[j] = np.insert(self._order[j], positions, new_index[order])
+        self._n_sorted = self._n
+
+    def __len__(self):
+        with self._lock:
+            return self._n
+
+    def _candidates(self, query, radius):
+        masks = _chunk_masks(radius // CHUNKS)
+        found = [np.arange(self._n_sorted, self._n)]  # entri baru: diverifikasi semuanya
+        for j in range(CHUNKS):
+            probes = np.uint16((query >> (CHUNK_BITS * j)) & 0xFFFF) ^ masks
+            left = np.searchsorted(self._sorted[j], probes, "left")
+            right = np.searchsorted(self._sorted[j], probes, "right")
+            hit = right > left
+            for lo, hi in zip(left[hit].tolist(), right[hit].tolist()):
+                found.append(self._order[j][lo:hi])
+        return np.concatenate(found)  # duplikat tidak mengubah hasil, np.unique lebih mahal dari verifikasinya
+
+    def lookup(self, signature, max_distance=None, require_prediction=False):
+        """
+        Entri terdekat (jarak Hamming <= max_distance dan warna mirip) atau None; jika jarak sama, yang terbaru.
+        require_prediction: abaikan entri yang ditolak validasi (tidak punya prediksi).
+        """
+        radius = self.max_distance if max_distance is None else max_distance
+        color = np.array(signature.color, dtype=np.int16)
+        with self._lock:
+            candidates = self._candidates(signature.hash, radius)
+            if not len(candidates):
+                return None
+            distances = _popcount(self._hashes[candidates] ^ np.uint64(signature.hash))
+            near = distances <= radius
+            distances, candidates = distances[near].astype(np.int64), candidates[near]
+            # Warna dan status hanya dicek untuk kandidat yang lolos jarak (biasanya sedikit)
+            ok = np.abs(self._colors[candidates] - color).max(axis=1) <= self.max_color_diff
+            if require_prediction:
+                ok &= ~self._rejected[candidates]
+            if not ok.any():
+                return None
+            distances, candidates = distances[ok], candidates[ok]
+            best = int(np.lexsort((-candidates, distances))[0])
+            i = int(candidates[best])
+            prediction = None
+            if self._predictions is not None and not np.isnan(self._predictions[i, 0]):
+                prediction = self._predictions[i].copy()
+            return SimilarMatch(int(distances[best]), bool(self._rejected[i]), self._messages[i],
+                                bool(self._document_like[i]), prediction)
+
+    def add(self, signature, rejected, message="", document_like=False, prediction=None):
+        """
+        Tambahkan hasil gambar yang divalidasi/diprediksi penuh; ditulis ke SQLite per batch
+        """
+        prediction = None if prediction is None else np.asarray(prediction, dtype=np.float32).copy()
+        r, g, b = signature.color
+        with self._lock:
+            self._append(np.array([signature.hash], dtype=np.uint64), [signature.color], [bool(rejected)], [str(message)],
+                         [bool(document_like)], None if prediction is None else prediction[None])
+            if self._n - self._n_sorted >= MERGE_ROWS:
+                self._merge()
+            if not self._pending_rows:
+                self._pending_since = time.monotonic()
+            self._pending_rows.append((self.model_id, _to_signed(signature.hash), (r << 16) | (g << 8) | b,
+                                       int(bool(rejected)), str(message), int(bool(document_like)),
+                                       None if prediction is None else prediction.tobytes()))
+            due = (len(self._pending_rows) >= self.flush_rows
+                   or time.monotonic() - self._pending_since >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending_rows = self._pending_rows, []
+            if not rows:
+                return
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO image_hashes (model, hash, color, rejected, message, document_like, prediction) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self._connection.close()
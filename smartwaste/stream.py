@@ -0,0 +1,352 @@
+"""
+Klasifikasi aliran video (file video atau kamera) untuk jalur pemilahan.
+
+Frame diambil dengan laju sampling tetap (--fps), frame yang hampir sama dengan frame terakhir yang
+diproses dilewati (selisih thumbnail grayscale kecil), lalu sisanya divalidasi dan diprediksi per batch.
+Hasilnya berupa timeline jumlah per kelas per bucket waktu.
+
+Membaca video (mp4, avi, mov, ...) dan kamera butuh OpenCV (pip install opencv-python-headless);
+GIF/WebP animasi tetap bisa dibaca dengan Pillow saja.
+
+Contoh:
+    python -m smartwaste.stream konveyor.mp4 --fps 2 --output timeline.csv
+    python -m smartwaste.stream 0 --fps 4 --duration 60
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from smartwaste.backends import BACKENDS, load_backend
+from smartwaste.decode import fit_working_size
+from smartwaste.heuristics import (detect_non_waste_batch, detect_non_waste_image, extract_features,
+                                   extract_features_batch, looks_like_document)
+from smartwaste.inference import CLASS_NAMES, CONFIDENCE_THRESHOLD, predict_batch, stack_images
+
+DEFAULT_SAMPLE_FPS = 2.0
+DEDUP_THRESHOLD = 2.0  # Rata-rata selisih piksel (0-255) thumbnail grayscale; di bawah ini frame dianggap sama
+DEDUP_SIZE = 16  # Sisi thumbnail pembanding
+STREAM_BATCH_SIZE = 16  # Frame per batch validasi + predict
+BUCKET_SECONDS = 5.0  # Lebar bucket timeline
+TIMELINE_BUCKETS = 720  # Bucket yang disimpan (rolling) untuk aliran tanpa akhir
+PIL_EXTENSIONS = (".gif", ".webp", ".png")
+
+
+# --- SUMBER FRAME ---
+
+def _open_capture(source):
+    try:
+        import cv2
+    except ImportError:
+        raise ImportError("Membaca video/kamera butuh OpenCV: pip install opencv-python-headless") from None
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not capture.isOpened():
+        capture.release()
+        raise FileNotFoundError(f"Video/kamera tidak dapat dibuka: {source}")
+    return cv2, capture
+
+
+def _iter_capture_frames(source, sample_fps, live):
+    cv2, capture = _open_capture(source)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        live = live or fps <= 0 or str(source).isdigit()
+        interval = 1.0 / sample_fps
+        started = time.monotonic()
+        next_sample = 0.0
+        index = 0
+        while True:
+            # grab() tanpa retrieve() melewati konversi warna frame yang tidak diambil
+            if not capture.grab():
+                break
+            timestamp = time.monotonic() - started if live else index / fps
+            index += 1
+            if timestamp + 1e-9 < next_sample:
+                continue
+            if live:
+                next_sample = timestamp + interval  # sumber langsung yang tertinggal tidak mengejar sampel lama
+            else:
+                next_sample = max(next_sample + interval, timestamp)
+            ok, frame = capture.retrieve()
+            if not ok:
+                break
+            yield timestamp, fit_working_size(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    finally:
+        capture.release()
+
+
+def _iter_pil_frames(path, sample_fps):
+    interval = 1.0 / sample_fps
+    with Image.open(path) as img:
+        timestamp = 0.0
+        next_sample = 0.0
+        for frame in ImageSequence.Iterator(img):
+            duration = frame.info.get("duration") or 100  # ms; 0/tanpa durasi diperlakukan 10 fps
+            if timestamp + 1e-9 >= next_sample:
+                next_sample = max(next_sample + interval, timestamp)
+                # Ukuran kerja sama dengan foto unggahan (decode_image) agar heuristik melihat resolusi yang sama
+                yield timestamp, fit_working_size(frame.convert("RGB"))
+            timestamp += duration / 1000.0
+
+
+def iter_frames(source, sample_fps=DEFAULT_SAMPLE_FPS, live=False):
+    """
+    Hasilkan (detik, gambar kerja PIL RGB) dengan laju sekitar sample_fps.
+    source: path video/GIF atau indeks kamera ("0"). Untuk file, waktu berasal dari nomor frame;
+    untuk kamera (atau live=True) dari jam dinding.
+    """
+    if sample_fps <= 0:
+        raise ValueError(f"sample_fps harus > 0, bukan {sample_fps}")
+    if str(source).lower().endswith(PIL_EXTENSIONS):
+        return _iter_pil_frames(source, sample_fps)
+    return _iter_capture_frames(source, sample_fps, live)
+
+
+# --- GERBANG DUPLIKAT ---
+
+class FrameGate:
+    """
+    Lewatkan frame yang hampir identik dengan frame terakhir yang diterima.
+    Pembanding: rata-rata selisih absolut thumbnail grayscale size x size (sekitar 0,1 ms per frame).
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, size=DEDUP_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self._last = None
+
+    def signature(self, image):
+        small = image.convert("L").resize((self.size, self.size), Image.Resampling.BOX)
+        return np.asarray(small, dtype=np.float32)
+
+    def accept(self, image):
+        """
+        True jika frame cukup berbeda dari frame terakhir yang diterima (frame pertama selalu diterima)
+        """
+        signature = self.signature(image)
+        if self._last is not None and float(np.abs(signature - self._last).mean()) < self.threshold:
+            return False
+        self._last = signature
+        return True
+
+    def reset(self):
+        self._last = None
+
+
+# --- TIMELINE ---
+
+class Timeline:
+    """
+    Jumlah prediksi per kelas per bucket waktu; hanya max_buckets bucket terakhir yang disimpan
+    """
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, max_buckets=TIMELINE_BUCKETS, labels=CLASS_NAMES):
+        self.bucket_seconds = bucket_seconds
+        self.labels = list(labels)
+        self.totals = Counter()
+        self._buckets = deque(maxlen=max_buckets)  # (awal bucket detik, Counter)
+
+    def add(self, timestamp, label):
+        start = timestamp - timestamp % self.bucket_seconds
+        if not self._buckets or self._buckets[-1][0] < start:
+            self._buckets.append((start, Counter()))
+        # Frame sedikit terlambat (batch) tetap masuk bucket terakhir agar timeline tidak mundur
+        self._buckets[-1][1][label] += 1
+        self.totals[label] += 1
+
+    def rows(self):
+        """
+        [{"Detik": awal bucket, kelas: jumlah, ...}] termasuk bucket kosong di antaranya
+        """
+        rows = []
+        previous = None
+        for start, counts in self._buckets:
+            while previous is not None and start - previous > self.bucket_seconds * 1.5:
+                previous += self.bucket_seconds
+                rows.append({"Detik": round(previous, 3), **{label: 0 for label in self.labels}})
+            rows.append({"Detik": round(start, 3), **{label: counts.get(label, 0) for label in self.labels}})
+            previous = start
+        return rows
+
+
+# --- KLASIFIKASI ALIRAN ---
+
+@dataclass
+class FrameResult:
+    timestamp: float
+    status: str  # ok | low_confidence | rejected
+    label: str = ""
+    confidence: float = 0.0
+    message: str = ""
+
+
+class StreamClassifier:
+    """
+    Terima frame satu per satu, buang duplikat, lalu validasi dan prediksi per batch_size frame.
+    feed() dan flush() mengembalikan hasil frame yang baru selesai, sesuai urutan waktu.
+    """
+
+    def __init__(self, model, batch_size=STREAM_BATCH_SIZE, validate=True, gate=None, timeline=None, metrics=None):
+        self.model = model
+        # Model dari registry membawa preprocessing dan nama kelasnya sendiri; backend biasa memakai default
+        self.preprocess = getattr(model, "preprocess", stack_images)
+        self.class_names = getattr(model, "class_names", CLASS_NAMES)
+        self.batch_size = batch_size
+        self.validate = validate
+        self.gate = gate if gate is not None else FrameGate()
+        self.timeline = timeline if timeline is not None else Timeline(labels=self.class_names)
+        self.metrics = metrics
+        self.stats = Counter()
+        self._pending = []  # (detik, gambar)
+
+    def _timer(self, stage):
+        return self.metrics.timer(stage) if self.metrics is not None else nullcontext()
+
+    def feed(self, timestamp, image):
+        self.stats["frames"] += 1
+        if not self.gate.accept(image):
+            self.stats["duplicates"] += 1
+            return []
+        self._pending.append((timestamp, image))
+        if len(self._pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def _validate(self, images):
+        """
+        (verdict, pesan, mirip dokumen?) per frame; frame berukuran sama divalidasi sebagai satu tumpukan
+        """
+        if len({image.size for image in images}) == 1:
+            stack = np.stack([np.asarray(image) for image in images])
+            features = extract_features_batch(stack)
+            verdicts, messages = detect_non_waste_batch(stack, features)
+            return list(zip(verdicts.tolist(), messages.tolist(), looks_like_document(features).tolist()))
+        results = []
+        for image in images:
+            features = extract_features(image)
+            verdict, message = detect_non_waste_image(image, features)
+            results.append((verdict, message, looks_like_document(features)))
+        return results
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        images = [image for _, image in pending]
+        if self.validate:
+            with self._timer("rules"):
+                checks = self._validate(images)
+        else:
+            checks = [(False, "", False)] * len(images)
+
+        accepted = [i for i, (verdict, _, _) in enumerate(checks) if not verdict]
+        predictions = {}
+        if accepted:
+            with self._timer("preprocess"):
+                batch = self.preprocess([images[i] for i in accepted])
+            with self._timer("predict"):
+                predictions = dict(zip(accepted, predict_batch(self.model, batch, batch_size=len(batch))))
+
+        results = []
+        for i, (timestamp, _) in enumerate(pending):
+            verdict, message, document_like = checks[i]
+            if verdict:
+                result = FrameResult(timestamp, "rejected", message=message)
+            else:
+                prediction = predictions[i]
+                label = self.class_names[int(np.argmax(prediction))]
+                confidence = round(float(np.max(prediction)) * 100, 2)
+                if confidence < CONFIDENCE_THRESHOLD:
+                    result = FrameResult(timestamp, "low_confidence", label, confidence, "Tingkat kepercayaan rendah")
+                elif document_like:
+                    result = FrameResult(timestamp, "rejected", label, confidence, "Gambar terdeteksi sebagai dokumen/kertas.")
+                else:
+                    result = FrameResult(timestamp, "ok", label, confidence)
+                    self.timeline.add(timestamp, label)
+            self.stats[result.status] += 1
+            results.append(result)
+        return results
+
+
+def classify_stream(frames, model, batch_size=STREAM_BATCH_SIZE, validate=True, gate=None, timeline=None, metrics=None):
+    """
+    Klasifikasikan semua frame dari iter_frames; hasilkan FrameResult secara bertahap
+    """
+    classifier = StreamClassifier(model, batch_size, validate, gate, timeline, metrics)
+    for timestamp, image in frames:
+        yield from classifier.feed(timestamp, image)
+    yield from classifier.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klasifikasi video/kamera SmartWaste dengan sampling frame")
+    parser.add_argument("source", help="File video/GIF atau indeks kamera (mis. 0)")
+    parser.add_argument("--fps", type=float, default=DEFAULT_SAMPLE_FPS, help="Frame yang diambil per detik video")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Selisih minimum (0-255) dengan frame sebelumnya; 0 = tanpa dedup")
+    parser.add_argument("--bucket", type=float, default=BUCKET_SECONDS, help="Lebar bucket timeline (detik)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE, help="Frame per batch prediksi")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras", help="Backend inferensi")
+    parser.add_argument("--model", default=None, help="Path model (default: model97.h5/.tflite/.npz sesuai backend)")
+    parser.add_argument("--duration", type=float, default=None, help="Berhenti setelah sekian detik (untuk kamera)")
+    parser.add_argument("--no-validation", action="store_true", help="Lewati detect_non_waste_image")
+    parser.add_argument("--output", help="Simpan timeline ke CSV")
+    args = parser.parse_args(argv)
+
+    if args.fps <= 0:
+        parser.error("--fps harus > 0")
+    if args.batch_size < 1:
+        parser.error("--batch-size harus >= 1")
+    if not args.source.isdigit() and not os.path.exists(args.source):
+        parser.error(f"File tidak ditemukan: {args.source}")
+
+    model = load_backend(args.backend, args.model)
+    if hasattr(model, "warmup"):
+        model.warmup()
+    timeline = Timeline(args.bucket)
+    frames = iter_frames(args.source, args.fps)
+    classifier = StreamClassifier(model, args.batch_size, not args.no_validation, FrameGate(args.dedup_threshold),
+                                  timeline)
+
+    def show(result):
+        print(f"{result.timestamp:8.2f}s  {result.status:<15} {result.label:<10} {result.confidence:6.2f}  {result.message}")
+
+    start = time.perf_counter()
+    last_timestamp = 0.0
+    try:
+        for timestamp, image in frames:
+            if args.duration is not None and timestamp > args.duration:
+                break
+            last_timestamp = timestamp
+            for result in classifier.feed(timestamp, image):
+                show(result)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        frames.close()  # lepaskan kamera/file
+    for result in classifier.flush():
+        show(result)
+    elapsed = time.perf_counter() - start
+
+    stats = dict(classifier.stats)
+    speed = f", {last_timestamp / elapsed:.1f}x waktu nyata" if elapsed and last_timestamp else ""
+    print(f"Selesai dalam {elapsed:.1f} detik untuk {last_timestamp:.1f} detik video{speed}: {stats}", file=sys.stderr)
+    print(f"Total per kelas: {dict(timeline.totals)}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["Detik"] + timeline.labels)
+            writer.writeheader()
+            writer.writerows(timeline.rows())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
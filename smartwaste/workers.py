@@ -0,0 +1,434 @@
+"""
+Pool proses inferensi: N proses worker berbagi satu salinan bobot model agar predict tidak lagi antre di GIL
+dan thread pool TensorFlow satu proses.
+
+Bobot dimuat sekali di proses induk. Model Keras dikonversi ke forward pass NumPy, lalu semua bobot dikemas
+ke satu blok shared memory yang dipetakan read-only oleh setiap worker. Model .tflite dipetakan (mmap) dari
+file oleh runtime TFLite sendiri. Setiap worker punya slab input/output di shared memory: batch 50x50 ditulis
+langsung ke slab dan hanya jumlah gambar yang lewat pipe, tanpa pickle tensor.
+
+Worker dijalankan sebagai `python -m smartwaste.workers --serve <alamat>` dan terhubung kembali ke induk lewat
+multiprocessing.connection (dengan authkey). Tidak ada __main__ atau os.environ proses induk yang diubah, sehingga
+aman dipakai dari Streamlit (script app terpasang sebagai __main__) dan dari banyak thread sekaligus.
+
+InferencePool punya predict(batch) seperti backend lain, sehingga predict_batch, registry model,
+smartwaste.batch dan smartwaste.server bisa memakainya tanpa perubahan lain.
+
+Contoh:
+    python -m smartwaste.workers --backend numpy --workers 1 2 4 8 --images 4096
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from smartwaste.backends import BACKENDS, NumpyModel, TFLiteModel, backend_model_path, load_backend
+from smartwaste.inference import DEFAULT_BATCH_SIZE, IMG_SIZE, load_keras_model
+
+logger = logging.getLogger("smartwaste.workers")
+
+SHARED_ALIGNMENT = 64  # Awal setiap array bobot di blok shared memory (byte)
+WORKER_START_TIMEOUT = 120.0  # Detik menunggu worker siap
+# Library BLAS/OpenMP di worker dibatasi satu thread: paralelisme datang dari jumlah proses
+THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+AUTHKEY_ENV = "SMARTWASTE_WORKER_AUTHKEY"  # Kunci koneksi worker -> induk (hex), tidak lewat argumen proses
+
+
+class WorkerError(RuntimeError):
+    """
+    Worker inferensi gagal memprediksi atau berhenti
+    """
+
+
+def _attach(name):
+    # Worker hanya meminjam blok milik proses induk: jangan didaftarkan ke resource tracker,
+    # yang akan menghapus blok itu saat worker keluar
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def share_numpy_model(model):
+    """
+    Kemas semua bobot NumpyModel ke satu blok shared memory; kembalikan (blok, konfigurasi JSON dengan offset)
+    """
+    layout, offset = [], 0
+    for layer in model.layers:
+        entries = []
+        for weight in layer["weights"]:
+            offset = -(-offset // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+            entries.append({"offset": offset, "shape": list(weight.shape)})
+            offset += weight.astype(np.float32).nbytes
+        layout.append(entries)
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for layer, entries in zip(model.layers, layout):
+        for weight, entry in zip(layer["weights"], entries):
+            view = np.ndarray(entry["shape"], dtype=np.float32, buffer=block.buf, offset=entry["offset"])
+            view[...] = weight
+    config = [{**{k: v for k, v in layer.items() if k != "weights"}, "weights": entries}
+              for layer, entries in zip(model.layers, layout)]
+    return block, json.dumps(config)
+
+
+def attach_numpy_model(block, config):
+    """
+    NumpyModel yang bobotnya berupa view read-only ke blok shared memory (tanpa salinan)
+    """
+    layers = []
+    for layer in json.loads(config):
+        weights = []
+        for entry in layer["weights"]:
+            view = np.ndarray(entry["shape"], dtype=np.float32, buffer=block.buf, offset=entry["offset"])
+            view.flags.writeable = False
+            weights.append(view)
+        layers.append({**layer, "weights": weights})
+    return NumpyModel(layers)
+
+
+def _worker_main(conn, source, input_name, output_name, input_shape, output_shape):
+    # Proses worker: bangun model dari sumber bersama lalu layani permintaan "n gambar di slab input"
+    blocks = []
+    try:
+        kind, value = source
+        if kind == "shared":
+            block_name, config = value
+            blocks.append(_attach(block_name))
+            model = attach_numpy_model(blocks[-1], config)
+        else:
+            model = TFLiteModel(value, num_threads=1)  # file .tflite di-mmap oleh runtime, dibagi lewat page cache
+        blocks += [_attach(input_name), _attach(output_name)]
+        inputs = np.ndarray(input_shape, dtype=np.float32, buffer=blocks[-2].buf)
+        outputs = np.ndarray(output_shape, dtype=np.float32, buffer=blocks[-1].buf)
+        conn.send(None)
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+        return
+    try:
+        while True:
+            try:
+                n = conn.recv()
+            except EOFError:
+                return
+            if n is None:
+                return
+            try:
+                outputs[:n] = model.predict(inputs[:n])
+                conn.send(None)
+            except Exception as e:
+                conn.send(f"{type(e).__name__}: {e}")
+    finally:
+        del inputs, outputs, model  # view harus dilepas sebelum blok ditutup
+        for block in blocks:
+            block.close()
+
+
+def _serve(address):
+    # Titik masuk proses worker: hubungi induk, terima argumen _worker_main lewat koneksi, lalu layani
+    conn = Client(address, authkey=bytes.fromhex(os.environ.pop(AUTHKEY_ENV)))
+    try:
+        _worker_main(conn, *conn.recv())
+    finally:
+        conn.close()
+
+
+def _worker_env(authkey):
+    # Variabel thread harus ada sebelum numpy diimpor di worker; path induk diteruskan agar smartwaste bisa diimpor
+    env = dict(os.environ, **{name: "1" for name in THREAD_ENV})
+    env[AUTHKEY_ENV] = authkey.hex()
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+    return env
+
+
+def _accept(listener, process, authkey, timeout):
+    # Listener.accept() tidak punya timeout: accept di thread, dan jika worker mati atau terlambat,
+    # induk menyambung ke listener-nya sendiri agar accept selesai dan thread tidak tertinggal
+    result = {}
+
+    def run():
+        try:
+            result["conn"] = listener.accept()
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run, name="inference-worker-accept", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while thread.is_alive() and process.poll() is None and time.monotonic() < deadline:
+        thread.join(0.05)
+    if thread.is_alive():
+        try:
+            Client(listener.address, authkey=authkey).close()
+        except OSError:
+            pass
+        thread.join()
+        if "conn" in result:
+            result.pop("conn").close()
+    if "conn" in result:
+        return result["conn"]
+    if process.poll() is not None:
+        raise WorkerError(f"Worker inferensi gagal start: proses keluar dengan kode {process.returncode}")
+    raise WorkerError(f"Worker inferensi gagal terhubung: {result.get('error', 'batas waktu habis')}")
+
+
+class _Worker:
+    def __init__(self, source, max_batch, input_size, num_classes, timeout=WORKER_START_TIMEOUT):
+        input_shape = (max_batch, input_size[1], input_size[0], 3)
+        output_shape = (max_batch, num_classes)
+        self.process = self.conn = self.input_block = self.output_block = None
+        try:
+            self.input_block = shared_memory.SharedMemory(create=True, size=int(np.prod(input_shape)) * 4)
+            self.output_block = shared_memory.SharedMemory(create=True, size=int(np.prod(output_shape)) * 4)
+            self.inputs = np.ndarray(input_shape, dtype=np.float32, buffer=self.input_block.buf)
+            self.outputs = np.ndarray(output_shape, dtype=np.float32, buffer=self.output_block.buf)
+            authkey = os.urandom(32)
+            with Listener(authkey=authkey) as listener:
+                self.process = subprocess.Popen(
+                    [sys.executable, "-m", "smartwaste.workers", "--serve", listener.address],
+                    env=_worker_env(authkey), stdin=subprocess.DEVNULL)
+                self.conn = _accept(listener, self.process, authkey, timeout)
+            self.conn.send((source, self.input_block.name, self.output_block.name, input_shape, output_shape))
+            self._wait_ready(timeout)
+        except BaseException:
+            self.close()  # slab shared memory tidak boleh tertinggal jika worker gagal start
+            raise
+
+    def _wait_ready(self, timeout):
+        if not self.conn.poll(timeout):
+            raise WorkerError("Worker inferensi tidak siap dalam batas waktu")
+        try:
+            error = self.conn.recv()
+        except EOFError:
+            error = f"proses keluar dengan kode {self.process.wait()}"
+        if error:
+            raise WorkerError(f"Worker inferensi gagal start: {error}")
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.conn is not None:
+            self.conn.close()
+        self.inputs = self.outputs = None  # view harus dilepas sebelum blok ditutup
+        for block in (self.input_block, self.output_block):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self.process = self.conn = self.input_block = self.output_block = None
+
+
+def _close_pool(workers, weights):
+    for worker in workers:
+        worker.close()
+    if weights is not None:
+        weights.close()
+        weights.unlink()
+
+
+class InferencePool:
+    """
+    N proses worker dengan bobot bersama; predict() membagi batch ke worker yang sedang menganggur.
+    Aman dipanggil dari banyak thread (sesi Streamlit): setiap potongan batch memakai satu worker sampai selesai.
+    """
+
+    def __init__(self, backend="numpy", path=None, workers=None, max_batch=DEFAULT_BATCH_SIZE, input_size=IMG_SIZE):
+        path = path or backend_model_path(backend)
+        self.backend = backend
+        self.path = path
+        self.max_batch = max_batch
+        self._weights = None
+        if backend == "tflite":
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model tidak ditemukan: {path} (buat dengan python -m smartwaste.convert)")
+            source = ("file", os.path.abspath(path))
+            probe = TFLiteModel(path)
+        else:
+            # Keras dikonversi ke forward pass NumPy sekali di sini; worker tidak perlu memuat tensorflow
+            if backend == "keras":
+                logger.info("Model Keras %s dikonversi ke forward pass NumPy untuk %s worker inferensi", path, workers)
+                probe = NumpyModel.from_keras(load_keras_model(path))
+            else:
+                probe = load_backend(backend, path)
+            self._weights, config = share_numpy_model(probe)
+            source = ("shared", (self._weights.name, config))
+        num_classes = probe.predict(np.zeros((1, input_size[1], input_size[0], 3), dtype=np.float32)).shape[-1]
+        del probe
+
+        # Proses baru (bukan fork): proses induk mungkin sudah memuat tensorflow
+        self._spawn = lambda: _Worker(source, max_batch, input_size, num_classes)
+        self._workers = []
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close_pool, self._workers, self._weights)
+        try:
+            for _ in range(workers or os.cpu_count() or 1):
+                self._workers.append(self._spawn())
+        except BaseException:
+            self._finalizer()
+            raise
+        self.num_classes = num_classes
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def __len__(self):
+        return len(self._workers)
+
+    def _acquire(self, outstanding, outputs):
+        # Thread hanya boleh menunggu worker jika tidak sedang memegang worker lain, agar tidak saling mengunci
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                if outstanding:
+                    self._collect(outstanding.popleft(), outputs)
+                    continue
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:
+                if not self._workers:
+                    raise WorkerError("Semua worker inferensi berhenti") from None
+
+    def _replace(self, dead):
+        # Worker yang mati tidak dikembalikan ke antrean: diganti proses baru agar permintaan berikutnya tidak
+        # dikirim ke proses yang sudah berhenti
+        dead.close()
+        with self._lock:
+            index = self._workers.index(dead)
+            try:
+                worker = self._spawn()
+            except Exception as e:
+                del self._workers[index]
+                logger.error("Worker inferensi pengganti gagal start (%s worker tersisa): %s", len(self._workers), e)
+                return
+            self._workers[index] = worker
+        logger.warning("Worker inferensi berhenti dan diganti proses baru")
+        self._idle.put(worker)
+
+    def _send(self, worker, n):
+        try:
+            worker.conn.send(n)
+        except OSError:
+            self._replace(worker)
+            raise WorkerError("Worker inferensi berhenti") from None
+
+    def _collect(self, item, outputs):
+        worker, start, n = item
+        try:
+            error = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            raise WorkerError("Worker inferensi berhenti") from None
+        if not error:
+            outputs[start:start + n] = worker.outputs[:n]
+        self._idle.put(worker)
+        if error:
+            raise WorkerError(error)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        if not self._finalizer.alive:
+            raise WorkerError("InferencePool sudah ditutup")
+        batch = np.asarray(batch, dtype=np.float32)
+        outputs = np.empty((len(batch), self.num_classes), dtype=np.float32)
+        outstanding = deque()  # (worker, awal, jumlah) yang sedang memprediksi untuk panggilan ini
+        try:
+            for start in range(0, len(batch), self.max_batch):
+                chunk = batch[start:start + self.max_batch]
+                worker = self._acquire(outstanding, outputs)
+                worker.inputs[:len(chunk)] = chunk  # satu memcpy ke slab shared memory, bukan pickle
+                self._send(worker, len(chunk))
+                outstanding.append((worker, start, len(chunk)))
+            while outstanding:
+                self._collect(outstanding.popleft(), outputs)
+        finally:
+            # Error di tengah jalan: tetap tunggu worker yang masih bekerja agar slab-nya tidak dipakai dua kali
+            for item in outstanding:
+                try:
+                    self._collect(item, outputs)
+                except WorkerError:
+                    pass
+        return outputs
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_inference_model(backend="keras", path=None, workers=0, max_batch=DEFAULT_BATCH_SIZE, input_size=IMG_SIZE):
+    """
+    Backend biasa di proses ini (workers=0) atau InferencePool dengan `workers` proses.
+    Dengan worker, backend keras dijalankan sebagai forward pass NumPy hasil konversi (dicatat di log)
+    """
+    if workers:
+        return InferencePool(backend, path, workers, max_batch, input_size)
+    return load_backend(backend, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur throughput InferencePool untuk beberapa jumlah worker")
+    parser.add_argument("--backend", choices=BACKENDS, default="numpy", help="Backend inferensi")
+    parser.add_argument("--model", default=None, help="Path model (default: model97.h5/.tflite/.npz sesuai backend)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1], help="Jumlah worker yang diukur")
+    parser.add_argument("--images", type=int, default=4096, help="Jumlah gambar per pengukuran")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Ukuran potongan per worker")
+    parser.add_argument("--clients", type=int, default=None, help="Thread pemanggil bersamaan (default: sama dengan worker)")
+    parser.add_argument("--serve", default=None, help=argparse.SUPPRESS)  # dipakai InferencePool untuk proses worker
+    args = parser.parse_args(argv)
+    if args.serve:
+        _serve(args.serve)
+        return 0
+
+    if args.batch_size < 1 or args.images < 1 or min(args.workers) < 1:
+        parser.error("--batch-size, --images dan --workers harus >= 1")
+    batch = np.random.default_rng(0).random((args.images, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        with InferencePool(args.backend, args.model, workers, args.batch_size) as pool:
+            pool.predict(batch[:args.batch_size])  # warm-up
+            clients = args.clients or workers
+            # Setiap thread pemanggil mengirim potongan batch-nya sendiri, seperti sesi yang memprediksi bersamaan
+            parts = np.array_split(batch, clients)
+            start = time.perf_counter()
+            threads = [threading.Thread(target=pool.predict, args=(part,)) for part in parts]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            rate = args.images / (time.perf_counter() - start)
+        baseline = baseline or rate / workers
+        print(f"{workers:3d} worker: {rate:8.1f} gambar/detik (efisiensi {rate / (baseline * workers):.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())